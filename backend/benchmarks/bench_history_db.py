@@ -0,0 +1,167 @@
+"""
+Benchmark del database della cronologia con 1 milione di righe.
+
+Confronta la gestione precedente (una connessione per operazione, journal
+di rollback, nessun indice) con la connessione persistente in modalità
+WAL e l'indice su (audio_generated, timestamp): latenza di inserimento e
+di lettura delle voci recenti. Per il database attuale misura anche la
+ricerca full-text con filtri e la paginazione a cursore.
+
+Esecuzione (dalla cartella backend):
+    python -m benchmarks.bench_history_db [righe]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+from datetime import date, datetime, timedelta
+
+from models.history import TextHistoryDatabase
+
+ROWS = 1_000_000
+OPERATIONS = 500
+
+TEMPLATES = [
+    "Messaggio di attesa numero {index}: la preghiamo di rimanere in linea.",
+    "Gli uffici sono chiusi, ci trovate dal lunedì al venerdì ({index}).",
+    "Premere {index} per parlare con un operatore.",
+    "Auguri di buon Natale e felice anno nuovo da tutto lo staff ({index})."
+]
+
+
+class LegacyHistoryDatabase(TextHistoryDatabase):
+    """Gestione precedente: connessione aperta e chiusa a ogni operazione."""
+
+    def _initialize_database(self) -> None:
+        connection = sqlite3.connect(self.database_path)
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS text_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                text TEXT NOT NULL,
+                voice TEXT NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                user_ip TEXT,
+                audio_generated BOOLEAN DEFAULT FALSE
+            )
+        ''')
+        connection.commit()
+        connection.close()
+
+    def add_text_entry(self, text, voice, user_ip=None):
+        connection = sqlite3.connect(self.database_path)
+        cursor = connection.execute('''
+            INSERT INTO text_history (text, voice, user_ip, audio_generated)
+            VALUES (?, ?, ?, TRUE)
+        ''', (text, voice, user_ip))
+        connection.commit()
+        entry_id = cursor.lastrowid
+        connection.close()
+        return entry_id
+
+    def get_recent_entries(self, limit=10):
+        connection = sqlite3.connect(self.database_path)
+        rows = connection.execute('''
+            SELECT id, text, voice, timestamp, user_ip
+            FROM text_history
+            WHERE audio_generated = TRUE
+            ORDER BY timestamp DESC
+            LIMIT ?
+        ''', (limit,)).fetchall()
+        connection.close()
+        return self._format_history_entries(rows)
+
+    def ping(self):
+        return True
+
+
+def populate(database_path: str, rows: int) -> None:
+    """Riempie la tabella con righe sintetiche distribuite su un anno."""
+    connection = sqlite3.connect(database_path)
+    start = datetime(2025, 1, 1)
+    step = timedelta(days=365) / rows
+    batch = []
+    for index in range(rows):
+        # Un testo natalizio ogni mille, gli altri a rotazione
+        template = TEMPLATES[3] if index % 1000 == 0 else TEMPLATES[index % 3]
+        batch.append((
+            template.format(index=index),
+            "it-IT-ElsaNeural" if index % 2 else "it-IT-DiegoNeural",
+            (start + step * index).strftime("%Y-%m-%d %H:%M:%S"),
+            "192.168.1.10"
+        ))
+        if len(batch) == 50_000:
+            connection.executemany(
+                "INSERT INTO text_history (text, voice, timestamp, user_ip, audio_generated) "
+                "VALUES (?, ?, ?, ?, TRUE)", batch)
+            batch.clear()
+    if batch:
+        connection.executemany(
+            "INSERT INTO text_history (text, voice, timestamp, user_ip, audio_generated) "
+            "VALUES (?, ?, ?, ?, TRUE)", batch)
+    connection.commit()
+    connection.close()
+
+
+def percentiles(timings: list) -> str:
+    """Formatta p50 e p99 in millisecondi."""
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2] * 1000
+    p99 = timings[min(int(len(timings) * 0.99), len(timings) - 1)] * 1000
+    return f"p50 {p50:8.3f} ms | p99 {p99:8.3f} ms"
+
+
+def measure(function, operations: int) -> list:
+    """Esegue la funzione più volte e restituisce i tempi."""
+    timings = []
+    for _ in range(operations):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_case(label: str, database_class, directory: str, rows: int) -> None:
+    """Popola un database e misura inserimenti e letture recenti."""
+    database_path = os.path.join(directory, f"{label}.db")
+    database_class(database_path).close()
+    populate(database_path, rows)
+
+    database = database_class(database_path)
+    inserts = measure(
+        lambda: database.add_text_entry("Benvenuti nel nostro centralino.", "it-IT-DiegoNeural"),
+        OPERATIONS)
+    reads = measure(lambda: database.get_recent_entries(10), OPERATIONS // 10)
+    print(f"{label:>7} | insert {percentiles(inserts)} | recenti {percentiles(reads)}")
+
+    if isinstance(database, LegacyHistoryDatabase):
+        database.close()
+        return
+
+    searches = {
+        "natale": lambda: database.search_entries("natale"),
+        "natale+voce+date": lambda: database.search_entries(
+            "natale", voice="it-IT-ElsaNeural",
+            date_from=date(2025, 6, 1), date_to=date(2025, 12, 31)),
+        "operatore": lambda: database.search_entries("operatore"),
+        "voce, 10a pagina": lambda: page_through(database, 10, voice="it-IT-DiegoNeural")
+    }
+    for name, search in searches.items():
+        print(f"{'':>7} | ricerca {name:<17} {percentiles(measure(search, OPERATIONS // 10))}")
+    database.close()
+
+
+def page_through(database: TextHistoryDatabase, pages: int, **filters) -> None:
+    """Scorre le pagine di una ricerca con il cursore."""
+    cursor = None
+    for _ in range(pages):
+        cursor = database.search_entries(cursor=cursor, **filters)["next_cursor"]
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    print(f"Righe: {rows:,}")
+    with tempfile.TemporaryDirectory() as directory:
+        run_case("legacy", LegacyHistoryDatabase, directory, rows)
+        run_case("wal", TextHistoryDatabase, directory, rows)
@@ -21,12 +21,15 @@ class AzureConfiguration:
         speech_key: Chiave API per Azure Speech Services
         speech_region: Regione Azure (default: westeurope)
         speech_endpoint: Endpoint personalizzato opzionale
+        synthesizer_pool_size: Synthesizer pre-connessi per formato di output
     """
 
     def __init__(self):
         self.speech_key = os.getenv("AZURE_SPEECH_KEY")
         self.speech_region = os.getenv("AZURE_SPEECH_REGION", "westeurope")
         self.speech_endpoint = os.getenv("AZURE_SPEECH_ENDPOINT")
+        self.synthesizer_pool_size = int(
+            os.getenv("AZURE_SYNTHESIZER_POOL_SIZE", "2"))
 
     def is_configured(self) -> bool:
         """Verifica se la configurazione Azure è completa."""
@@ -118,6 +121,268 @@ class AudioQualityConfiguration:
         return cls.CONFIGURATIONS[quality]
 
 
+class SynthesisCacheConfiguration:
+    """
+    Gestisce la configurazione della cache di sintesi vocale.
+
+    Attributes:
+        enabled: Abilita il riutilizzo degli audio già sintetizzati
+        directory: Directory dove salvare gli audio in cache
+        max_size_bytes: Dimensione massima della cache su disco
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+        self.directory = os.getenv("TTS_CACHE_DIR", "cache/tts")
+        self.max_size_bytes = int(os.getenv("TTS_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+    def log_status(self) -> None:
+        """Registra la configurazione corrente della cache."""
+        if self.enabled:
+            logger.info(
+                f"Cache sintesi attiva: {self.directory} "
+                f"(max {self.max_size_bytes // (1024 * 1024)} MB)")
+        else:
+            logger.info("Cache sintesi disabilitata")
+
+
+class EdgeTTSConfiguration:
+    """
+    Gestisce la configurazione del servizio Edge TTS.
+
+    Attributes:
+        streaming_decode: Decodifica l'MP3 durante il download invece che al termine
+    """
+
+    def __init__(self):
+        self.streaming_decode = os.getenv(
+            "EDGE_TTS_STREAMING_DECODE", "true").lower() == "true"
+
+
+class RenderPoolConfiguration:
+    """
+    Gestisce la configurazione del pool di elaborazione audio.
+
+    Attributes:
+        mode: Tipo di pool ("process" o "thread")
+        max_workers: Numero di worker (None = numero di CPU)
+    """
+
+    def __init__(self):
+        self.mode = os.getenv("RENDER_POOL_MODE", "process").lower()
+        workers = os.getenv("RENDER_POOL_WORKERS")
+        self.max_workers = int(workers) if workers else None
+
+    def log_status(self) -> None:
+        """Registra la configurazione corrente del pool."""
+        logger.info(
+            f"Pool elaborazione audio: {self.mode}, "
+            f"{self.max_workers or os.cpu_count()} worker")
+
+
+class RenderJobConfiguration:
+    """
+    Gestisce la configurazione della coda di render asincroni.
+
+    Attributes:
+        max_concurrent: Numero massimo di render eseguiti in parallelo
+        max_queued: Numero massimo di render in attesa
+        max_retained: Numero di render terminati conservati per il download
+    """
+
+    def __init__(self):
+        self.max_concurrent = int(os.getenv("RENDER_JOBS_MAX_CONCURRENT", "2"))
+        self.max_queued = int(os.getenv("RENDER_JOBS_MAX_QUEUED", "100"))
+        self.max_retained = int(os.getenv("RENDER_JOBS_RETAINED", "200"))
+
+
+class BatchConfiguration:
+    """
+    Gestisce la configurazione dei render in blocco dei prompt IVR.
+
+    Attributes:
+        max_prompts: Numero massimo di prompt per manifest
+        max_concurrency: Numero massimo di prompt elaborati in parallelo
+    """
+
+    def __init__(self):
+        self.max_prompts = int(os.getenv("BATCH_MAX_PROMPTS", "200"))
+        self.max_concurrency = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+
+
+class ProviderSchedulerConfiguration:
+    """
+    Gestisce i limiti di concorrenza e frequenza verso i servizi TTS.
+
+    Per ogni servizio (AZURE, EDGE, GOOGLE) si configurano
+    TTS_<SERVIZIO>_MAX_CONCURRENT, TTS_<SERVIZIO>_REQUESTS_PER_SECOND e
+    TTS_<SERVIZIO>_CHARACTERS_PER_SECOND (0 = nessun limite).
+
+    Attributes:
+        max_wait_seconds: Attesa massima di una richiesta prima del rifiuto
+        providers: Limiti per nome del servizio
+    """
+
+    DEFAULT_LIMITS = {
+        "azure": {"max_concurrent": 8, "requests_per_second": 5.0, "characters_per_second": 0.0},
+        "edge": {"max_concurrent": 4, "requests_per_second": 2.0, "characters_per_second": 0.0},
+        "google": {"max_concurrent": 8, "requests_per_second": 5.0, "characters_per_second": 0.0}
+    }
+
+    def __init__(self):
+        self.max_wait_seconds = float(os.getenv("TTS_SCHEDULER_MAX_WAIT", "30"))
+        self.providers: Dict[str, Dict[str, float]] = {}
+
+        for provider, defaults in self.DEFAULT_LIMITS.items():
+            prefix = f"TTS_{provider.upper()}_"
+            self.providers[provider] = {
+                "max_concurrent": int(os.getenv(
+                    prefix + "MAX_CONCURRENT", str(defaults["max_concurrent"]))),
+                "requests_per_second": float(os.getenv(
+                    prefix + "REQUESTS_PER_SECOND", str(defaults["requests_per_second"]))),
+                "characters_per_second": float(os.getenv(
+                    prefix + "CHARACTERS_PER_SECOND", str(defaults["characters_per_second"])))
+            }
+
+    def log_status(self) -> None:
+        """Registra i limiti configurati per ogni servizio."""
+        for provider, limits in self.providers.items():
+            logger.info(
+                f"Limiti {provider}: {limits['max_concurrent']} concorrenti, "
+                f"{limits['requests_per_second']} req/s, "
+                f"{limits['characters_per_second']} caratteri/s")
+
+
+class TextChunkingConfiguration:
+    """
+    Gestisce la sintesi a blocchi dei testi lunghi.
+
+    Attributes:
+        enabled: Se True i testi lunghi vengono divisi e sintetizzati in parallelo
+        min_chars: Lunghezza minima del testo per la divisione in blocchi
+        max_chars: Lunghezza massima di un blocco
+        pause_ms: Pausa inserita tra un blocco e il successivo
+        crossfade_ms: Dissolvenza ai punti di giunzione
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("TTS_CHUNKING_ENABLED", "false").lower() == "true"
+        self.min_chars = int(os.getenv("TTS_CHUNKING_MIN_CHARS", "400"))
+        self.max_chars = int(os.getenv("TTS_CHUNKING_MAX_CHARS", "250"))
+        self.pause_ms = int(os.getenv("TTS_CHUNKING_PAUSE_MS", "150"))
+        self.crossfade_ms = int(os.getenv("TTS_CHUNKING_CROSSFADE_MS", "20"))
+
+
+class FailoverConfiguration:
+    """
+    Gestisce hedging e failover tra servizi TTS.
+
+    Attributes:
+        service_order: Ordine dei servizi di ripiego dopo quello richiesto
+        hedge_percentile: Percentile di latenza oltre il quale avviare l'hedging
+        default_delay: Ritardo di hedging finché mancano misure di latenza
+        min_delay: Ritardo minimo prima di una richiesta ridondante
+    """
+
+    def __init__(self):
+        self.service_order = [
+            service.strip().lower()
+            for service in os.getenv("TTS_FAILOVER_ORDER", "azure,edge,google").split(",")
+            if service.strip()
+        ]
+        self.hedge_percentile = float(os.getenv("TTS_HEDGE_PERCENTILE", "95"))
+        self.default_delay = float(os.getenv("TTS_HEDGE_DEFAULT_DELAY", "2.0"))
+        self.min_delay = float(os.getenv("TTS_HEDGE_MIN_DELAY", "0.2"))
+
+
+class ProviderHealthConfiguration:
+    """
+    Gestisce la verifica periodica dei servizi TTS e i circuit breaker.
+
+    Attributes:
+        probe_interval: Secondi tra due verifiche dei servizi
+        probe_timeout: Tempo massimo di una verifica
+        window: Esiti recenti considerati per il tasso di successo
+        failure_threshold: Errori consecutivi che aprono il circuito
+        open_seconds: Attesa iniziale del circuito aperto prima della verifica
+        max_open_seconds: Attesa massima del circuito aperto
+    """
+
+    def __init__(self):
+        self.probe_interval = float(os.getenv("HEALTH_PROBE_INTERVAL", "30"))
+        self.probe_timeout = float(os.getenv("HEALTH_PROBE_TIMEOUT", "10"))
+        self.window = int(os.getenv("HEALTH_WINDOW", "50"))
+        self.failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+        self.open_seconds = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+        self.max_open_seconds = float(os.getenv("CIRCUIT_MAX_OPEN_SECONDS", "300"))
+
+
+class ReadinessConfiguration:
+    """
+    Gestisce le verifiche di prontezza eseguite in background.
+
+    Attributes:
+        check_interval: Secondi tra due verifiche (database)
+    """
+
+    def __init__(self):
+        self.check_interval = float(os.getenv("READINESS_CHECK_INTERVAL", "15"))
+
+
+class HistoryDatabaseConfiguration:
+    """
+    Gestisce le impostazioni SQLite del database della cronologia.
+
+    Attributes:
+        cache_size_mb: Cache delle pagine SQLite in MB
+        mmap_size_mb: Memory mapping del file in MB (0 = disattivato)
+        synchronous: Livello di sincronizzazione su disco (OFF, NORMAL, FULL)
+        writer_batch_size: Inserimenti massimi per transazione del writer
+        writer_flush_interval: Attesa massima di un inserimento prima del salvataggio (secondi)
+        retention_days: Giorni di cronologia nel database principale (0 = nessuna archiviazione)
+        archive_directory: Directory dei database di archivio mensili
+        maintenance_interval: Secondi tra due esecuzioni della manutenzione
+        vacuum_free_ratio: Quota di pagine libere oltre la quale eseguire VACUUM
+    """
+
+    def __init__(self):
+        self.writer_batch_size = int(os.getenv("HISTORY_WRITER_BATCH_SIZE", "100"))
+        self.writer_flush_interval = float(os.getenv("HISTORY_WRITER_FLUSH_MS", "50")) / 1000
+        self.cache_size_mb = int(os.getenv("HISTORY_DB_CACHE_SIZE_MB", "16"))
+        self.mmap_size_mb = int(os.getenv("HISTORY_DB_MMAP_SIZE_MB", "64"))
+        synchronous = os.getenv("HISTORY_DB_SYNCHRONOUS", "NORMAL").upper()
+        self.synchronous = synchronous if synchronous in ("OFF", "NORMAL", "FULL") else "NORMAL"
+        self.retention_days = int(os.getenv("HISTORY_RETENTION_DAYS", "0"))
+        self.archive_directory = os.getenv("HISTORY_ARCHIVE_DIR", "archive")
+        self.maintenance_interval = float(
+            os.getenv("HISTORY_MAINTENANCE_INTERVAL_HOURS", "24")) * 3600
+        self.vacuum_free_ratio = float(os.getenv("HISTORY_VACUUM_FREE_RATIO", "0.1"))
+
+
+class WebSocketConfiguration:
+    """
+    Gestisce le code di invio dei WebSocket.
+
+    Attributes:
+        send_queue_size: Messaggi massimi in attesa per client
+        slow_client_policy: Politica a coda piena (drop_oldest o disconnect)
+        send_timeout: Secondi massimi per un invio prima di chiudere il client
+        recent_history_size: Voci recenti della cronologia mantenute in memoria
+        max_delta_entries: Voci mancanti oltre le quali un client riceve "resync"
+        coalesce_window: Secondi di aggregazione delle nuove voci (0 = disattivata)
+        coalesce_max_batch: Voci massime in un messaggio aggregato
+    """
+
+    def __init__(self):
+        self.send_queue_size = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+        self.slow_client_policy = os.getenv("WS_SLOW_CLIENT_POLICY", "drop_oldest").lower()
+        self.send_timeout = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+        self.recent_history_size = int(os.getenv("HISTORY_RECENT_CACHE_SIZE", "100"))
+        self.max_delta_entries = int(os.getenv("WS_MAX_DELTA_ENTRIES", "100"))
+        self.coalesce_window = float(os.getenv("WS_COALESCE_WINDOW_MS", "0")) / 1000
+        self.coalesce_max_batch = int(os.getenv("WS_COALESCE_MAX_BATCH", "50"))
+
+
 class FilePathConfiguration:
     """Gestisce i percorsi dei file e delle directory dell'applicazione."""
 
@@ -154,6 +419,18 @@ class ApplicationConfiguration:
         self.network = NetworkConfiguration()
         self.audio_quality = AudioQualityConfiguration()
         self.paths = FilePathConfiguration()
+        self.synthesis_cache = SynthesisCacheConfiguration()
+        self.edge_tts = EdgeTTSConfiguration()
+        self.render_pool = RenderPoolConfiguration()
+        self.render_jobs = RenderJobConfiguration()
+        self.batch = BatchConfiguration()
+        self.provider_scheduler = ProviderSchedulerConfiguration()
+        self.text_chunking = TextChunkingConfiguration()
+        self.failover = FailoverConfiguration()
+        self.provider_health = ProviderHealthConfiguration()
+        self.readiness = ReadinessConfiguration()
+        self.history_database = HistoryDatabaseConfiguration()
+        self.websocket = WebSocketConfiguration()
 
     def initialize(self) -> None:
         """
@@ -162,6 +439,9 @@ class ApplicationConfiguration:
         """
         self.azure.log_status()
         self.network.log_status()
+        self.synthesis_cache.log_status()
+        self.render_pool.log_status()
+        self.provider_scheduler.log_status()
         self.paths.ensure_directories_exist()
 
     def is_ready(self) -> bool:
@@ -14,41 +14,61 @@ Caratteristiche principali:
 - Supporto formati telefonici (PCM, A-law, u-law)
 """
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, File, UploadFile, Form, Query, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import uuid
 import shutil
 import sqlite3
-import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Set, Tuple
+from contextlib import asynccontextmanager
+from functools import partial
 from pydub import AudioSegment
-from pydub.effects import normalize
 import tempfile
 import logging
-import azure.cognitiveservices.speech as speechsdk
 import asyncio
 import aiofiles
 import requests
 import io
-from datetime import datetime
+from datetime import date, datetime
 import threading
+import time
 import subprocess
 import sys
 
 # Import moduli refactorizzati organizzati per cartella
 from core.config import ApplicationConfiguration
-from models.history import TextHistoryDatabase
+from models.history import TextHistoryDatabase, InvalidHistoryCursor
 from models.voice_catalog import VoiceCatalog
 from services.azure_speech import AzureSpeechService, SSMLParameters, VoiceStyle
 from services.edge_tts_service import EdgeTTSService
 from services.google_tts_service import GoogleTTSService
+from services.synthesized_audio import SynthesizedAudio
+from services.text_chunker import split_text, stitch_audio
 from managers.websocket_manager import HistoryUpdateManager, UpdateProgressManager as WebSocketUpdateProgressManager
 from managers.update_manager import UpdateNotificationManager
 from managers.audio_processor import AudioConverter, AudioQualitySpec
 from managers.music_library import MusicLibrary
+from managers.audio_mixer import MusicBedSettings
+from managers.render_pool import RenderWorkerPool
+from managers.render_pipeline import (
+    RenderJob, decode_music, encode_audio, mix_final_audio, render_audio, render_telephony_pcm
+)
+from managers.render_jobs import RenderJobQueue, RenderJobQueueFull, RenderJobState
+from managers.provider_scheduler import ProviderScheduler, ProviderLimits, ProviderRateLimited
+from managers.provider_health import ProviderHealthMonitor, is_provider_failure
+from managers.readiness import ReadinessMonitor
+from managers.history_writer import HistoryWriter
+from managers.history_retention import HistoryRetentionJob
+from managers.provider_failover import HedgedRequestRunner, LatencyBudgetExceeded, VoiceMapper
+from managers.batch_manifest import (
+    BatchManifestError, parse_batch_manifest, group_batch_prompts, write_batch_archive
+)
+from managers.audio_stream import TelephonyStreamEncoder
 from managers.version_manager import VersionManager
+from managers.synthesis_cache import SynthesisCache
 
 # Configurazione logging con formato dettagliato
 logging.basicConfig(
@@ -84,20 +104,54 @@ IS_CONFIGURATION_VALID = app_config.is_ready()
 azure_speech_service = AzureSpeechService(
     speech_key=AZURE_SPEECH_KEY,
     speech_region=AZURE_SPEECH_REGION,
-    speech_endpoint=AZURE_SPEECH_ENDPOINT
+    speech_endpoint=AZURE_SPEECH_ENDPOINT,
+    synthesizer_pool_size=app_config.azure.synthesizer_pool_size
 ) if AZURE_SPEECH_KEY else None
 
 # Servizio Edge TTS (gratuito, sempre disponibile)
-edge_tts_service = EdgeTTSService()
+edge_tts_service = EdgeTTSService(
+    streaming_decode=app_config.edge_tts.streaming_decode
+)
 
 # Servizio Google TTS (opzionale, richiede credenziali)
 google_tts_service = GoogleTTSService()
 
 # Gestore per cronologia testi real-time
-manager = HistoryUpdateManager()
+manager = HistoryUpdateManager(
+    recent_capacity=app_config.websocket.recent_history_size,
+    coalesce_window=app_config.websocket.coalesce_window,
+    max_batch_size=app_config.websocket.coalesce_max_batch,
+    max_queue_size=app_config.websocket.send_queue_size,
+    slow_client_policy=app_config.websocket.slow_client_policy,
+    send_timeout=app_config.websocket.send_timeout
+)
 
 # Gestore database per cronologia testi
-history_db = TextHistoryDatabase()
+history_db = TextHistoryDatabase(
+    app_config.paths.DATABASE_FILE,
+    cache_size_mb=app_config.history_database.cache_size_mb,
+    mmap_size_mb=app_config.history_database.mmap_size_mb,
+    synchronous=app_config.history_database.synchronous
+)
+
+# Salvataggio della cronologia a blocchi, fuori dall'event loop
+history_writer = HistoryWriter(
+    history_db.add_text_entries,
+    max_batch_size=app_config.history_database.writer_batch_size,
+    flush_interval=app_config.history_database.writer_flush_interval
+)
+
+# Salvataggi della cronologia in background (riferimenti fino al completamento)
+history_tasks: Set[asyncio.Task] = set()
+
+# Archiviazione e compattazione periodica della cronologia
+history_retention = HistoryRetentionJob(
+    history_db,
+    retention_days=app_config.history_database.retention_days,
+    archive_directory=app_config.history_database.archive_directory,
+    interval=app_config.history_database.maintenance_interval,
+    vacuum_free_ratio=app_config.history_database.vacuum_free_ratio
+)
 
 # Gestore notifiche aggiornamenti
 update_notification_manager = UpdateNotificationManager()
@@ -108,6 +162,32 @@ audio_converter = AudioConverter(output_directory="output")
 # Libreria musicale
 music_library = MusicLibrary(library_directory="uploads/library")
 
+# Pool di worker per elaborazione audio CPU-bound (fuori dall'event loop)
+render_pool = RenderWorkerPool(
+    mode=app_config.render_pool.mode,
+    max_workers=app_config.render_pool.max_workers
+)
+
+# Limiti di concorrenza e frequenza verso i servizi TTS
+provider_scheduler = ProviderScheduler({
+    provider: ProviderLimits(
+        max_wait_seconds=app_config.provider_scheduler.max_wait_seconds, **limits)
+    for provider, limits in app_config.provider_scheduler.providers.items()
+})
+
+# Coda dei render asincroni, con avanzamento notificato via WebSocket
+render_jobs = RenderJobQueue(
+    broadcast=manager.broadcast,
+    output_directory="output/jobs",
+    max_concurrent=app_config.render_jobs.max_concurrent,
+    max_queued=app_config.render_jobs.max_queued,
+    max_retained=app_config.render_jobs.max_retained
+)
+
+# Margine sulla durata della musica letta dalla libreria, per coprire
+# gli arrotondamenti del ricampionamento della voce
+MUSIC_DURATION_MARGIN_MS = 10
+
 # Gestore versioni
 version_manager = VersionManager(
     version_file="VERSION",
@@ -117,16 +197,48 @@ version_manager = VersionManager(
 # Catalogo voci
 voice_catalog = VoiceCatalog()
 
-# Flag per tracciare disponibilità reale di Azure Speech
-azure_speech_available = False
+# Hedging e failover tra servizi TTS per le richieste con budget di latenza
+voice_mapper = VoiceMapper({
+    voice["short_name"]: voice["gender"] for voice in voice_catalog.get_all_voices()
+})
+hedged_runner = HedgedRequestRunner(
+    hedge_percentile=app_config.failover.hedge_percentile,
+    default_delay=app_config.failover.default_delay,
+    min_delay=app_config.failover.min_delay
+)
 
+# Cache su disco degli audio sintetizzati
+synthesis_cache = SynthesisCache(
+    cache_directory=app_config.synthesis_cache.directory,
+    max_size_bytes=app_config.synthesis_cache.max_size_bytes,
+    enabled=app_config.synthesis_cache.enabled
+)
 
-# Funzioni wrapper per compatibilità con codice esistente
+# Stato di salute dei servizi TTS configurati (verifica periodica e circuit breaker)
+health_probes = {"edge": edge_tts_service.probe}
+if azure_speech_service:
+    health_probes["azure"] = azure_speech_service.probe
+if google_tts_service.is_available():
+    health_probes["google"] = google_tts_service.probe
+
+provider_health = ProviderHealthMonitor(
+    health_probes,
+    interval=app_config.provider_health.probe_interval,
+    probe_timeout=app_config.provider_health.probe_timeout,
+    window=app_config.provider_health.window,
+    failure_threshold=app_config.provider_health.failure_threshold,
+    open_seconds=app_config.provider_health.open_seconds,
+    max_open_seconds=app_config.provider_health.max_open_seconds
+)
 
+# Verifiche di prontezza con I/O (database), eseguite in background per /ready
+readiness_monitor = ReadinessMonitor(
+    {"database": history_db.ping},
+    interval=app_config.readiness.check_interval
+)
 
-def add_text_to_history(text: str, voice: str, user_ip: str = None) -> int:
-    """Aggiunge testo alla cronologia usando il gestore database."""
-    return history_db.add_text_entry(text, voice, user_ip)
+
+# Funzioni wrapper per compatibilità con codice esistente
 
 
 def get_recent_history(limit: int = 10) -> List[Dict]:
@@ -134,6 +246,38 @@ def get_recent_history(limit: int = 10) -> List[Dict]:
     return history_db.get_recent_entries(limit)
 
 
+async def get_recent_history_cached(limit: int = 10) -> List[Dict]:
+    """
+    Recupera la cronologia recente dalla memoria del gestore WebSocket.
+
+    Il database viene interrogato solo all'avvio a freddo (per popolare
+    la memoria) o per limiti oltre la capacità della memoria. Se la
+    lettura fallisce la memoria resta da popolare e si riprova alla
+    richiesta successiva.
+
+    Args:
+        limit: Numero massimo di voci
+
+    Returns:
+        Voci dalla più recente, lista vuota se il database non risponde
+    """
+    entries = manager.get_recent(limit)
+    if entries is not None:
+        return entries
+
+    loop = asyncio.get_running_loop()
+    try:
+        entries = await loop.run_in_executor(
+            None, history_db.fetch_recent_entries, max(limit, manager.recent_capacity))
+    except Exception as e:
+        logger.error(f"❌ Errore lettura cronologia recente: {e}")
+        return []
+
+    if limit <= manager.recent_capacity:
+        manager.load_recent(entries)
+    return entries[:limit]
+
+
 def convert_audio_to_format(audio_segment, output_format, audio_quality, custom_filename):
     """
     Wrapper per compatibilità - usa il convertitore audio refactorizzato.
@@ -176,93 +320,927 @@ AZURE_VOICES = {
 }
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Inizializzazione e validazione della configurazione Azure Speech Services"""
-    global azure_speech_available
+@app.on_event("startup")
+async def startup_event():
+    """Inizializzazione e validazione della configurazione Azure Speech Services"""
+    logger.info("🚀 ===========================================")
+    logger.info("🚀 crazy-phoneTTS Server - Avvio in corso...")
+    logger.info("🚀 ===========================================")
+    logger.info(f"📍 [Config] Azure Speech Region: {AZURE_SPEECH_REGION}")
+
+    if AZURE_SPEECH_KEY:
+        logger.info("🔑 [Azure] API Key configurata correttamente")
+
+        # Pre-connessione dei synthesizer Azure Speech
+        try:
+            created = await azure_speech_service.warm_up()
+            logger.info(f"🔌 [Azure] Synthesizer pre-connessi: {created}")
+        except Exception as e:
+            logger.error(f"❌ [Azure] Pre-connessione fallita: {e}")
+    else:
+        logger.warning(
+            "⚠️ [Azure] API Key non configurata. Utilizzare Edge TTS o Google TTS")
+
+    # Prima verifica dei servizi TTS (senza sintesi), poi verifica periodica
+    results = await provider_health.probe_all(trip_on_failure=True)
+    for service, healthy in results.items():
+        if healthy:
+            logger.info(f"✅ [{service.capitalize()}] Servizio raggiungibile")
+        else:
+            logger.warning(
+                f"⚠️ [{service.capitalize()}] Servizio non raggiungibile, nuova verifica "
+                f"tra {provider_health.retry_after(service):.0f}s")
+    provider_health.start()
+
+    await readiness_monitor.run_checks()
+    readiness_monitor.start()
+
+    history_writer.start()
+    history_retention.start()
+
+    # Popola la cronologia recente in memoria prima delle riconnessioni dei client
+    await get_recent_history_cached()
+
+    logger.info("✅ ===========================================")
+    logger.info("✅ TTS Server pronto per l'uso!")
+    logger.info("✅ ===========================================")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Arresta la verifica dei servizi, la coda dei render, il pool di elaborazione audio e il database"""
+    await provider_health.stop()
+    await readiness_monitor.stop()
+    await render_jobs.shutdown()
+    render_pool.shutdown()
+    await history_retention.stop()
+    # Salvataggi della cronologia ancora in corso, poi svuotamento del writer
+    await asyncio.gather(*history_tasks, return_exceptions=True)
+    await history_writer.stop()
+    manager.flush_pending()
+    history_db.close()
+
+
+def build_ssml_parameters(ssml_options: dict = None) -> Optional[SSMLParameters]:
+    """
+    Converte un dizionario di opzioni SSML in SSMLParameters.
+
+    Args:
+        ssml_options: Opzioni SSML personalizzate (rate, pitch, volume, etc.)
+
+    Returns:
+        SSMLParameters corrispondenti, None se non fornite
+    """
+    if not ssml_options:
+        return None
+
+    return SSMLParameters(
+        rate=ssml_options.get('rate', 'medium'),
+        pitch=ssml_options.get('pitch', 'medium'),
+        volume=ssml_options.get('volume', 'medium'),
+        emphasis=ssml_options.get('emphasis'),
+        break_time=ssml_options.get('break_time'),
+        style=ssml_options.get('style'),
+        style_degree=ssml_options.get('style_degree', '1.0')
+    )
+
+
+async def generate_azure_speech(text: str, voice: str, output_path: str, ssml_options: dict = None):
+    """
+    Wrapper per compatibilità che usa il servizio Azure Speech refactorizzato.
+
+    Args:
+        text: Testo da sintetizzare
+        voice: Nome della voce Azure (es. it-IT-ElsaNeural)
+        output_path: Percorso file output
+        ssml_options: Opzioni SSML personalizzate (rate, pitch, volume, etc.)
+
+    Returns:
+        bool: True se successo, False altrimenti
+    """
+    if not azure_speech_service:
+        logger.error("❌ [Azure] Servizio non configurato correttamente")
+        return False
+
+    return await azure_speech_service.synthesize_to_file(
+        text=text,
+        voice=voice,
+        output_path=output_path,
+        ssml_parameters=build_ssml_parameters(ssml_options)
+    )
+
+
+async def synthesize_azure_speech(text: str, voice: str, ssml_options: dict = None) -> Optional[SynthesizedAudio]:
+    """
+    Sintetizza con Azure Speech restituendo l'audio in memoria.
+
+    Args:
+        text: Testo da sintetizzare
+        voice: Nome della voce Azure (es. it-IT-ElsaNeural)
+        ssml_options: Opzioni SSML personalizzate (rate, pitch, volume, etc.)
+
+    Returns:
+        SynthesizedAudio con i campioni PCM, None in caso di errore
+    """
+    if not azure_speech_service:
+        logger.error("❌ [Azure] Servizio non configurato correttamente")
+        return None
+
+    return await azure_speech_service.synthesize(
+        text=text,
+        voice=voice,
+        ssml_parameters=build_ssml_parameters(ssml_options)
+    )
+
+
+def should_chunk_text(text: str) -> bool:
+    """
+    Verifica se un testo va sintetizzato a blocchi.
+
+    Args:
+        text: Testo da sintetizzare
+
+    Returns:
+        True se la sintesi a blocchi è attiva e il testo è abbastanza lungo
+    """
+    return (app_config.text_chunking.enabled and
+            len(text) > app_config.text_chunking.min_chars)
+
+
+def supports_native_telephony(tts_service: str, audio_quality: str, text: str) -> bool:
+    """
+    Verifica se un servizio può restituire direttamente il WAV telefonico.
+
+    I testi sintetizzati a blocchi vengono ricomposti in PCM, quindi non
+    usano il formato nativo.
+
+    Args:
+        tts_service: Servizio TTS (azure, edge, google)
+        audio_quality: Qualità audio richiesta (pcm, alaw, ulaw)
+        text: Testo da sintetizzare
+
+    Returns:
+        True se il servizio è configurato e supporta il formato
+    """
+    if should_chunk_text(text):
+        return False
+    if tts_service == "azure":
+        return azure_speech_service is not None
+    if tts_service == "google":
+        return (google_tts_service.is_available() and
+                google_tts_service.supports_telephony(audio_quality))
+    return False
+
+
+def load_cached_voice(cache_key: str) -> Optional[SynthesizedAudio]:
+    """
+    Legge e decodifica un audio dalla cache di sintesi.
+
+    Esegue I/O su disco: va chiamata in un thread (run_in_executor).
+
+    Args:
+        cache_key: Chiave calcolata con build_key
+
+    Returns:
+        Audio in memoria, None se non presente in cache
+    """
+    cached_audio = synthesis_cache.get(cache_key)
+    if cached_audio is None:
+        return None
+    return SynthesizedAudio.from_wav_bytes(cached_audio)
+
+
+def store_cached_voice(cache_key: str, voice_audio: SynthesizedAudio) -> None:
+    """
+    Codifica in WAV e salva un audio nella cache di sintesi.
+
+    Esegue I/O su disco: va chiamata in un thread (run_in_executor).
+
+    Args:
+        cache_key: Chiave calcolata con build_key
+        voice_audio: Audio sintetizzato
+    """
+    synthesis_cache.put(cache_key, voice_audio.to_wav_bytes())
+
+
+async def synthesize_native_telephony(
+    tts_service: str,
+    text: str,
+    voice_name: str,
+    synthesis_parameters: dict,
+    audio_quality: str,
+    custom_filename: str,
+    output_directory: Optional[str] = None
+) -> str:
+    """
+    Sintetizza una voce senza musica direttamente nel formato telefonico finale.
+
+    Il file WAV restituito dal servizio (8kHz PCM, A-law o u-law) viene
+    salvato così com'è, usando la cache di sintesi con una chiave che
+    include il formato.
+
+    Args:
+        tts_service: Servizio TTS (azure o google)
+        text: Testo da sintetizzare
+        voice_name: Voce da utilizzare
+        synthesis_parameters: Parametri di sintesi del servizio
+        audio_quality: Qualità audio (pcm, alaw, ulaw)
+        custom_filename: Nome base del file di output
+        output_directory: Directory del file (None = directory di output)
+
+    Returns:
+        Percorso del file WAV finale
+
+    Raises:
+        HTTPException: Se la sintesi fallisce
+    """
+    cache_key = synthesis_cache.build_key(
+        tts_service, voice_name, text,
+        {**synthesis_parameters, 'telephony_format': audio_quality})
+    loop = asyncio.get_running_loop()
+    audio_data = await loop.run_in_executor(None, synthesis_cache.get, cache_key)
+
+    if audio_data is not None:
+        logger.info("♻️ [TTS Cache] Audio telefonico riutilizzato dalla cache")
+    else:
+        logger.info(f"📞 [TTS] Richiesta formato telefonico nativo: {audio_quality}")
+
+        if tts_service == "google":
+            try:
+                async with provider_slot(tts_service, text):
+                    audio_data = await google_tts_service.synthesize_telephony(
+                        text=text,
+                        voice_name=voice_name,
+                        audio_quality=audio_quality,
+                        speed=synthesis_parameters['speed']
+                    )
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"❌ [Google TTS] Errore sintesi: {e}")
+                audio_data = None
+        else:
+            async with provider_slot(tts_service, text):
+                audio_data = ensure_synthesized(tts_service, await azure_speech_service.synthesize_telephony(
+                    text=text,
+                    voice=voice_name,
+                    audio_quality=audio_quality,
+                    ssml_parameters=build_ssml_parameters(synthesis_parameters)
+                ))
+
+        if audio_data is None:
+            raise HTTPException(
+                status_code=500, detail=f"{tts_service.upper()} TTS generation failed")
+
+        await loop.run_in_executor(None, synthesis_cache.put, cache_key, audio_data)
+
+    converter = (AudioConverter(output_directory=output_directory)
+                 if output_directory else audio_converter)
+    return await loop.run_in_executor(
+        None, converter.save_encoded, audio_data, "wav", custom_filename)
+
+
+def validate_generation_parameters(
+    text: str,
+    music_volume: float,
+    music_before: float,
+    music_after: float,
+    fade_in_duration: float,
+    fade_out_duration: float,
+    output_format: str,
+    audio_quality: str
+) -> None:
+    """
+    Valida i parametri di una richiesta di generazione audio.
+
+    Raises:
+        HTTPException: 400 se un parametro non è valido
+    """
+    if not text.strip():
+        raise HTTPException(
+            status_code=400, detail="Testo non può essere vuoto")
+
+    if music_volume < 0 or music_volume > 1:
+        raise HTTPException(
+            status_code=400, detail="Volume musica deve essere tra 0.0 e 1.0")
+
+    if music_before < 0 or music_after < 0:
+        raise HTTPException(
+            status_code=400, detail="Durata musica deve essere positiva")
+
+    if fade_in_duration < 0 or fade_out_duration < 0:
+        raise HTTPException(
+            status_code=400, detail="Durata fade deve essere positiva")
+
+    # Validazione formato output
+    if output_format not in ["wav", "mp3", "gsm"]:
+        raise HTTPException(
+            status_code=400, detail="Formato output deve essere wav, mp3 o gsm")
+
+    # Validazione qualità audio
+    if audio_quality not in ["pcm", "alaw", "ulaw"]:
+        raise HTTPException(
+            status_code=400, detail="Qualità audio deve essere pcm, alaw o ulaw")
+
+
+def build_synthesis_parameters(tts_service: str, voice_name: str) -> Dict[str, Any]:
+    """
+    Restituisce i parametri di sintesi per centralino del servizio indicato.
+
+    Args:
+        tts_service: Servizio TTS (azure, edge, google)
+        voice_name: Nome della voce
+
+    Returns:
+        Parametri di sintesi (usati anche come chiave di cache)
+    """
+    if tts_service == "edge":
+        # Converti i parametri SSML in parametri Edge TTS
+        rate_map = {'x-slow': '-50%', 'slow': '-25%',
+                    'medium': '+0%', 'fast': '+25%', 'x-fast': '+50%'}
+        volume_map = {'silent': '-100%', 'soft': '-50%',
+                      'medium': '+0%', 'loud': '+50%', 'x-loud': '+100%'}
+
+        return {
+            'rate': rate_map.get('medium', '+0%'),
+            'volume': volume_map.get('loud', '+50%'),
+            'pitch': "+0Hz"
+        }
+
+    if tts_service == "google":
+        return {'speed': 1.0}
+
+    # Opzioni SSML personalizzate per centralini
+    return {
+        'rate': 'medium',
+        'pitch': 'medium',
+        'volume': 'loud',
+        'style': 'customerservice' if 'Neural' in voice_name else None,
+        'emphasis': 'moderate'
+    }
+
+
+def build_mix_settings(
+    music_volume: float,
+    music_before: float,
+    music_after: float,
+    fade_in: bool,
+    fade_out: bool,
+    fade_in_duration: float,
+    fade_out_duration: float
+) -> MusicBedSettings:
+    """
+    Converte i parametri del form (in secondi) nelle impostazioni del mixer.
+
+    Returns:
+        Impostazioni della musica di sottofondo
+    """
+    return MusicBedSettings(
+        music_volume=music_volume,
+        music_before_ms=int(music_before * 1000),
+        music_after_ms=int(music_after * 1000),
+        fade_in=fade_in,
+        fade_out=fade_out,
+        fade_in_ms=int(fade_in_duration * 1000),
+        fade_out_ms=int(fade_out_duration * 1000)
+    )
+
+
+@asynccontextmanager
+async def provider_slot(tts_service: str, text: str) -> AsyncIterator[None]:
+    """
+    Esegue una chiamata al servizio TTS rispettando i limiti configurati.
+
+    Args:
+        tts_service: Servizio TTS (azure, edge, google)
+        text: Testo da sintetizzare
+
+    Gli esiti della chiamata aggiornano lo stato di salute del servizio e
+    le latenze usate per l'hedging; con il circuito aperto la richiesta
+    viene rifiutata senza attese. Gli errori della richiesta (voce o
+    parametri non validi) non contano come guasti del servizio.
+
+    Raises:
+        HTTPException: 503 se il circuito del servizio è aperto,
+            429 se i limiti del servizio non consentono la richiesta
+    """
+    if not provider_health.allow_request(tts_service):
+        retry_after = provider_health.retry_after(tts_service)
+        raise HTTPException(
+            status_code=503,
+            detail=f"{tts_service.upper()} TTS temporaneamente non disponibile",
+            headers={"Retry-After": str(max(int(retry_after + 0.999), 1))}
+        )
+
+    try:
+        async with provider_scheduler.slot(tts_service, text):
+            started = time.monotonic()
+            try:
+                yield
+            except Exception as e:
+                if is_provider_failure(e):
+                    provider_health.record_failure(tts_service, str(e) or type(e).__name__)
+                raise
+            latency = time.monotonic() - started
+            provider_health.record_success(tts_service, latency)
+            hedged_runner.tracker.record(tts_service, latency)
+    except ProviderRateLimited as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(max(int(e.retry_after + 0.999), 1))}
+        )
+
+
+def ensure_synthesized(tts_service: str, audio: Any) -> Any:
+    """
+    Verifica il risultato di un servizio TTS.
+
+    Args:
+        tts_service: Servizio TTS che ha prodotto il risultato
+        audio: Audio restituito (None se la sintesi è fallita)
+
+    Returns:
+        L'audio ricevuto
+
+    Raises:
+        HTTPException: 500 se la sintesi è fallita
+    """
+    if audio is None:
+        raise HTTPException(
+            status_code=500, detail=f"{tts_service.upper()} TTS generation failed")
+    return audio
+
+
+async def synthesize_voice(
+    tts_service: str,
+    text: str,
+    voice_name: str,
+    synthesis_parameters: dict
+) -> SynthesizedAudio:
+    """
+    Sintetizza la voce con il servizio selezionato, usando la cache di sintesi.
+
+    Args:
+        tts_service: Servizio TTS (azure, edge, google)
+        text: Testo da sintetizzare
+        voice_name: Voce da utilizzare
+        synthesis_parameters: Parametri di sintesi del servizio
+
+    Returns:
+        Audio sintetizzato in memoria
+
+    Raises:
+        HTTPException: Se il servizio non è configurato o la sintesi fallisce
+    """
+    cache_key = synthesis_cache.build_key(
+        tts_service, voice_name, text, synthesis_parameters)
+    loop = asyncio.get_running_loop()
+    cached_audio = await loop.run_in_executor(None, load_cached_voice, cache_key)
+
+    if cached_audio is not None:
+        # Audio già sintetizzato con gli stessi parametri: nessuna chiamata al servizio
+        logger.info("♻️ [TTS Cache] Audio riutilizzato dalla cache")
+        return cached_audio
+
+    if should_chunk_text(text):
+        chunks = split_text(text, app_config.text_chunking.max_chars)
+        if len(chunks) > 1:
+            # Blocchi sintetizzati in parallelo (entro i limiti del servizio),
+            # ognuno con la propria voce di cache, poi ricomposti
+            logger.info(f"✂️ [TTS] Testo lungo diviso in {len(chunks)} blocchi")
+            chunk_tasks = [
+                asyncio.create_task(
+                    synthesize_voice(tts_service, chunk, voice_name, synthesis_parameters))
+                for chunk in chunks
+            ]
+            try:
+                parts = await asyncio.gather(*chunk_tasks)
+            except BaseException:
+                # Un blocco fallito rende inutili gli altri: liberano subito
+                # slot e quota del servizio
+                for task in chunk_tasks:
+                    task.cancel()
+                await asyncio.gather(*chunk_tasks, return_exceptions=True)
+                raise
+            voice_audio = await render_pool.run(
+                stitch_audio, list(parts),
+                app_config.text_chunking.pause_ms,
+                app_config.text_chunking.crossfade_ms)
+            await loop.run_in_executor(None, store_cached_voice, cache_key, voice_audio)
+            return voice_audio
+
+    if tts_service == "edge":
+        # Usa Edge TTS (gratuito)
+        async with provider_slot(tts_service, text):
+            voice_audio = ensure_synthesized(tts_service, await edge_tts_service.synthesize(
+                text=text,
+                voice=voice_name,
+                **synthesis_parameters
+            ))
+    elif tts_service == "google":
+        # Usa Google Cloud TTS
+        if not google_tts_service.is_available():
+            raise HTTPException(
+                status_code=503,
+                detail="Google TTS non configurato. Configura credenziali Google Cloud o usa tts_service='edge'."
+            )
+
+        try:
+            async with provider_slot(tts_service, text):
+                voice_audio = await google_tts_service.synthesize(
+                    text=text,
+                    voice_name=voice_name,
+                    speed=synthesis_parameters['speed']
+                )
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"❌ [Google TTS] Errore sintesi: {e}")
+            voice_audio = None
+    else:
+        # Usa Azure Speech Services (richiede API key)
+        if not azure_speech_service:
+            raise HTTPException(
+                status_code=503,
+                detail="Azure Speech Service non configurato. Usa tts_service='edge' per il servizio gratuito."
+            )
+
+        async with provider_slot(tts_service, text):
+            voice_audio = ensure_synthesized(
+                tts_service, await synthesize_azure_speech(text, voice_name, synthesis_parameters))
+
+    if voice_audio is None:
+        raise HTTPException(
+            status_code=500, detail=f"{tts_service.upper()} TTS generation failed")
+
+    await loop.run_in_executor(None, store_cached_voice, cache_key, voice_audio)
+    return voice_audio
+
+
+def is_tts_service_configured(tts_service: str) -> bool:
+    """
+    Verifica se un servizio TTS può ricevere richieste.
+
+    Args:
+        tts_service: Servizio TTS (azure, edge, google)
+
+    Returns:
+        True se il servizio è configurato
+    """
+    if tts_service == "azure":
+        return azure_speech_service is not None
+    if tts_service == "google":
+        return google_tts_service.is_available()
+    return tts_service == "edge"
+
+
+async def synthesize_voice_hedged(
+    tts_service: str,
+    text: str,
+    voice_name: str,
+    latency_budget: float
+) -> Tuple[str, SynthesizedAudio]:
+    """
+    Sintetizza la voce con hedging e failover verso gli altri servizi.
+
+    Il servizio richiesto parte per primo; se non risponde entro il
+    percentile di latenza configurato, o fallisce, la sintesi parte sul
+    servizio successivo di TTS_FAILOVER_ORDER con una voce equivalente.
+    Un audio già in cache per il servizio richiesto viene restituito
+    senza hedging.
+
+    Args:
+        tts_service: Servizio TTS primario
+        text: Testo da sintetizzare
+        voice_name: Voce richiesta sul servizio primario
+        latency_budget: Tempo massimo complessivo in secondi
+
+    Returns:
+        Servizio che ha prodotto l'audio e audio sintetizzato
+
+    Raises:
+        HTTPException: 504 se il budget scade, altrimenti l'errore dell'ultimo servizio
+    """
+    synthesis_parameters = build_synthesis_parameters(tts_service, voice_name)
+    cache_key = synthesis_cache.build_key(tts_service, voice_name, text, synthesis_parameters)
+    if synthesis_cache.contains(cache_key):
+        # Nessuna chiamata ai servizi: niente hedging né campioni di latenza
+        return tts_service, await synthesize_voice(
+            tts_service, text, voice_name, synthesis_parameters)
+
+    services = [tts_service] + [
+        service for service in app_config.failover.service_order
+        if service != tts_service and is_tts_service_configured(service)
+        and provider_health.allow_request(service)
+    ]
+
+    attempts = []
+    for service in services:
+        service_voice = voice_name if service == tts_service else voice_mapper.map(voice_name, service)
+        attempts.append((service, partial(
+            synthesize_voice, service, text, service_voice,
+            build_synthesis_parameters(service, service_voice))))
+
+    try:
+        served_by, voice_audio = await hedged_runner.run(attempts, latency_budget)
+    except LatencyBudgetExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    if served_by != tts_service:
+        logger.info(f"🔀 [TTS] Audio fornito da {served_by.upper()} invece di {tts_service.upper()}")
+    return served_by, voice_audio
+
+
+async def build_render_job(
+    voice_audio: SynthesizedAudio,
+    output_format: str,
+    audio_quality: str,
+    custom_filename: str,
+    music: Optional[AudioSegment],
+    library_song_id: Optional[str],
+    mix_settings: Optional[MusicBedSettings],
+    output_directory: Optional[str] = None
+) -> RenderJob:
+    """
+    Prepara il lavoro di elaborazione, caricando la musica della libreria.
+
+    La lettura della versione PCM (e la sua eventuale generazione, con
+    decodifica completa della canzone) avviene in un thread.
+
+    Args:
+        voice_audio: Voce sintetizzata
+        output_format: Formato output (wav, mp3, gsm)
+        audio_quality: Qualità audio (pcm, alaw, ulaw)
+        custom_filename: Nome base del file di output
+        music: Musica caricata dall'utente, già decodificata
+        library_song_id: ID della canzone della libreria (se usata)
+        mix_settings: Parametri di mixaggio (None = solo voce)
+        output_directory: Directory del file (None = directory di output)
+
+    Returns:
+        RenderJob pronto per il pool di worker
+    """
+    voice = voice_audio.to_audio_segment()
+
+    # Per la libreria legge solo la parte necessaria della versione
+    # PCM già normalizzata, senza decodificare l'intero file
+    if library_song_id and mix_settings is not None:
+        total_duration = (mix_settings.music_before_ms + len(voice) +
+                          mix_settings.music_after_ms + MUSIC_DURATION_MARGIN_MS)
+        music = await asyncio.get_running_loop().run_in_executor(
+            None, partial(music_library.load_pcm_segment,
+                          library_song_id, max_duration_ms=total_duration))
+        if music is None:
+            metadata = music_library.get_song(library_song_id)
+            music = await render_pool.run(decode_music, metadata["file_path"])
+
+    return RenderJob(
+        voice=voice,
+        output_format=output_format,
+        audio_quality=audio_quality,
+        custom_filename=custom_filename,
+        music=music if mix_settings is not None else None,
+        mix_settings=mix_settings,
+        output_directory=output_directory or audio_converter.output_directory
+    )
+
+
+async def record_text_history(text: str, voice_name: str) -> None:
+    """
+    Salva il testo nella cronologia e notifica gli utenti connessi.
+
+    Gli errori vengono solo registrati: la cronologia non deve mai
+    interrompere la generazione audio.
+
+    Args:
+        text: Testo sintetizzato
+        voice_name: Voce utilizzata
+    """
+    try:
+        # Ottieni IP utente per tracking (solo ultimi caratteri per privacy)
+        user_ip = "unknown"  # In produzione: request.client.host
+
+        history_id = await history_writer.add(text, voice_name, user_ip)
+
+        # Aggiorna le voci recenti in memoria (stesso formato del database)
+        manager.add_recent(history_db.format_entry(
+            history_id, text, voice_name,
+            datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"), user_ip))
+
+        # Notifica tutti gli utenti connessi del nuovo testo (eventualmente
+        # aggregato con altri nella finestra di history_batch)
+        manager.publish_new_text({
+            "id": history_id,
+            "text": text[:100] + "..." if len(text) > 100 else text,
+            "voice": voice_name,
+            "timestamp": datetime.now().isoformat(),
+            "user_ip": user_ip[-8:] if user_ip != "unknown" else "unknown"
+        })
+
+        logger.info(f"✅ [History] Testo salvato (ID: {history_id})")
+    except Exception as e:
+        logger.warning(f"⚠️ [History] Errore salvataggio: {e}")
+        # Non interrompere la generazione audio per errori cronologia
+
+
+def schedule_text_history(text: str, voice_name: str) -> None:
+    """
+    Avvia in background il salvataggio del testo nella cronologia.
+
+    Le risposte audio non attendono il blocco del writer né il commit:
+    nessun chiamante usa l'ID del record.
+
+    Args:
+        text: Testo sintetizzato
+        voice_name: Voce utilizzata
+    """
+    task = asyncio.create_task(record_text_history(text, voice_name))
+    history_tasks.add(task)
+    task.add_done_callback(history_tasks.discard)
 
-    logger.info("🚀 ===========================================")
-    logger.info("🚀 crazy-phoneTTS Server - Avvio in corso...")
-    logger.info("🚀 ===========================================")
-    logger.info(f"📍 [Config] Azure Speech Region: {AZURE_SPEECH_REGION}")
 
-    if AZURE_SPEECH_KEY:
-        logger.info("🔑 [Azure] API Key configurata correttamente")
+def build_download_filename(custom_filename: str, output_format: str) -> str:
+    """
+    Costruisce il nome del file scaricato dal client.
 
-        # Test della connessione Azure Speech
-        try:
-            await test_azure_speech_connection()
-            azure_speech_available = True
-            logger.info("✅ [Azure] Connessione verificata con successo")
-        except Exception as e:
-            azure_speech_available = False
-            logger.error(f"❌ [Azure] Connessione fallita: {e}")
-            logger.warning(
-                "⚠️ [Azure] Azure Speech non disponibile. Utilizzare Edge TTS (gratuito)")
-    else:
-        azure_speech_available = False
-        logger.warning(
-            "⚠️ [Azure] API Key non configurata. Utilizzare Edge TTS o Google TTS")
+    Args:
+        custom_filename: Nome personalizzato richiesto
+        output_format: Estensione del file
 
-    logger.info("✅ ===========================================")
-    logger.info("✅ TTS Server pronto per l'uso!")
-    logger.info("✅ ===========================================")
+    Returns:
+        Nome file sanificato con data (es. centralino_audio_250101.wav)
+    """
+    # Pulisci il nome personalizzato per la sicurezza e genera data
+    clean_name = "".join(
+        c for c in custom_filename if c.isalnum() or c in "._-").strip()
+    if not clean_name:
+        clean_name = "centralino_audio"
+
+    date_str = datetime.now().strftime("%y%m%d")
+    return f"{clean_name}_{date_str}.{output_format}"
+
+
+def open_voice_stream(
+    tts_service: str,
+    text: str,
+    voice_name: str,
+    synthesis_parameters: dict
+) -> Optional[AsyncIterator[bytes]]:
+    """
+    Apre uno stream PCM a 8kHz della voce, se il servizio lo supporta.
 
+    Args:
+        tts_service: Servizio TTS (azure, edge, google)
+        text: Testo da sintetizzare
+        voice_name: Voce da utilizzare
+        synthesis_parameters: Parametri di sintesi del servizio
 
-async def test_azure_speech_connection():
+    Returns:
+        Iteratore asincrono di blocchi PCM, None se il servizio non
+        supporta la sintesi incrementale
     """
-    Testa la connessione ad Azure Speech Services usando il servizio refactorizzato.
+    if tts_service == "edge":
+        pcm_stream = edge_tts_service.stream_pcm(
+            text=text,
+            voice=voice_name,
+            sample_rate=TelephonyStreamEncoder.SAMPLE_RATE,
+            **synthesis_parameters
+        )
+    elif tts_service == "azure" and azure_speech_service:
+        pcm_stream = azure_speech_service.stream_telephony(
+            text=text,
+            voice=voice_name,
+            ssml_parameters=build_ssml_parameters(synthesis_parameters)
+        )
+    else:
+        return None
 
-    Raises:
-        ValueError: Se la chiave Azure non è configurata
-        Exception: Se il test di connessione fallisce
+    async def scheduled_stream():
+        # Lo slot del servizio resta occupato per tutta la durata dello stream
+        async with provider_slot(tts_service, text):
+            try:
+                async for block in pcm_stream:
+                    yield block
+            finally:
+                await pcm_stream.aclose()
+
+    return scheduled_stream()
+
+
+async def create_streaming_response(
+    tts_service: str,
+    text: str,
+    voice_name: str,
+    synthesis_parameters: dict,
+    audio_quality: str,
+    custom_filename: str,
+    music: Optional[AudioSegment],
+    library_song_id: Optional[str],
+    mix_settings: Optional[MusicBedSettings],
+    latency_budget: Optional[float] = None
+) -> StreamingResponse:
     """
-    if not azure_speech_service:
-        raise ValueError("Azure Speech Service non configurato")
+    Crea una risposta WAV in streaming (PCM, A-law o u-law a 8kHz).
 
-    logger.info("🔍 [Azure] Verifica connessione in corso...")
+    Per i messaggi solo voce non in cache, con Edge e Azure, i campioni
+    vengono codificati e inviati mentre la sintesi è ancora in corso
+    (intestazione con lunghezza ignota). Negli altri casi l'audio viene
+    sintetizzato e mixato nel pool di worker, poi codificato e inviato a
+    blocchi con intestazione completa.
 
-    success = await azure_speech_service.test_connection()
-    if not success:
-        raise Exception("Test connessione Azure Speech fallito")
+    Durante la sintesi la voce riceve a blocchi il passa-basso a 8kHz e
+    l'attenuazione di 3 dB di process_voice, calcolati sullo stream a 8kHz
+    anziché alla frequenza del servizio; manca solo la normalizzazione di
+    picco, che richiede l'audio completo. Il livello può quindi differire
+    da quello del file scaricato per la stessa richiesta.
 
-
-async def generate_azure_speech(text: str, voice: str, output_path: str, ssml_options: dict = None):
-    """
-    Wrapper per compatibilità che usa il servizio Azure Speech refactorizzato.
+    Il testo entra in cronologia solo con l'audio completo: dopo il render
+    nel pool o dopo l'invio dell'ultimo blocco in streaming.
 
     Args:
+        tts_service: Servizio TTS (azure, edge, google)
         text: Testo da sintetizzare
-        voice: Nome della voce Azure (es. it-IT-ElsaNeural)
-        output_path: Percorso file output
-        ssml_options: Opzioni SSML personalizzate (rate, pitch, volume, etc.)
+        voice_name: Voce da utilizzare
+        synthesis_parameters: Parametri di sintesi del servizio
+        audio_quality: Qualità audio (pcm, alaw, ulaw)
+        custom_filename: Nome base del file scaricato
+        music: Musica caricata dall'utente, già decodificata
+        library_song_id: ID della canzone della libreria (se usata)
+        mix_settings: Parametri di mixaggio (None = solo voce)
+        latency_budget: Budget di latenza per hedging e failover (None = disattivo)
 
     Returns:
-        bool: True se successo, False altrimenti
+        StreamingResponse con l'audio WAV
+
+    Raises:
+        HTTPException: Se la sintesi fallisce prima dell'invio dei dati
     """
-    if not azure_speech_service:
-        logger.error("❌ [Azure] Servizio non configurato correttamente")
-        return False
+    encoder = TelephonyStreamEncoder(audio_quality)
+    headers = {
+        "Content-Disposition":
+            f'attachment; filename="{build_download_filename(custom_filename, "wav")}"'
+    }
+    media_type = get_media_type("wav")
+
+    cache_key = synthesis_cache.build_key(
+        tts_service, voice_name, text, synthesis_parameters)
+    pcm_stream = None
+    if (mix_settings is None and not latency_budget and not should_chunk_text(text)
+            and not synthesis_cache.contains(cache_key)):
+        pcm_stream = open_voice_stream(
+            tts_service, text, voice_name, synthesis_parameters)
+
+    if pcm_stream is None:
+        if latency_budget:
+            _, voice_audio = await synthesize_voice_hedged(
+                tts_service, text, voice_name, latency_budget)
+        else:
+            voice_audio = await synthesize_voice(
+                tts_service, text, voice_name, synthesis_parameters)
+        render_job = await build_render_job(
+            voice_audio, "wav", audio_quality, custom_filename,
+            music, library_song_id, mix_settings)
+        final_audio = await render_pool.run(render_telephony_pcm, render_job)
+        schedule_text_history(text, voice_name)
+
+        logger.info(f"📡 [Audio] Streaming audio completo: {len(final_audio)} ms")
+        return StreamingResponse(
+            encoder.iter_segment(final_audio), media_type=media_type, headers=headers)
+
+    # Attende il primo blocco: gli errori iniziali diventano errori HTTP
+    try:
+        first_block = await pcm_stream.__anext__()
+    except StopAsyncIteration:
+        first_block = b""
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ [TTS] Errore sintesi in streaming: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"{tts_service.upper()} TTS generation failed")
 
-    # Converti dict opzioni in SSMLParameters se fornite
-    ssml_params = None
-    if ssml_options:
-        ssml_params = SSMLParameters(
-            rate=ssml_options.get('rate', 'medium'),
-            pitch=ssml_options.get('pitch', 'medium'),
-            volume=ssml_options.get('volume', 'medium'),
-            emphasis=ssml_options.get('emphasis'),
-            break_time=ssml_options.get('break_time'),
-            style=ssml_options.get('style'),
-            style_degree=ssml_options.get('style_degree', '1.0')
-        )
+    logger.info(f"📡 [Audio] Streaming voce durante la sintesi ({tts_service.upper()})")
+    encoder = TelephonyStreamEncoder(audio_quality, process_voice=True)
 
-    return await azure_speech_service.synthesize_to_file(
-        text=text,
-        voice=voice,
-        output_path=output_path,
-        ssml_parameters=ssml_params
-    )
+    async def stream_body():
+        try:
+            yield encoder.header()
+            yield encoder.encode(first_block)
+            async for block in pcm_stream:
+                yield encoder.encode(block)
+            padding = encoder.finish()
+            if padding:
+                yield padding
+            # Cronologia solo per le sintesi inviate per intero
+            schedule_text_history(text, voice_name)
+        except Exception as e:
+            # Le intestazioni sono già inviate: lo stream viene troncato
+            logger.error(f"❌ [Audio] Streaming interrotto: {e}")
+        finally:
+            await pcm_stream.aclose()
+
+    return StreamingResponse(stream_body(), media_type=media_type, headers=headers)
 
 
 # ==========================================
@@ -270,22 +1248,76 @@ async def generate_azure_speech(text: str, voice: str, output_path: str, ssml_op
 # ==========================================
 
 
+async def build_history_sync_message(last_seen_id: Optional[int]) -> Dict[str, Any]:
+    """
+    Prepara il messaggio iniziale per un client WebSocket.
+
+    Senza last_seen_id il client riceve lo snapshot completo
+    ("history_update"). Altrimenti riceve solo le voci successive
+    ("history_delta"), dalla memoria o con una lettura per intervallo di ID
+    sul database; se ne ha perse troppe, o l'ID non esiste più (database
+    ricreato, oppure voce archiviata o eliminata dalla conservazione),
+    riceve "resync" con lo snapshot da cui ripartire. Se la cronologia in memoria
+    non è stata popolata (database non raggiungibile) riceve un delta vuoto
+    e mantiene le voci che ha.
+
+    Args:
+        last_seen_id: Ultimo ID della cronologia ricevuto dal client
+
+    Returns:
+        Messaggio da inviare al client
+    """
+    snapshot = await get_recent_history_cached(10)
+    if last_seen_id is None:
+        return {"type": "history_update", "data": snapshot}
+
+    if not manager.recent_loaded:
+        # Database non disponibile: il client mantiene la sua cronologia
+        return {"type": "history_delta", "data": [], "last_id": last_seen_id}
+
+    latest_id = manager.latest_recent_id
+    max_delta = app_config.websocket.max_delta_entries
+
+    if last_seen_id > (latest_id or 0):
+        # Il client conosce voci che il server non ha (database ricreato)
+        return {"type": "resync", "reason": "unknown_id", "data": snapshot, "last_id": latest_id}
+
+    loop = asyncio.get_running_loop()
+    oldest_id = await loop.run_in_executor(None, history_db.get_oldest_id)
+    if oldest_id is None or last_seen_id < oldest_id:
+        # La voce del client è stata archiviata: il delta non ha un punto di partenza
+        return {"type": "resync", "reason": "unknown_id", "data": snapshot, "last_id": latest_id}
+
+    entries = manager.get_recent_after(last_seen_id)
+    if entries is None:
+        entries = await loop.run_in_executor(
+            None, history_db.get_entries_after, last_seen_id, max_delta + 1)
+
+    if len(entries) > max_delta:
+        return {"type": "resync", "reason": "too_far_behind", "data": snapshot, "last_id": latest_id}
+
+    return {"type": "history_delta", "data": entries, "last_id": latest_id}
+
+
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket per aggiornamenti real-time della cronologia"""
+async def websocket_endpoint(websocket: WebSocket, last_seen_id: Optional[int] = None):
+    """
+    WebSocket per aggiornamenti real-time della cronologia.
+
+    Alla riconnessione il client passa ?last_seen_id=<ID> e riceve solo
+    le voci perse (vedi build_history_sync_message).
+    """
     await manager.connect(websocket)
     try:
-        # Invia cronologia iniziale al nuovo utente
-        history = get_recent_history(10)
-        await websocket.send_text(json.dumps({
-            "type": "history_update",
-            "data": history
-        }))
+        # Cronologia iniziale o voci perse (tramite la coda di invio del client)
+        await manager.send_to(websocket, await build_history_sync_message(last_seen_id))
 
         # Mantieni connessione attiva
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
 
@@ -293,7 +1325,7 @@ async def websocket_endpoint(websocket: WebSocket):
 async def get_text_history(limit: int = 10):
     """Recupera cronologia recente dei testi"""
     try:
-        history = get_recent_history(limit)
+        history = await get_recent_history_cached(limit)
         return {
             "status": "success",
             "data": history,
@@ -305,9 +1337,54 @@ async def get_text_history(limit: int = 10):
             status_code=500, detail="Errore recupero cronologia")
 
 
+@app.get("/api/history/search")
+async def search_text_history(
+    q: Optional[str] = Query(None, description="Parole da cercare nel testo"),
+    voice: Optional[str] = Query(None, description="Filtra per voce"),
+    date_from: Optional[date] = Query(None, description="Data iniziale (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Data finale inclusa (YYYY-MM-DD)"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursore della pagina successiva")
+):
+    """
+    Cerca nella cronologia dei testi con paginazione a cursore.
+
+    Per la pagina successiva passare il valore di next_cursor della
+    risposta precedente con gli stessi filtri.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(
+            status_code=400, detail="date_from deve precedere date_to")
+
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(
+            None,
+            partial(history_db.search_entries, q, voice, date_from, date_to, limit, cursor)
+        )
+    except InvalidHistoryCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ [History] Errore ricerca cronologia: {e}")
+        raise HTTPException(
+            status_code=500, detail="Errore ricerca cronologia")
+
+    return {
+        "status": "success",
+        "data": result["entries"],
+        "total": len(result["entries"]),
+        "next_cursor": result["next_cursor"]
+    }
+
+
 @app.get("/health")
 async def health_check():
-    """Health check per verificare lo stato del servizio TTS"""
+    """
+    Liveness check a tempo costante.
+
+    Legge solo lo stato in memoria aggiornato dalle verifiche in background,
+    senza I/O né chiamate ai servizi TTS: può essere interrogato spesso da
+    healthcheck e bilanciatori.
+    """
     health_status = {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
@@ -315,22 +1392,147 @@ async def health_check():
         "available_voices": len(AZURE_VOICES)
     }
 
-    # Test connessione Azure se configurato
+    # Stato Azure dall'ultima verifica in background
     if AZURE_SPEECH_KEY:
-        try:
-            speech_config = speechsdk.SpeechConfig(
-                subscription=AZURE_SPEECH_KEY, region=AZURE_SPEECH_REGION)
+        if provider_health.is_available("azure"):
             health_status["azure_connection"] = "✅ OK"
-        except Exception as e:
+        else:
             health_status["azure_connection"] = "❌ Failed"
             health_status["status"] = "degraded"
     else:
         health_status["azure_connection"] = "⚠️ Not configured"
         health_status["status"] = "degraded"
 
+    # Stato dei circuit breaker di tutti i servizi TTS configurati (in memoria)
+    health_status["providers"] = provider_health.get_stats()
+    if not any(provider_health.is_available(service) for service in health_status["providers"]):
+        health_status["status"] = "unhealthy"
+
     return health_status
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness check: pronto a servire richieste di sintesi.
+
+    Riporta gli ultimi esiti delle verifiche in background (servizi TTS e
+    database), lo stato delle cache e la saturazione dei worker, senza
+    eseguire I/O. Risponde 503 se il database non è raggiungibile o nessun
+    servizio TTS è disponibile.
+    """
+    providers = provider_health.get_stats()
+    database = readiness_monitor.get_result("database")
+    render_pool_stats = render_pool.get_stats()
+    render_jobs_stats = render_jobs.get_stats()
+
+    provider_ready = any(state["available"] for state in providers.values())
+    database_ready = readiness_monitor.is_ok("database")
+    ready = provider_ready and database_ready
+
+    readiness = {
+        "ready": ready,
+        "timestamp": datetime.now().isoformat(),
+        "providers": providers,
+        "database": database,
+        "history_writer": history_writer.get_stats(),
+        "cache": {
+            "synthesis": synthesis_cache.get_stats(),
+            "azure_synthesizers": (azure_speech_service.synthesizer_pool.get_stats()
+                                   if azure_speech_service else None)
+        },
+        "workers": {
+            "render_pool": render_pool_stats,
+            "render_jobs": render_jobs_stats,
+            "saturated": (render_pool_stats["queue_depth"] > 0 or
+                          render_jobs_stats["queued"] > 0)
+        }
+    }
+
+    return JSONResponse(readiness, status_code=200 if ready else 503)
+
+
+# ==========================================
+# AMMINISTRAZIONE CACHE SINTESI
+# ==========================================
+
+
+@app.get("/admin/synthesis-cache")
+async def get_synthesis_cache_stats():
+    """Statistiche della cache degli audio sintetizzati (hit/miss, occupazione)."""
+    return synthesis_cache.get_stats()
+
+
+@app.delete("/admin/synthesis-cache")
+async def purge_synthesis_cache():
+    """Svuota la cache degli audio sintetizzati."""
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, synthesis_cache.purge)
+        logger.info(f"🗑️ [TTS Cache] Cache svuotata: {result['removed_entries']} voci")
+        return {
+            "message": "Cache sintesi svuotata",
+            **result
+        }
+    except Exception as e:
+        logger.error(f"❌ [TTS Cache] Errore svuotamento cache: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Errore svuotamento cache: {str(e)}")
+
+
+@app.get("/admin/render-pool")
+async def get_render_pool_stats():
+    """Stato del pool di elaborazione audio (coda, worker attivi, utilizzo)."""
+    return render_pool.get_stats()
+
+
+@app.get("/admin/provider-scheduler")
+async def get_provider_scheduler_stats():
+    """Limiti, attese e rifiuti delle chiamate ai servizi TTS"""
+    return provider_scheduler.get_stats()
+
+
+@app.get("/admin/provider-failover")
+async def get_provider_failover_stats():
+    """Hedging, failover e percentili di latenza dei servizi TTS"""
+    return hedged_runner.get_stats()
+
+
+@app.get("/admin/websocket")
+async def get_websocket_stats():
+    """Code di invio dei client WebSocket, messaggi scartati e disconnessioni"""
+    return manager.get_stats()
+
+
+@app.get("/admin/history-retention")
+async def get_history_retention_stats():
+    """Politica di conservazione della cronologia e resoconti delle ultime esecuzioni"""
+    return history_retention.get_stats()
+
+
+@app.post("/admin/history-retention/run")
+async def run_history_retention():
+    """Esegue subito archiviazione e compattazione della cronologia"""
+    report = await history_retention.run_once()
+    if report["error"]:
+        raise HTTPException(
+            status_code=500, detail=f"Errore manutenzione cronologia: {report['error']}")
+
+    logger.info(
+        f"🗄️ [History] Manutenzione: {report['rows_moved']} voci archiviate, "
+        f"{report.get('bytes_reclaimed', 0)} byte recuperati")
+    return report
+
+
+@app.get("/admin/azure-synthesizers")
+async def get_azure_synthesizer_stats():
+    """Stato del pool di synthesizer Azure pre-connessi."""
+    if not azure_speech_service:
+        raise HTTPException(
+            status_code=503, detail="Azure Speech Service non configurato")
+    return azure_speech_service.synthesizer_pool.get_stats()
+
+
 @app.post("/test-voice")
 async def test_voice(
     voice_id: str = Form(...),
@@ -457,87 +1659,59 @@ async def generate_audio(
     output_format: str = Form("wav"),  # Formato output: "wav", "mp3", "gsm"
     audio_quality: str = Form("pcm"),  # Qualità: "pcm", "alaw", "ulaw"
     # Nome personalizzato del file
-    custom_filename: str = Form("centralino_audio")
+    custom_filename: str = Form("centralino_audio"),
+    # Budget di latenza in secondi: attiva hedging e failover tra servizi
+    latency_budget: float = Form(None),
+    # Streaming chunked della risposta (solo wav)
+    stream: bool = Query(False)
 ):
     """
     Genera audio con TTS italiano e opzionalmente musica di sottofondo con controlli avanzati
     """
-    if not text.strip():
-        raise HTTPException(
-            status_code=400, detail="Testo non può essere vuoto")
-
-    if music_volume < 0 or music_volume > 1:
-        raise HTTPException(
-            status_code=400, detail="Volume musica deve essere tra 0.0 e 1.0")
-
-    if music_before < 0 or music_after < 0:
-        raise HTTPException(
-            status_code=400, detail="Durata musica deve essere positiva")
+    validate_generation_parameters(
+        text, music_volume, music_before, music_after,
+        fade_in_duration, fade_out_duration, output_format, audio_quality)
 
-    if fade_in_duration < 0 or fade_out_duration < 0:
-        raise HTTPException(
-            status_code=400, detail="Durata fade deve essere positiva")
-
-    # Validazione formato output
-    if output_format not in ["wav", "mp3", "gsm"]:
+    if stream and output_format != "wav":
         raise HTTPException(
-            status_code=400, detail="Formato output deve essere wav, mp3 o gsm")
+            status_code=400, detail="Lo streaming è disponibile solo per il formato wav")
 
-    # Validazione qualità audio
-    if audio_quality not in ["pcm", "alaw", "ulaw"]:
+    if latency_budget is not None and latency_budget <= 0:
         raise HTTPException(
-            status_code=400, detail="Qualità audio deve essere pcm, alaw o ulaw")
+            status_code=400, detail="Il budget di latenza deve essere positivo")
 
     # Genera ID univoco per questa richiesta
     session_id = str(uuid.uuid4())
 
+    # Directory dedicata: richieste concorrenti con lo stesso nome file non
+    # si sovrascrivono l'output; viene eliminata dopo l'invio del file
+    request_directory = os.path.join(audio_converter.output_directory, "requests", session_id)
+
     try:
-        # Percorsi file temporanei
-        tts_path = f"output/tts_{session_id}.wav"
-        music_path = None
+        music = None
         voice_ref_path = f"uploads/voice_ref_{session_id}.wav" if voice_reference else None
-        final_path = f"output/final_{session_id}.wav"
 
         # Gestisce la musica da libreria o upload
         if library_song_id:
-            # Legge i metadata dalla libreria per ottenere il path del file
-            metadata_path = f"uploads/library/{library_song_id}.json"
-            if not os.path.exists(metadata_path):
+            # Legge i metadata dalla libreria per verificare la canzone
+            metadata = music_library.get_song(library_song_id)
+            if not metadata:
                 raise HTTPException(
                     status_code=404, detail="Canzone della libreria non trovata")
 
-            import json
-            with open(metadata_path, "r", encoding="utf-8") as f:
-                metadata = json.load(f)
-            music_path = metadata["file_path"]
-
-            if not os.path.exists(music_path):
+            if not os.path.exists(metadata["file_path"]):
                 raise HTTPException(
                     status_code=404, detail="File audio della libreria non trovato")
         elif music_file and music_file.filename:
-            # Salva file temporaneo con estensione originale
+            # Decodifica il file caricato direttamente in memoria
             original_ext = os.path.splitext(music_file.filename)[1]
-            temp_music_path = f"uploads/music_{session_id}{original_ext}"
-            music_path = f"uploads/music_{session_id}.wav"
-
-            # Salva file caricato
-            with open(temp_music_path, "wb") as buffer:
-                shutil.copyfileobj(music_file.file, buffer)
-
-            # Converti in WAV se necessario (pydub supporta tutti i formati)
+            music_data = await music_file.read()
             try:
-                if original_ext.lower() != '.wav':
-                    logger.info(f"🔄 [Audio] Conversione formato: {original_ext} → WAV")
-                    audio = AudioSegment.from_file(temp_music_path)
-                    audio.export(music_path, format="wav")
-                    os.remove(temp_music_path)  # Rimuovi file temporaneo
-                else:
-                    # È già WAV, rinomina
-                    os.rename(temp_music_path, music_path)
+                logger.info(f"🔄 [Audio] Decodifica musica caricata: {original_ext}")
+                music = await render_pool.run(
+                    decode_music, music_data, original_ext.lstrip('.').lower() or None)
             except Exception as e:
                 logger.error(f"❌ [Audio] Errore conversione formato: {e}")
-                if os.path.exists(temp_music_path):
-                    os.remove(temp_music_path)
                 raise HTTPException(
                     status_code=400,
                     detail=f"Formato audio non supportato o file corrotto: {str(e)}"
@@ -552,208 +1726,353 @@ async def generate_audio(
         logger.info(
             f"🎤 [TTS] Generazione audio | Servizio: {tts_service.upper()} | Voce: {voice_name} | Testo: '{text[:50]}...'")
 
-        if tts_service == "edge":
-            # Usa Edge TTS (gratuito)
-            # Converti i parametri SSML in parametri Edge TTS
-            rate_map = {'x-slow': '-50%', 'slow': '-25%',
-                        'medium': '+0%', 'fast': '+25%', 'x-fast': '+50%'}
-            volume_map = {'silent': '-100%', 'soft': '-50%',
-                          'medium': '+0%', 'loud': '+50%', 'x-loud': '+100%'}
+        # Parametri di sintesi per servizio (usati anche come chiave di cache)
+        synthesis_parameters = build_synthesis_parameters(tts_service, voice_name)
+
+        mix_settings = None
+        if library_song_id or music is not None:
+            mix_settings = build_mix_settings(
+                music_volume, music_before, music_after,
+                fade_in, fade_out, fade_in_duration, fade_out_duration)
+
+        # Streaming: intestazione WAV e campioni inviati man mano che sono pronti
+        if stream:
+            response = await create_streaming_response(
+                tts_service, text, voice_name, synthesis_parameters,
+                audio_quality, custom_filename, music, library_song_id, mix_settings,
+                latency_budget)
+            return response
+
+        # Solo voce in WAV telefonico: il servizio restituisce direttamente
+        # il formato finale, senza decodifica, ricampionamento e codifica locali
+        served_by = tts_service
+        if (output_format == "wav" and mix_settings is None and not latency_budget
+                and supports_native_telephony(tts_service, audio_quality, text)):
+            final_path = await synthesize_native_telephony(
+                tts_service, text, voice_name, synthesis_parameters,
+                audio_quality, custom_filename, request_directory)
+        else:
+            if latency_budget:
+                served_by, voice_audio = await synthesize_voice_hedged(
+                    tts_service, text, voice_name, latency_budget)
+            else:
+                voice_audio = await synthesize_voice(
+                    tts_service, text, voice_name, synthesis_parameters)
+            render_job = await build_render_job(
+                voice_audio, output_format, audio_quality, custom_filename,
+                music, library_song_id, mix_settings, request_directory)
+
+            # Elaborazione voce, mixaggio e conversione nel pool di worker,
+            # senza bloccare l'event loop
+            final_path = await render_pool.run(render_audio, render_job)
 
-            rate = rate_map.get('medium', '+0%')
-            volume = volume_map.get('loud', '+50%')
+        # Salva nella cronologia e notifica utenti connessi
+        schedule_text_history(text, voice_name)
 
-            success = await edge_tts_service.generate_speech(
-                text=text,
-                voice=voice_name,
-                output_path=tts_path,
-                rate=rate,
-                volume=volume,
-                pitch="+0Hz"
-            )
-        elif tts_service == "google":
-            # Usa Google Cloud TTS
-            if not google_tts_service.is_available():
-                raise HTTPException(
-                    status_code=503,
-                    detail="Google TTS non configurato. Configura credenziali Google Cloud o usa tts_service='edge'."
-                )
-            
-            try:
-                audio_data, audio_format = await google_tts_service.synthesize_text(
-                    text=text,
-                    voice_name=voice_name,
-                    speed=1.0
-                )
-                
-                # Salva l'audio
-                os.makedirs("output", exist_ok=True)
-                with open(tts_path, 'wb') as f:
-                    f.write(audio_data)
-                
-                # Converti MP3 in WAV se necessario
-                if audio_format == "mp3":
-                    audio = AudioSegment.from_mp3(tts_path)
-                    audio.export(tts_path, format="wav")
-                
-                success = True
-                
-            except Exception as e:
-                logger.error(f"❌ [Google TTS] Errore sintesi: {e}")
-                success = False
-        else:
-            # Usa Azure Speech Services (richiede API key)
-            if not azure_speech_service:
-                raise HTTPException(
-                    status_code=503,
-                    detail="Azure Speech Service non configurato. Usa tts_service='edge' per il servizio gratuito."
-                )
+        logger.info(f"✅ [Audio] Generazione completata: {os.path.basename(final_path)}")
 
-            # Opzioni SSML personalizzate per centralini
-            ssml_options = {
-                'rate': 'medium',
-                'pitch': 'medium',
-                'volume': 'loud',
-                'style': 'customerservice' if 'Neural' in voice_name else None,
-                'emphasis': 'moderate'
-            }
+        return FileResponse(
+            final_path,
+            media_type=get_media_type(output_format),
+            filename=build_download_filename(custom_filename, output_format),
+            headers={"X-TTS-Service": served_by},
+            background=BackgroundTask(shutil.rmtree, request_directory, ignore_errors=True)
+        )
 
-            success = await generate_azure_speech(text, voice_name, tts_path, ssml_options)
+    except Exception as e:
+        logger.error(f"❌ [Audio] Errore durante la generazione: {e}")
+        # Cleanup in case of error
+        if voice_ref_path and os.path.exists(voice_ref_path):
+            os.remove(voice_ref_path)
+        shutil.rmtree(request_directory, ignore_errors=True)
+        if isinstance(e, HTTPException) and e.status_code in (429, 503, 504):
+            # Limiti del servizio TTS, servizio non disponibile o budget di latenza scaduto
+            raise
+        raise HTTPException(
+            status_code=500, detail=f"Errore nella generazione audio: {str(e)}")
 
-        if not success:
-            raise HTTPException(
-                status_code=500, detail=f"{tts_service.upper()} TTS generation failed")
 
-        # Salva nella cronologia e notifica utenti connessi
-        try:
-            # Ottieni IP utente per tracking (solo ultimi caratteri per privacy)
-            user_ip = "unknown"  # In produzione: request.client.host
-
-            history_id = add_text_to_history(text, voice_name, user_ip)
-
-            # Notifica tutti gli utenti connessi del nuovo testo
-            history_update = {
-                "type": "new_text",
-                "data": {
-                    "id": history_id,
-                    "text": text[:100] + "..." if len(text) > 100 else text,
-                    "voice": voice_name,
-                    "timestamp": datetime.now().isoformat(),
-                    "user_ip": user_ip[-8:] if user_ip != "unknown" else "unknown"
-                }
-            }
-            await manager.broadcast(history_update)
+@app.post("/generate-batch")
+async def generate_batch(
+    manifest: str = Form(...),  # JSON: [{"text", "filename", "voice_name"}, ...]
+    music_file: UploadFile = File(None),
+    music_volume: float = Form(0.3),
+    music_before: float = Form(2.0),
+    music_after: float = Form(3.0),
+    fade_in: bool = Form(True),
+    fade_out: bool = Form(True),
+    fade_in_duration: float = Form(1.0),
+    fade_out_duration: float = Form(2.0),
+    tts_service: str = Form("azure"),
+    voice_name: str = Form("it-IT-ElsaNeural"),  # Voce predefinita dei prompt
+    library_song_id: str = Form(None),
+    output_format: str = Form("wav"),
+    audio_quality: str = Form("pcm"),
+    custom_filename: str = Form("prompt_ivr")  # Nome dell'archivio ZIP
+):
+    """
+    Genera in una sola richiesta tutti i prompt IVR di un centralino.
+
+    I prompt condividono musica, formato e qualità. I testi identici (stessa
+    voce) vengono sintetizzati e renderizzati una sola volta, la musica viene
+    decodificata una sola volta e i prompt sono elaborati in parallelo fino
+    a BATCH_MAX_CONCURRENCY. La risposta è un archivio ZIP con un file per
+    prompt.
+    """
+    try:
+        prompts = parse_batch_manifest(
+            manifest, voice_name, app_config.batch.max_prompts)
+    except BatchManifestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    for prompt in prompts:
+        validate_generation_parameters(
+            prompt.text, music_volume, music_before, music_after,
+            fade_in_duration, fade_out_duration, output_format, audio_quality)
 
-            logger.info(f"✅ [History] Testo salvato (ID: {history_id})")
+    # Musica condivisa: decodificata una sola volta per tutti i prompt
+    music = None
+    if library_song_id:
+        metadata = music_library.get_song(library_song_id)
+        if not metadata or not os.path.exists(metadata["file_path"]):
+            raise HTTPException(
+                status_code=404, detail="Canzone della libreria non trovata")
+
+        music = await asyncio.get_running_loop().run_in_executor(
+            None, music_library.load_pcm_segment, library_song_id)
+        if music is None:
+            music = await render_pool.run(decode_music, metadata["file_path"])
+    elif music_file and music_file.filename:
+        original_ext = os.path.splitext(music_file.filename)[1]
+        music_data = await music_file.read()
+        try:
+            music = await render_pool.run(
+                decode_music, music_data, original_ext.lstrip('.').lower() or None)
         except Exception as e:
-            logger.warning(f"⚠️ [History] Errore salvataggio: {e}")
-            # Non interrompere la generazione audio per errori cronologia
+            logger.error(f"❌ [Batch] Errore conversione formato: {e}")
+            raise HTTPException(
+                status_code=400,
+                detail=f"Formato audio non supportato o file corrotto: {str(e)}"
+            )
 
-        # Carica audio voce e applica ottimizzazioni per suono più naturale
-        voice = AudioSegment.from_wav(tts_path)
+    mix_settings = None
+    if music is not None:
+        mix_settings = build_mix_settings(
+            music_volume, music_before, music_after,
+            fade_in, fade_out, fade_in_duration, fade_out_duration)
+
+    groups = group_batch_prompts(prompts)
+    batch_directory = os.path.join(audio_converter.output_directory, "batch", uuid.uuid4().hex)
+    os.makedirs(batch_directory, exist_ok=True)
+    semaphore = asyncio.Semaphore(max(app_config.batch.max_concurrency, 1))
+
+    logger.info(
+        f"📦 [Batch] {len(prompts)} prompt ({len(groups)} unici) | "
+        f"Servizio: {tts_service.upper()} | Formato: {output_format}/{audio_quality}")
+
+    async def render_prompt(index: int, prompt_voice: str, prompt_text: str) -> str:
+        # Nome interno univoco: i file del batch condividono la stessa directory
+        internal_name = f"batch_{index:03d}"
+        synthesis_parameters = build_synthesis_parameters(tts_service, prompt_voice)
+
+        async with semaphore:
+            if (output_format == "wav" and mix_settings is None
+                    and supports_native_telephony(tts_service, audio_quality, prompt_text)):
+                return await synthesize_native_telephony(
+                    tts_service, prompt_text, prompt_voice, synthesis_parameters,
+                    audio_quality, internal_name, batch_directory)
+
+            voice_audio = await synthesize_voice(
+                tts_service, prompt_text, prompt_voice, synthesis_parameters)
+
+            # Al worker viene inviata solo la parte di musica necessaria al prompt
+            prompt_music = music
+            if music is not None:
+                prompt_music = music[:mix_settings.music_before_ms +
+                                     int(voice_audio.duration_seconds * 1000) +
+                                     mix_settings.music_after_ms + MUSIC_DURATION_MARGIN_MS]
+
+            render_job = await build_render_job(
+                voice_audio, output_format, audio_quality, internal_name,
+                prompt_music, None, mix_settings, batch_directory)
+            return await render_pool.run(render_audio, render_job)
 
-        # Normalizza con parametri più morbidi per evitare distorsioni
-        voice = normalize(voice, headroom=2.0)
+    try:
+        rendered_paths = await asyncio.gather(*[
+            render_prompt(index, prompt_voice, prompt_text)
+            for index, (prompt_voice, prompt_text) in enumerate(groups)
+        ])
+
+        # I prompt duplicati condividono lo stesso file renderizzato
+        paths_by_key = dict(zip(groups, rendered_paths))
+        entries = [
+            (paths_by_key[(prompt.voice_name, prompt.text)], f"{prompt.filename}.{output_format}")
+            for prompt in prompts
+        ]
+        archive_path = os.path.join(batch_directory, "prompts.zip")
+        await asyncio.get_running_loop().run_in_executor(
+            None, write_batch_archive, archive_path, entries)
+    except Exception as e:
+        shutil.rmtree(batch_directory, ignore_errors=True)
+        logger.error(f"❌ [Batch] Errore durante la generazione: {e}")
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(
+            status_code=500, detail=f"Errore nella generazione dei prompt: {str(e)}")
 
-        # Applica un lieve filtro passa-basso per ridurre metallic sound
-        # Riduci leggermente le frequenze acute che causano suono metallico
-        voice = voice.low_pass_filter(8000)  # Taglia frequenze sopra 8kHz
+    for prompt_voice, prompt_text in groups:
+        schedule_text_history(prompt_text, prompt_voice)
 
-        # Aggiungi un po' di "warmth" riducendo lievemente il volume generale
-        voice = voice - 3  # Riduci di 3dB per suono più morbido
+    logger.info(f"✅ [Batch] Archivio completato: {len(entries)} file")
 
-        # Se c'è musica, processala e mixa con controlli avanzati
-        if music_path and os.path.exists(music_path):
-            music = AudioSegment.from_file(music_path)
-            music = normalize(music)
+    # La directory del batch viene eliminata dopo l'invio dell'archivio
+    return FileResponse(
+        archive_path,
+        media_type="application/zip",
+        filename=build_download_filename(custom_filename, "zip"),
+        headers={
+            "X-Batch-Prompts": str(len(prompts)),
+            "X-Batch-Unique": str(len(groups))
+        },
+        background=BackgroundTask(shutil.rmtree, batch_directory, ignore_errors=True)
+    )
 
-            # Riduce il volume della musica secondo il parametro
-            music = music - (60 - int(music_volume * 60))  # Converti 0-1 in dB
 
-            # Calcola le durate
-            voice_duration = len(voice)
-            music_before_ms = int(music_before * 1000)
-            music_after_ms = int(music_after * 1000)
-            fade_in_ms = int(fade_in_duration * 1000)
-            fade_out_ms = int(fade_out_duration * 1000)
+@app.post("/jobs", status_code=202)
+async def create_render_job(
+    text: str = Form(...),
+    music_file: UploadFile = File(None),
+    music_volume: float = Form(0.3),
+    music_before: float = Form(2.0),
+    music_after: float = Form(3.0),
+    fade_in: bool = Form(True),
+    fade_out: bool = Form(True),
+    fade_in_duration: float = Form(1.0),
+    fade_out_duration: float = Form(2.0),
+    tts_service: str = Form("azure"),
+    voice_name: str = Form("it-IT-ElsaNeural"),
+    library_song_id: str = Form(None),
+    output_format: str = Form("wav"),
+    audio_quality: str = Form("pcm"),
+    custom_filename: str = Form("centralino_audio")
+):
+    """
+    Accoda la generazione di un audio e risponde subito con l'ID del render.
 
-            total_duration = music_before_ms + voice_duration + music_after_ms
+    Accetta gli stessi parametri di /generate-audio. L'avanzamento
+    (sintesi, mix, codifica) viene notificato sul WebSocket /ws con messaggi
+    di tipo "render_job"; il risultato si scarica da /jobs/{job_id}/result.
+    """
+    validate_generation_parameters(
+        text, music_volume, music_before, music_after,
+        fade_in_duration, fade_out_duration, output_format, audio_quality)
 
-            # Se la musica è più corta del necessario, la ripete
-            if len(music) < total_duration:
-                loops_needed = (total_duration // len(music)) + 1
-                music = music * loops_needed
+    if library_song_id:
+        metadata = music_library.get_song(library_song_id)
+        if not metadata or not os.path.exists(metadata["file_path"]):
+            raise HTTPException(
+                status_code=404, detail="Canzone della libreria non trovata")
+
+    # Il file caricato va letto prima di rispondere: dopo la risposta
+    # l'upload non è più disponibile
+    music_data, music_format = None, None
+    if not library_song_id and music_file and music_file.filename:
+        music_data = await music_file.read()
+        music_format = os.path.splitext(music_file.filename)[1].lstrip('.').lower() or None
+
+    synthesis_parameters = build_synthesis_parameters(tts_service, voice_name)
+
+    mix_settings = None
+    if library_song_id or music_data is not None:
+        mix_settings = build_mix_settings(
+            music_volume, music_before, music_after,
+            fade_in, fade_out, fade_in_duration, fade_out_duration)
+
+    async def run_job(job: RenderJobState, report) -> str:
+        await report("synthesis")
+
+        if (output_format == "wav" and mix_settings is None
+                and supports_native_telephony(tts_service, audio_quality, text)):
+            final_path = await synthesize_native_telephony(
+                tts_service, text, voice_name, synthesis_parameters,
+                audio_quality, custom_filename, job.output_directory)
+            schedule_text_history(text, voice_name)
+            return final_path
+
+        voice_audio = await synthesize_voice(
+            tts_service, text, voice_name, synthesis_parameters)
+
+        await report("mix")
+        music = None
+        if music_data is not None:
+            try:
+                music = await render_pool.run(decode_music, music_data, music_format)
+            except Exception as e:
+                raise Exception(f"Formato audio non supportato o file corrotto: {e}")
 
-            # Taglia la musica alla durata necessaria
-            music = music[:total_duration]
+        render_job = await build_render_job(
+            voice_audio, output_format, audio_quality, custom_filename,
+            music, library_song_id, mix_settings)
+        final_audio = await render_pool.run(mix_final_audio, render_job)
 
-            # Applica fade in all'inizio
-            if fade_in and fade_in_ms > 0:
-                music = music.fade_in(min(fade_in_ms, len(music)))
+        await report("encode")
+        final_path = await render_pool.run(
+            encode_audio, final_audio, output_format, audio_quality,
+            custom_filename, job.output_directory)
 
-            # Applica fade out alla fine
-            if fade_out and fade_out_ms > 0:
-                music = music.fade_out(min(fade_out_ms, len(music)))
+        # Cronologia solo per i render completati, come /generate-audio
+        schedule_text_history(text, voice_name)
+        return final_path
 
-            # Crea il mix finale
-            # 1. Musica prima del testo (solo musica)
-            music_intro = music[:music_before_ms]
+    try:
+        job = await render_jobs.submit(
+            run_job,
+            download_filename=build_download_filename(custom_filename, output_format),
+            media_type=get_media_type(output_format)
+        )
+    except RenderJobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
 
-            # 2. Voce + musica di sottofondo
-            music_during_voice = music[music_before_ms:
-                                       music_before_ms + voice_duration]
-            # Riduci ulteriormente il volume della musica durante la voce
-            music_during_voice = music_during_voice - 6  # -6dB per dare priorità alla voce
-            voice_with_bg = voice.overlay(music_during_voice)
+    logger.info(
+        f"📥 [Jobs] Render accodato {job.id} | Servizio: {tts_service.upper()} | Voce: {voice_name}")
+    return job.to_dict()
 
-            # 3. Musica dopo il testo (solo musica)
-            music_outro = music[music_before_ms + voice_duration:]
 
-            # Combina tutte le parti
-            final_audio = music_intro + voice_with_bg + music_outro
-        else:
-            # Solo voce, senza musica
-            final_audio = voice
+@app.get("/jobs/{job_id}")
+async def get_render_job(job_id: str):
+    """Restituisce lo stato di un render accodato"""
+    job = render_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Render non trovato")
+    return job.to_dict()
 
-        # Salva il risultato finale con conversione nel formato richiesto
-        final_path = convert_audio_to_format(
-            final_audio, output_format, audio_quality, custom_filename)
 
-        # Cleanup file temporanei
-        if os.path.exists(tts_path):
-            os.remove(tts_path)
-        if music_path and not library_song_id and os.path.exists(music_path):
-            # Non eliminare le canzoni della libreria, solo i file temporanei
-            os.remove(music_path)
+@app.get("/jobs/{job_id}/result")
+async def get_render_job_result(job_id: str):
+    """Scarica l'audio prodotto da un render completato"""
+    job = render_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Render non trovato")
 
-        logger.info(f"✅ [Audio] Generazione completata: {os.path.basename(final_path)}")
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Render non completato (stato: {job.status})")
 
-        # Pulisci il nome personalizzato per la sicurezza e genera data
-        clean_name = "".join(
-            c for c in custom_filename if c.isalnum() or c in "._-").strip()
-        if not clean_name:
-            clean_name = "centralino_audio"
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(status_code=404, detail="File del render non trovato")
 
-        date_str = datetime.now().strftime("%y%m%d")
+    return FileResponse(
+        job.result_path,
+        media_type=job.media_type,
+        filename=job.download_filename
+    )
 
-        return FileResponse(
-            final_path,
-            media_type=get_media_type(output_format),
-            filename=f"{clean_name}_{date_str}.{output_format}"
-        )
 
-    except Exception as e:
-        logger.error(f"❌ [Audio] Errore durante la generazione: {e}")
-        # Cleanup in case of error
-        for path in [tts_path, final_path]:
-            if 'path' in locals() and os.path.exists(path):
-                os.remove(path)
-        if music_path and not library_song_id and os.path.exists(music_path):
-            os.remove(music_path)
-        if voice_ref_path and os.path.exists(voice_ref_path):
-            os.remove(voice_ref_path)
-        raise HTTPException(
-            status_code=500, detail=f"Errore nella generazione audio: {str(e)}")
+@app.get("/admin/render-jobs")
+async def get_render_jobs_stats():
+    """Statistiche della coda dei render asincroni"""
+    return render_jobs.get_stats()
 
 
 @app.post("/music-library/upload")
@@ -782,13 +2101,14 @@ async def upload_music_to_library(
         # Leggi contenuto file
         file_content = await music_file.read()
 
-        # Usa il gestore della libreria musicale
-        metadata = music_library.add_song(
+        # Usa il gestore della libreria musicale (decodifica e versione PCM in thread)
+        metadata = await asyncio.get_running_loop().run_in_executor(None, partial(
+            music_library.add_song,
             name=name,
             file_content=file_content,
             filename=music_file.filename,
             content_type=music_file.content_type
-        )
+        ))
 
         logger.info(f"🎵 [Music Library] Brano caricato: '{name}' (ID: {metadata['id']})")
 
@@ -993,14 +2313,15 @@ async def get_tts_services():
     services["edge"] = {
         "name": "Microsoft Edge TTS",
         "description": "Servizio gratuito senza API key",
-        "available": True,
+        "available": provider_health.is_available("edge"),
+        "health": provider_health.get_service_stats("edge"),
         "voices": edge_voices,
         "default_voice": "it-IT-ElsaNeural"
     }
 
     # Azure Speech Services (richiede API key e connessione valida)
     azure_voices = {}
-    azure_available = azure_speech_service is not None and azure_speech_available
+    azure_available = azure_speech_service is not None and provider_health.is_available("azure")
 
     if azure_available:
         try:
@@ -1013,16 +2334,18 @@ async def get_tts_services():
         "name": "Azure Speech Services",
         "description": "Servizio premium con voci neurali avanzate" if azure_available else "Non disponibile - configura AZURE_SPEECH_KEY",
         "available": azure_available,
+        "health": provider_health.get_service_stats("azure"),
         "voices": azure_voices,
         "default_voice": "it-IT-ElsaNeural"
     }
 
     # Google Cloud TTS (richiede credenziali Google Cloud)
-    google_available = google_tts_service.is_available()
+    google_available = google_tts_service.is_available() and provider_health.is_available("google")
     services["google"] = {
         "name": "Google Cloud Text-to-Speech",
         "description": "Servizio Google con voci Neural2" if google_available else "Non disponibile - configura credenziali Google Cloud",
         "available": google_available,
+        "health": provider_health.get_service_stats("google"),
         "voices": google_tts_service.get_available_voices(),
         "default_voice": "it-IT-Neural2-A"
     }
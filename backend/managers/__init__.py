@@ -11,6 +11,18 @@ from .update_manager import UpdateNotificationManager
 from .audio_processor import AudioConverter, AudioQualitySpec
 from .music_library import MusicLibrary
 from .version_manager import VersionManager
+from .synthesis_cache import SynthesisCache
+from .audio_mixer import AudioMixer, MusicBedSettings
+from .render_pool import RenderWorkerPool
+from .render_pipeline import RenderJob
+from .render_jobs import RenderJobQueue, RenderJobQueueFull, RenderJobState
+from .provider_scheduler import ProviderScheduler, ProviderLimits, ProviderRateLimited
+from .provider_failover import HedgedRequestRunner, LatencyTracker, VoiceMapper, LatencyBudgetExceeded
+from .provider_health import ProviderHealthMonitor, CircuitBreaker, is_provider_failure
+from .readiness import ReadinessMonitor
+from .history_writer import HistoryWriter
+from .history_retention import HistoryRetentionJob
+from .batch_manifest import BatchPrompt, BatchManifestError, parse_batch_manifest, group_batch_prompts
 
 __all__ = [
     "WebSocketConnectionManager",
@@ -20,5 +32,30 @@ __all__ = [
     "AudioConverter",
     "AudioQualitySpec",
     "MusicLibrary",
-    "VersionManager"
+    "VersionManager",
+    "SynthesisCache",
+    "AudioMixer",
+    "MusicBedSettings",
+    "RenderWorkerPool",
+    "RenderJob",
+    "RenderJobQueue",
+    "RenderJobQueueFull",
+    "RenderJobState",
+    "BatchPrompt",
+    "BatchManifestError",
+    "parse_batch_manifest",
+    "group_batch_prompts",
+    "ProviderScheduler",
+    "ProviderLimits",
+    "ProviderRateLimited",
+    "HedgedRequestRunner",
+    "LatencyTracker",
+    "VoiceMapper",
+    "LatencyBudgetExceeded",
+    "ProviderHealthMonitor",
+    "CircuitBreaker",
+    "is_provider_failure",
+    "ReadinessMonitor",
+    "HistoryWriter",
+    "HistoryRetentionJob"
 ]
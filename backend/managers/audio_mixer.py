@@ -0,0 +1,341 @@
+"""
+Mixaggio vettoriale di voce e musica di sottofondo.
+
+Questo modulo sostituisce la catena di operazioni pydub usata per il
+mixaggio (guadagno, loop, taglio, fade, overlay e concatenazione) con
+operazioni NumPy eseguite in place su un unico buffer di output. Il
+risultato riproduce byte per byte quello della catena pydub originale,
+inclusi arrotondamenti e saturazioni di audioop.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import List, Tuple, Union
+
+import numpy as np
+from pydub import AudioSegment
+
+logger = logging.getLogger(__name__)
+
+# Guadagno (dB) usato da pydub come "silenzio" per fade in/out
+FADE_SILENCE_DB = -120
+
+# Attenuazione aggiuntiva della musica durante il parlato
+VOICE_DUCKING_DB = -6
+
+
+@dataclass
+class MusicBedSettings:
+    """Parametri di mixaggio della musica di sottofondo."""
+
+    music_volume: float = 0.3
+    music_before_ms: int = 2000
+    music_after_ms: int = 3000
+    fade_in: bool = True
+    fade_out: bool = True
+    fade_in_ms: int = 1000
+    fade_out_ms: int = 2000
+
+    @property
+    def music_gain_db(self) -> float:
+        """Guadagno della musica: converte il volume 0-1 in dB (0 → -60dB)."""
+        return -(60 - int(self.music_volume * 60))
+
+
+class AudioMixer:
+    """
+    Mixa voce e musica lavorando su array NumPy.
+
+    Voce e musica devono avere lo stesso formato (frequenza multipla di
+    1000 Hz, canali, 16 bit): usare prepare() per convertirle nel formato
+    telefonico prima del mixaggio.
+    """
+
+    FRAME_RATE = 8000
+    CHANNELS = 1
+    SAMPLE_WIDTH = 2
+
+    _MIN_SAMPLE = -32768.0
+    _MAX_SAMPLE = 32767.0
+
+    @classmethod
+    def prepare(cls, audio: AudioSegment) -> AudioSegment:
+        """
+        Converte un segmento nel formato di lavoro del mixer.
+
+        Args:
+            audio: Segmento audio da convertire
+
+        Returns:
+            Segmento mono, 16 bit, alla frequenza telefonica
+        """
+        audio = audio.set_frame_rate(cls.FRAME_RATE)
+        audio = audio.set_channels(cls.CHANNELS)
+        return audio.set_sample_width(cls.SAMPLE_WIDTH)
+
+    def mix(
+        self,
+        voice: AudioSegment,
+        music: AudioSegment,
+        settings: MusicBedSettings
+    ) -> AudioSegment:
+        """
+        Crea il mix finale: intro musicale, voce con musica attenuata, outro.
+
+        Args:
+            voice: Voce già elaborata
+            music: Musica normalizzata (intera, verrà ripetuta se corta)
+            settings: Parametri di mixaggio
+
+        Returns:
+            Segmento audio con il mix completo
+
+        Raises:
+            ValueError: Se voce e musica hanno formati diversi o la musica è vuota
+        """
+        self._validate_formats(voice, music)
+
+        rate = voice.frame_rate
+        channels = voice.channels
+
+        voice_samples = self._to_frames(voice)
+        source = self._to_frames(music).astype(np.float64)
+
+        source_duration = self._duration_ms(len(source), rate)
+        if not source_duration:
+            raise ValueError("La musica di sottofondo è vuota")
+
+        # Guadagno della musica, applicato una volta sola sulla sorgente
+        self._apply_gain(source, self._db_to_float(settings.music_gain_db))
+
+        # Lunghezza della musica dopo loop e taglio alla durata totale
+        voice_duration = len(voice)
+        total_duration = (
+            settings.music_before_ms + voice_duration + settings.music_after_ms
+        )
+        looped_frames = len(source)
+        if source_duration < total_duration:
+            looped_frames *= (total_duration // source_duration) + 1
+        looped_duration = self._duration_ms(looped_frames, rate)
+        music_frames = self._frame(min(total_duration, looped_duration), rate)
+        music_duration = self._duration_ms(music_frames, rate)
+        content_frames = min(music_frames, looped_frames)
+
+        stages = self._build_fade_stages(settings, music_frames, rate)
+
+        # Confini delle tre sezioni (intro, voce, outro) sulla musica
+        voice_start = self._frame(
+            min(settings.music_before_ms, music_duration), rate)
+        voice_end = self._frame(
+            min(settings.music_before_ms + voice_duration, music_duration), rate)
+        outro_end = self._frame(music_duration, rate)
+
+        # Come AudioSegment.overlay, la voce è ridotta a millisecondi interi
+        voice_frames = self._frame(voice_duration, rate)
+        overlay_frames = min(voice_frames, max(voice_end - voice_start, 0))
+
+        stages.append((
+            voice_start,
+            voice_start + overlay_frames,
+            self._db_to_float(VOICE_DUCKING_DB)
+        ))
+
+        intro_frames = voice_start
+        outro_frames = max(outro_end - voice_end, 0)
+        output = np.empty(
+            (intro_frames + voice_frames + outro_frames, channels),
+            dtype=np.float64
+        )
+
+        # 1. Musica prima del testo
+        self._render_music(output[:intro_frames], source, 0, content_frames, stages)
+
+        # 2. Voce + musica di sottofondo attenuata
+        voice_section = output[intro_frames:intro_frames + voice_frames]
+        self._render_music(
+            voice_section[:overlay_frames], source, voice_start,
+            content_frames, stages
+        )
+        voice_section[overlay_frames:] = 0
+        voiced_frames = min(voice_frames, len(voice_samples))
+        voice_section[:voiced_frames] += voice_samples[:voiced_frames]
+        np.clip(voice_section, self._MIN_SAMPLE, self._MAX_SAMPLE,
+                out=voice_section)
+
+        # 3. Musica dopo il testo
+        self._render_music(
+            output[intro_frames + voice_frames:], source, voice_end,
+            content_frames, stages
+        )
+
+        return AudioSegment(
+            data=output.astype("<i2").tobytes(),
+            sample_width=self.SAMPLE_WIDTH,
+            frame_rate=rate,
+            channels=channels
+        )
+
+    def _build_fade_stages(
+        self,
+        settings: MusicBedSettings,
+        music_frames: int,
+        rate: int
+    ) -> List[Tuple[int, int, Union[float, np.ndarray]]]:
+        """
+        Calcola le regioni di guadagno dei fade come in AudioSegment.fade.
+
+        Returns:
+            Lista ordinata di (frame iniziale, frame finale, guadagno), dove il
+            guadagno è uno scalare o un array con un valore per frame
+        """
+        stages = []
+        music_duration = self._duration_ms(music_frames, rate)
+
+        if settings.fade_in and settings.fade_in_ms > 0:
+            duration = min(settings.fade_in_ms, music_duration)
+            if duration:
+                stages.extend(self._fade_regions(
+                    music_frames, rate, from_gain=FADE_SILENCE_DB, to_gain=0,
+                    start=0, end=duration
+                ))
+
+        if settings.fade_out and settings.fade_out_ms > 0:
+            duration = min(settings.fade_out_ms, music_duration)
+            if duration:
+                stages.extend(self._fade_regions(
+                    music_frames, rate, from_gain=0, to_gain=FADE_SILENCE_DB,
+                    start=music_duration - duration, end=music_duration
+                ))
+
+        return stages
+
+    def _fade_regions(
+        self,
+        frame_count: int,
+        rate: int,
+        from_gain: float,
+        to_gain: float,
+        start: int,
+        end: int
+    ) -> List[Tuple[int, int, Union[float, np.ndarray]]]:
+        """
+        Regioni di guadagno di un singolo fade tra start ed end (ms).
+
+        Riproduce la logica di pydub: un passo di guadagno per millisecondo
+        per fade oltre 100ms, un passo per campione per fade più brevi.
+        """
+        regions = []
+        duration = end - start
+        from_power = self._db_to_float(from_gain)
+        gain_delta = self._db_to_float(to_gain) - from_power
+
+        if from_gain != 0:
+            regions.append((0, self._frame(start, rate), from_power))
+
+        if duration > 100:
+            scale_step = gain_delta / duration
+            gains = from_power + scale_step * np.arange(duration)
+            bounds = np.minimum(
+                (np.arange(start, end + 1) * (rate / 1000.0)).astype(np.int64),
+                frame_count
+            )
+            per_frame = np.repeat(gains, np.diff(bounds))
+            regions.append((int(bounds[0]), int(bounds[0]) + len(per_frame),
+                            per_frame[:, np.newaxis]))
+        else:
+            start_frame = start * (rate / 1000.0)
+            fade_frames = end * (rate / 1000.0) - start_frame
+            scale_step = gain_delta / fade_frames
+            gains = from_power + scale_step * np.arange(int(fade_frames))
+            first = int(start_frame)
+            gains = gains[:max(frame_count - first, 0)]
+            regions.append((first, first + len(gains), gains[:, np.newaxis]))
+
+        if to_gain != 0:
+            regions.append((self._frame(end, rate), frame_count,
+                            self._db_to_float(to_gain)))
+
+        return regions
+
+    def _render_music(
+        self,
+        out: np.ndarray,
+        source: np.ndarray,
+        first_frame: int,
+        content_frames: int,
+        stages: List[Tuple[int, int, Union[float, np.ndarray]]]
+    ) -> None:
+        """
+        Scrive in out la musica (loop + guadagni) a partire da first_frame.
+
+        I frame oltre la fine della musica restano a zero, come il
+        riempimento con silenzio di AudioSegment.__getitem__.
+        """
+        length = len(out)
+        if not length:
+            return
+
+        available = max(min(length, content_frames - first_frame), 0)
+        out[available:] = 0
+
+        # Copia a blocchi della sorgente ripetuta in loop
+        position = 0
+        source_frames = len(source)
+        while position < available:
+            offset = (first_frame + position) % source_frames
+            block = min(source_frames - offset, available - position)
+            out[position:position + block] = source[offset:offset + block]
+            position += block
+
+        # Applica in sequenza fade e attenuazione sulle regioni coinvolte
+        last_frame = first_frame + available
+        for stage_start, stage_end, gain in stages:
+            lo = max(stage_start, first_frame)
+            hi = min(stage_end, last_frame)
+            if lo >= hi:
+                continue
+            if isinstance(gain, np.ndarray):
+                gain = gain[lo - stage_start:hi - stage_start]
+            self._apply_gain(out[lo - first_frame:hi - first_frame], gain)
+
+    @classmethod
+    def _apply_gain(cls, samples: np.ndarray, gain) -> None:
+        """Moltiplica in place con la stessa saturazione e troncamento di audioop.mul."""
+        np.multiply(samples, gain, out=samples)
+        np.clip(samples, cls._MIN_SAMPLE, cls._MAX_SAMPLE, out=samples)
+        np.floor(samples, out=samples)
+
+    @staticmethod
+    def _validate_formats(voice: AudioSegment, music: AudioSegment) -> None:
+        """Verifica che voce e musica siano nello stesso formato supportato."""
+        if voice.sample_width != 2 or music.sample_width != 2:
+            raise ValueError("Il mixer richiede audio a 16 bit")
+        if (voice.frame_rate, voice.channels) != (music.frame_rate, music.channels):
+            raise ValueError(
+                "Voce e musica devono avere stessa frequenza e numero di canali")
+        # Con un numero non intero di frame per millisecondo i fade pydub
+        # scartano frame in modo non riproducibile campione per campione
+        if voice.frame_rate % 1000:
+            raise ValueError(
+                "Il mixer richiede una frequenza multipla di 1000 Hz")
+
+    @staticmethod
+    def _to_frames(audio: AudioSegment) -> np.ndarray:
+        """Restituisce i campioni come array (frame, canali) int16."""
+        samples = np.frombuffer(audio.raw_data, dtype="<i2")
+        return samples.reshape(-1, audio.channels)
+
+    @staticmethod
+    def _frame(milliseconds: float, rate: int) -> int:
+        """Converte millisecondi in frame come AudioSegment.frame_count."""
+        return int(milliseconds * (rate / 1000.0))
+
+    @staticmethod
+    def _duration_ms(frame_count: int, rate: int) -> int:
+        """Durata in millisecondi come AudioSegment.__len__."""
+        return round(1000 * (float(frame_count) / rate))
+
+    @staticmethod
+    def _db_to_float(db: float) -> float:
+        """Converte dB in rapporto di ampiezza come pydub.utils.db_to_float."""
+        return 10 ** (float(db) / 20)
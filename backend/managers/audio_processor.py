@@ -7,9 +7,11 @@ per PCM, A-law e u-law.
 """
 
 import os
+import struct
 import logging
 from datetime import datetime
 from typing import Tuple
+import numpy as np
 from pydub import AudioSegment
 
 logger = logging.getLogger(__name__)
@@ -42,6 +44,171 @@ class AudioQualitySpec:
     }
 
 
+class G711Encoder:
+    """
+    Encoder G.711 (A-law/u-law) vettoriale basato su tabelle.
+
+    Le tabelle di conversione sono costruite con lo stesso algoritmo
+    dell'encoder pcm_alaw/pcm_mulaw di ffmpeg, quindi i campioni codificati
+    coincidono con quelli prodotti da ffmpeg senza avviare alcun processo.
+    """
+
+    # Codici formato WAVE
+    WAVE_FORMAT_ALAW = 6
+    WAVE_FORMAT_MULAW = 7
+
+    _tables = {}
+
+    @staticmethod
+    def _alaw_to_linear(code: int) -> int:
+        """Decodifica un campione A-law in PCM lineare."""
+        code ^= 0x55
+        quantized = code & 0x0F
+        segment = (code & 0x70) >> 4
+        if segment:
+            value = (quantized + quantized + 1 + 32) << (segment + 2)
+        else:
+            value = (quantized + quantized + 1) << 3
+        return value if code & 0x80 else -value
+
+    @staticmethod
+    def _ulaw_to_linear(code: int) -> int:
+        """Decodifica un campione u-law in PCM lineare."""
+        code = ~code & 0xFF
+        value = ((code & 0x0F) << 3) + 0x84
+        value <<= (code & 0x70) >> 4
+        return (0x84 - value) if code & 0x80 else (value - 0x84)
+
+    @classmethod
+    def _build_table(cls, decode, mask: int) -> np.ndarray:
+        """
+        Costruisce la tabella lineare (14 bit) → G.711.
+
+        Ogni codice copre l'intervallo di valori lineari più vicini al suo
+        valore decodificato, con soglie a metà tra codici adiacenti.
+        """
+        table = np.empty(16384, dtype=np.uint8)
+        table[8192] = mask
+        position = 1
+        for code in range(127):
+            low = decode(code ^ mask)
+            high = decode((code + 1) ^ mask)
+            threshold = (low + high + 4) >> 3
+            while position < threshold:
+                table[8192 - position] = code ^ (mask ^ 0x80)
+                table[8192 + position] = code ^ mask
+                position += 1
+        while position < 8192:
+            table[8192 - position] = 127 ^ (mask ^ 0x80)
+            table[8192 + position] = 127 ^ mask
+            position += 1
+        table[0] = table[1]
+        return table
+
+    @classmethod
+    def _get_table(cls, quality: str) -> np.ndarray:
+        """Restituisce (costruendola al primo uso) la tabella per la qualità."""
+        if quality not in cls._tables:
+            if quality == "alaw":
+                cls._tables[quality] = cls._build_table(cls._alaw_to_linear, 0xD5)
+            else:
+                cls._tables[quality] = cls._build_table(cls._ulaw_to_linear, 0xFF)
+        return cls._tables[quality]
+
+    @staticmethod
+    def to_linear16(audio: AudioSegment) -> np.ndarray:
+        """
+        Restituisce i campioni come PCM lineare a 16 bit.
+
+        L'audio a 8 bit viene espanso come fa ffmpeg nella conversione
+        u8 → s16 (campione spostato negli 8 bit alti).
+
+        Args:
+            audio: Segmento audio da convertire
+
+        Returns:
+            Array int16 dei campioni interlacciati
+        """
+        if audio.sample_width == 1:
+            samples = np.frombuffer(audio.raw_data, dtype=np.int8)
+            return samples.astype(np.int16) << 8
+        if audio.sample_width != 2:
+            audio = audio.set_sample_width(2)
+        return np.frombuffer(audio.raw_data, dtype="<i2")
+
+    @classmethod
+    def encode(cls, samples: np.ndarray, quality: str) -> bytes:
+        """
+        Codifica campioni PCM a 16 bit in A-law o u-law.
+
+        Args:
+            samples: Array int16 dei campioni
+            quality: Codifica da applicare (alaw, ulaw)
+
+        Returns:
+            Campioni G.711, un byte per campione
+        """
+        table = cls._get_table(quality)
+        indexes = (samples.astype(np.int32) + 32768) >> 2
+        return table[indexes].tobytes()
+
+    @classmethod
+    def build_wav_header(
+        cls,
+        quality: str,
+        frame_rate: int,
+        channels: int,
+        data_size: int
+    ) -> bytes:
+        """
+        Costruisce l'intestazione WAV (fmt, fact, data) per audio G.711.
+
+        Args:
+            quality: Codifica dei campioni (alaw, ulaw)
+            frame_rate: Frequenza di campionamento
+            channels: Numero di canali
+            data_size: Dimensione in bytes dei campioni codificati
+
+        Returns:
+            Intestazione WAV da anteporre ai campioni
+        """
+        format_tag = (
+            cls.WAVE_FORMAT_ALAW if quality == "alaw" else cls.WAVE_FORMAT_MULAW
+        )
+        fmt_chunk = struct.pack(
+            "<4sIHHIIHHH", b"fmt ", 18, format_tag, channels, frame_rate,
+            frame_rate * channels, channels, 8, 0
+        )
+        fact_chunk = struct.pack("<4sII", b"fact", 4, data_size // channels)
+        data_header = struct.pack("<4sI", b"data", data_size)
+        riff_size = (4 + len(fmt_chunk) + len(fact_chunk) + len(data_header) +
+                     data_size + data_size % 2)
+        return (
+            struct.pack("<4sI4s", b"RIFF", riff_size, b"WAVE")
+            + fmt_chunk + fact_chunk + data_header
+        )
+
+    @classmethod
+    def write_wav(cls, audio: AudioSegment, output_path: str, quality: str) -> None:
+        """
+        Codifica l'audio in G.711 e lo salva come file WAV.
+
+        Args:
+            audio: Segmento audio da codificare
+            output_path: Percorso del file WAV
+            quality: Codifica da applicare (alaw, ulaw)
+        """
+        data = cls.encode(cls.to_linear16(audio), quality)
+        header = cls.build_wav_header(
+            quality, audio.frame_rate, audio.channels, len(data))
+
+        with open(output_path, "wb") as file:
+            file.write(header)
+            file.write(data)
+            if len(data) % 2:
+                file.write(b"\x00")  # I chunk RIFF hanno lunghezza pari
+
+
 class AudioConverter:
     """
     Converte audio nei formati richiesti per centralini telefonici.
@@ -102,6 +269,31 @@ class AudioConverter:
         logger.info(f"Audio convertito: {output_path}")
         return output_path
 
+    def save_encoded(
+        self,
+        audio_data: bytes,
+        output_format: str,
+        custom_filename: str
+    ) -> str:
+        """
+        Salva un audio già codificato nel formato finale, senza conversioni.
+
+        Args:
+            audio_data: Contenuto del file audio già codificato
+            output_format: Formato del file (wav, mp3, gsm)
+            custom_filename: Nome base del file di output
+
+        Returns:
+            Percorso del file audio salvato
+        """
+        output_path = self._generate_output_path(output_format, custom_filename)
+
+        with open(output_path, "wb") as audio_file:
+            audio_file.write(audio_data)
+
+        logger.info(f"Audio salvato senza conversione: {output_path}")
+        return output_path
+
     def _validate_parameters(self, output_format: str, audio_quality: str) -> None:
         """Valida i parametri di conversione."""
         if output_format not in self.SUPPORTED_FORMATS:
@@ -203,18 +395,9 @@ class AudioConverter:
         quality: str
     ) -> None:
         """Esporta in formato WAV con codec appropriato."""
-        if quality == "alaw":
-            audio.export(
-                output_path,
-                format="wav",
-                parameters=["-acodec", "pcm_alaw"]
-            )
-        elif quality == "ulaw":
-            audio.export(
-                output_path,
-                format="wav",
-                parameters=["-acodec", "pcm_mulaw"]
-            )
+        if quality in ("alaw", "ulaw"):
+            # Codifica G.711 in-process, senza passare da ffmpeg
+            G711Encoder.write_wav(audio, output_path, quality)
         else:  # pcm
             audio.export(output_path, format="wav")
 
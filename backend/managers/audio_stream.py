@@ -0,0 +1,203 @@
+"""
+Codifica in streaming di audio WAV telefonico.
+
+Questo modulo produce l'intestazione WAV e i campioni codificati (PCM 16 bit,
+A-law o u-law a 8kHz) a blocchi, così l'audio può essere inviato al client
+mentre viene ancora sintetizzato o mixato.
+"""
+
+import math
+import struct
+from typing import Iterator, Optional
+
+import numpy as np
+from pydub import AudioSegment
+
+from .audio_processor import G711Encoder
+
+# Valore delle dimensioni RIFF/data quando la lunghezza non è nota in anticipo
+UNKNOWN_SIZE = 0xFFFFFFFF
+
+# Filtro e attenuazione della voce, come process_voice in render_pipeline
+VOICE_LOW_PASS_HZ = 8000
+VOICE_GAIN_DB = -3.0
+
+
+class VoiceStreamFilter:
+    """
+    Filtro passa-basso e attenuazione di process_voice applicati a blocchi.
+
+    Il filtro è lo stesso passa-basso del primo ordine di pydub
+    (low_pass_filter), con lo stato conservato tra un blocco e l'altro.
+    La normalizzazione di picco non è applicabile in streaming: il picco è
+    noto solo a sintesi terminata.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        cutoff: float = VOICE_LOW_PASS_HZ,
+        gain_db: float = VOICE_GAIN_DB
+    ):
+        """
+        Inizializza il filtro.
+
+        Args:
+            sample_rate: Frequenza di campionamento dello stream
+            cutoff: Frequenza di taglio del passa-basso
+            gain_db: Guadagno applicato dopo il filtro
+        """
+        rc = 1.0 / (cutoff * 2 * math.pi)
+        dt = 1.0 / sample_rate
+        self._alpha = dt / (rc + dt)
+        self._gain = 10 ** (gain_db / 20)
+        self._last: Optional[float] = None
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Filtra e attenua un blocco di campioni.
+
+        Args:
+            samples: Campioni PCM 16 bit
+
+        Returns:
+            Campioni elaborati (int16 little-endian)
+        """
+        filtered = np.empty(len(samples), dtype=np.float64)
+        alpha = self._alpha
+        last = self._last
+
+        for index, sample in enumerate(samples.tolist()):
+            last = sample if last is None else last + alpha * (sample - last)
+            filtered[index] = int(last)
+
+        self._last = last
+        return np.clip(np.floor(filtered * self._gain), -32768, 32767).astype("<i2")
+
+
+class TelephonyStreamEncoder:
+    """
+    Codifica PCM mono 16 bit a 8kHz nel formato telefonico richiesto.
+
+    Per A-law e u-law i campioni vengono prima ridotti a 8 bit, come nella
+    conversione su file, così il contenuto dello stream coincide con il
+    file WAV prodotto da AudioConverter.
+
+    Con process_voice i blocchi ricevuti direttamente dal servizio TTS
+    passano per VoiceStreamFilter (passa-basso e -3 dB, senza
+    normalizzazione di picco).
+    """
+
+    SAMPLE_RATE = 8000
+    CHUNK_FRAMES = 4000  # 0.5 secondi per blocco
+
+    def __init__(self, audio_quality: str, process_voice: bool = False):
+        """
+        Inizializza l'encoder.
+
+        Args:
+            audio_quality: Qualità audio (pcm, alaw, ulaw)
+            process_voice: Se True applica filtro e attenuazione della voce
+                ai blocchi (per la voce non ancora elaborata)
+        """
+        self.audio_quality = audio_quality
+        self._voice_filter = VoiceStreamFilter(self.SAMPLE_RATE) if process_voice else None
+        self._remainder = b""
+        self._data_size = 0
+
+    @property
+    def bytes_per_frame(self) -> int:
+        """Bytes per campione codificato."""
+        return 2 if self.audio_quality == "pcm" else 1
+
+    def header(self, frame_count: Optional[int] = None) -> bytes:
+        """
+        Costruisce l'intestazione WAV dello stream.
+
+        Args:
+            frame_count: Numero di campioni totali (None = lunghezza ignota)
+
+        Returns:
+            Intestazione WAV da inviare prima dei campioni
+        """
+        data_size = (frame_count or 0) * self.bytes_per_frame
+
+        if self.audio_quality == "pcm":
+            header = struct.pack(
+                "<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data_size, b"WAVE",
+                b"fmt ", 16, 1, 1, self.SAMPLE_RATE, self.SAMPLE_RATE * 2, 2, 16,
+                b"data", data_size
+            )
+        else:
+            header = G711Encoder.build_wav_header(
+                self.audio_quality, self.SAMPLE_RATE, 1, data_size)
+
+        if frame_count is None:
+            # Lunghezza ignota: i lettori WAV leggono fino alla fine dello stream
+            header = bytearray(header)
+            struct.pack_into("<I", header, 4, UNKNOWN_SIZE)
+            struct.pack_into("<I", header, len(header) - 4, UNKNOWN_SIZE)
+            header = bytes(header)
+
+        return header
+
+    def encode(self, pcm_data: bytes) -> bytes:
+        """
+        Codifica un blocco di PCM 16 bit little-endian.
+
+        I blocchi possono avere lunghezza arbitraria: un eventuale byte
+        spaiato viene conservato per il blocco successivo.
+
+        Args:
+            pcm_data: Campioni PCM mono 16 bit a 8kHz
+
+        Returns:
+            Campioni codificati
+        """
+        pcm_data = self._remainder + pcm_data
+        usable = len(pcm_data) - len(pcm_data) % 2
+        self._remainder = pcm_data[usable:]
+
+        samples = np.frombuffer(pcm_data[:usable], dtype="<i2")
+        if self._voice_filter is not None:
+            samples = self._voice_filter.process(samples)
+
+        if self.audio_quality == "pcm":
+            encoded = samples.tobytes()
+        else:
+            # Riduzione a 8 bit come AudioSegment.set_sample_width(1)
+            encoded = G711Encoder.encode((samples >> 8) << 8, self.audio_quality)
+
+        self._data_size += len(encoded)
+        return encoded
+
+    def finish(self) -> bytes:
+        """
+        Chiude lo stream.
+
+        Returns:
+            Byte di riempimento finale se la dimensione dei dati è dispari
+        """
+        return b"\0" if self._data_size % 2 else b""
+
+    def iter_segment(self, audio: AudioSegment) -> Iterator[bytes]:
+        """
+        Codifica un audio completo in blocchi, intestazione compresa.
+
+        Args:
+            audio: Audio mono 16 bit a 8kHz
+
+        Yields:
+            Intestazione WAV seguita dai blocchi codificati
+        """
+        raw_data = audio.raw_data
+        frame_count = len(raw_data) // 2
+        chunk_bytes = self.CHUNK_FRAMES * 2
+
+        yield self.header(frame_count)
+        for offset in range(0, len(raw_data), chunk_bytes):
+            yield self.encode(raw_data[offset:offset + chunk_bytes])
+
+        padding = self.finish()
+        if padding:
+            yield padding
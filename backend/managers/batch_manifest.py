@@ -0,0 +1,154 @@
+"""
+Manifest dei render in blocco per i prompt IVR.
+
+Un centralino richiede decine di prompt (opzioni di menu, messaggi festivi,
+attese) che condividono musica e formato. Questo modulo valida il manifest
+inviato dal client, assegna a ogni prompt un nome file univoco e raggruppa
+i prompt identici, così ogni testo viene sintetizzato e renderizzato una
+sola volta.
+"""
+
+import json
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class BatchPrompt:
+    """Singolo prompt del manifest."""
+
+    text: str
+    filename: str
+    voice_name: str
+
+
+class BatchManifestError(ValueError):
+    """Manifest non valido."""
+
+
+def parse_batch_manifest(
+    manifest: str,
+    default_voice: str,
+    max_prompts: int
+) -> List[BatchPrompt]:
+    """
+    Valida il manifest JSON dei prompt.
+
+    Il manifest è una lista di oggetti (oppure un oggetto con chiave
+    "prompts") con i campi "text" (obbligatorio), "filename" e "voice_name".
+
+    Args:
+        manifest: Manifest in formato JSON
+        default_voice: Voce usata per i prompt senza voice_name
+        max_prompts: Numero massimo di prompt accettati
+
+    Returns:
+        Prompt con nomi file sanificati e univoci
+
+    Raises:
+        BatchManifestError: Se il manifest non è valido
+    """
+    try:
+        data = json.loads(manifest)
+    except json.JSONDecodeError as error:
+        raise BatchManifestError(f"Manifest JSON non valido: {error}")
+
+    if isinstance(data, dict):
+        data = data.get("prompts")
+
+    if not isinstance(data, list) or not data:
+        raise BatchManifestError("Il manifest deve contenere almeno un prompt")
+
+    if len(data) > max_prompts:
+        raise BatchManifestError(
+            f"Troppi prompt nel manifest ({len(data)}, massimo {max_prompts})")
+
+    prompts = []
+    used_names = set()
+
+    for index, item in enumerate(data, start=1):
+        if isinstance(item, str):
+            item = {"text": item}
+
+        if not isinstance(item, dict):
+            raise BatchManifestError(f"Prompt {index} non valido")
+
+        text = item.get("text")
+        if not isinstance(text, str) or not text.strip():
+            raise BatchManifestError(f"Prompt {index}: testo mancante")
+
+        voice_name = item.get("voice_name")
+        if voice_name is None:
+            voice_name = default_voice
+        elif not isinstance(voice_name, str) or not voice_name.strip():
+            raise BatchManifestError(f"Prompt {index}: voice_name non valido")
+
+        filename = _unique_filename(
+            _clean_filename(item.get("filename")) or f"prompt_{index:02d}",
+            used_names
+        )
+        prompts.append(BatchPrompt(
+            text=text,
+            filename=filename,
+            voice_name=voice_name.strip()
+        ))
+
+    return prompts
+
+
+def group_batch_prompts(
+    prompts: List[BatchPrompt]
+) -> Dict[Tuple[str, str], List[BatchPrompt]]:
+    """
+    Raggruppa i prompt con la stessa voce e lo stesso testo.
+
+    Args:
+        prompts: Prompt del manifest
+
+    Returns:
+        Prompt raggruppati per (voce, testo), nell'ordine del manifest
+    """
+    groups: Dict[Tuple[str, str], List[BatchPrompt]] = {}
+    for prompt in prompts:
+        groups.setdefault((prompt.voice_name, prompt.text), []).append(prompt)
+    return groups
+
+
+def _clean_filename(filename: Optional[str]) -> str:
+    """Rimuove dal nome file i caratteri non sicuri e l'estensione."""
+    if not isinstance(filename, str):
+        return ""
+    name = "".join(c for c in filename if c.isalnum() or c in "._-").strip(".")
+    return name.rsplit(".", 1)[0] if "." in name else name
+
+
+def _unique_filename(name: str, used_names: set) -> str:
+    """Aggiunge un suffisso numerico ai nomi già usati nel manifest."""
+    candidate = name
+    suffix = 2
+    while candidate.lower() in used_names:
+        candidate = f"{name}_{suffix}"
+        suffix += 1
+    used_names.add(candidate.lower())
+    return candidate
+
+
+def write_batch_archive(archive_path: str, entries: List[Tuple[str, str]]) -> str:
+    """
+    Scrive l'archivio ZIP dei prompt renderizzati.
+
+    I file audio sono già codificati (G.711, MP3, GSM): vengono archiviati
+    senza compressione, che costerebbe CPU senza ridurre la dimensione.
+
+    Args:
+        archive_path: Percorso dell'archivio da creare
+        entries: Coppie (percorso del file, nome nell'archivio)
+
+    Returns:
+        Percorso dell'archivio creato
+    """
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for file_path, archive_name in entries:
+            archive.write(file_path, arcname=archive_name)
+    return archive_path
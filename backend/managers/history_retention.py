@@ -0,0 +1,150 @@
+"""
+Manutenzione periodica della cronologia.
+
+La tabella della cronologia cresce senza limiti: ogni mese il file del
+database, i backup e le query diventano più pesanti. Il job sposta le voci
+più vecchie del periodo di conservazione in database di archivio mensili e
+compatta il database principale (ANALYZE sempre, VACUUM incrementale quando lo spazio
+libero lo giustifica), conservando un resoconto di ogni esecuzione.
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryRetentionJob:
+    """
+    Job in background di archiviazione e compattazione della cronologia.
+
+    Il database deve esporre archive_entries_before(cutoff, directory) e
+    compact(vacuum_free_ratio), eseguiti in un thread.
+    """
+
+    def __init__(
+        self,
+        database: Any,
+        retention_days: int = 0,
+        archive_directory: str = "archive",
+        interval: float = 86400.0,
+        vacuum_free_ratio: float = 0.1,
+        initial_delay: float = 60.0,
+        max_reports: int = 10
+    ):
+        """
+        Inizializza il job.
+
+        Args:
+            database: Database della cronologia (TextHistoryDatabase)
+            retention_days: Giorni di cronologia mantenuti nel database
+                principale (0 = nessuna archiviazione, solo compattazione)
+            archive_directory: Directory dei database di archivio mensili
+            interval: Secondi tra due esecuzioni
+            vacuum_free_ratio: Quota di pagine libere oltre la quale eseguire VACUUM
+            initial_delay: Attesa dopo l'avvio prima della prima esecuzione
+            max_reports: Resoconti conservati
+        """
+        self._database = database
+        self.retention_days = retention_days
+        self.archive_directory = archive_directory
+        self.interval = interval
+        self.vacuum_free_ratio = vacuum_free_ratio
+        self.initial_delay = initial_delay
+        self._reports: Deque[Dict[str, Any]] = deque(maxlen=max_reports)
+        self._run_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.next_run_at: Optional[float] = None
+
+    async def run_once(self) -> Dict[str, Any]:
+        """
+        Esegue subito archiviazione e compattazione.
+
+        Le esecuzioni concorrenti (programmata e manuale) vengono serializzate.
+
+        Returns:
+            Resoconto dell'esecuzione
+        """
+        async with self._run_lock:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._run_maintenance)
+
+    def _run_maintenance(self) -> Dict[str, Any]:
+        """Archivia le voci scadute e compatta il database (in un thread)."""
+        started = time.monotonic()
+        report: Dict[str, Any] = {
+            "started_at": datetime.now().isoformat(),
+            "retention_days": self.retention_days,
+            "cutoff": None,
+            "rows_moved": 0,
+            "archives": {},
+            "error": None
+        }
+
+        try:
+            if self.retention_days > 0:
+                # I timestamp della cronologia sono in UTC (CURRENT_TIMESTAMP)
+                cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+                report["cutoff"] = cutoff.isoformat(timespec="seconds")
+                report.update(self._database.archive_entries_before(
+                    cutoff, self.archive_directory))
+
+            report.update(self._database.compact(self.vacuum_free_ratio))
+        except Exception as error:
+            report["error"] = str(error)
+            logger.error(f"Errore manutenzione cronologia: {error}")
+
+        report["duration_seconds"] = round(time.monotonic() - started, 3)
+        self._reports.append(report)
+        return report
+
+    def start(self) -> None:
+        """Avvia l'esecuzione periodica."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Arresta l'esecuzione periodica, attendendo l'eventuale esecuzione in corso."""
+        if self._task is not None:
+            async with self._run_lock:
+                self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        """Ciclo del job: prima esecuzione dopo initial_delay, poi ogni interval."""
+        delay = self.initial_delay
+        while True:
+            self.next_run_at = time.time() + delay
+            await asyncio.sleep(delay)
+            delay = self.interval
+
+            report = await self.run_once()
+            if report["error"] is None:
+                logger.info(
+                    f"Manutenzione cronologia: {report['rows_moved']} voci archiviate, "
+                    f"{report.get('bytes_reclaimed', 0)} byte recuperati")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Restituisce configurazione e resoconti del job.
+
+        Returns:
+            Dizionario con politica di conservazione, prossima esecuzione e
+            resoconti recenti (dal più recente)
+        """
+        return {
+            "retention_days": self.retention_days,
+            "archive_directory": self.archive_directory,
+            "interval_seconds": self.interval,
+            "vacuum_free_ratio": self.vacuum_free_ratio,
+            "running": self._run_lock.locked(),
+            "next_run_at": (datetime.fromtimestamp(self.next_run_at).isoformat(timespec="seconds")
+                            if self.next_run_at else None),
+            "last_report": self._reports[-1] if self._reports else None,
+            "reports": list(reversed(self._reports))
+        }
@@ -0,0 +1,159 @@
+"""
+Scrittura asincrona e a blocchi della cronologia.
+
+Ogni render salvava il proprio testo con un commit SQLite sincrono,
+bloccando l'event loop sulla scrittura su disco. Il writer accoda gli
+inserimenti e un task in background li salva a blocchi, in un'unica
+transazione eseguita in un thread; chi ha bisogno dell'ID del record
+attende il completamento del blocco che lo contiene.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HistoryEntry = Tuple[str, str, Optional[str]]
+BatchWriter = Callable[[List[HistoryEntry]], List[int]]
+
+
+class HistoryWriter:
+    """
+    Coda degli inserimenti in cronologia svuotata da un writer in background.
+
+    Un blocco viene scritto quando raggiunge max_batch_size oppure quando
+    il primo inserimento in attesa supera flush_interval secondi.
+    """
+
+    def __init__(
+        self,
+        write_batch: BatchWriter,
+        max_batch_size: int = 100,
+        flush_interval: float = 0.05
+    ):
+        """
+        Inizializza il writer.
+
+        Args:
+            write_batch: Funzione sincrona che salva un blocco di terne
+                (testo, voce, IP) e restituisce gli ID nello stesso ordine
+            max_batch_size: Inserimenti massimi per transazione
+            flush_interval: Attesa massima di un inserimento prima del salvataggio
+        """
+        self._write_batch = write_batch
+        self.max_batch_size = max(max_batch_size, 1)
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.total_write_seconds = 0.0
+
+    async def add(self, text: str, voice: str, user_ip: Optional[str] = None) -> int:
+        """
+        Accoda un inserimento e attende che venga salvato.
+
+        Args:
+            text: Il testo sintetizzato
+            voice: Identificativo della voce utilizzata
+            user_ip: Indirizzo IP dell'utente (opzionale)
+
+        Returns:
+            ID del record inserito
+
+        Raises:
+            Exception: Se il salvataggio del blocco fallisce
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((text, voice, user_ip), future))
+        return await future
+
+    def start(self) -> None:
+        """Avvia il writer in background (se non già attivo nel loop corrente)."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Salva gli inserimenti in attesa e arresta il writer."""
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            self._task = None
+            return
+
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self) -> None:
+        """Ciclo del writer: raccoglie un blocco e lo salva."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[Tuple[HistoryEntry, asyncio.Future]]) -> None:
+        """Salva un blocco in un thread e risolve le attese dei chiamanti."""
+        entries = [entry for entry, _ in batch]
+        started = time.monotonic()
+        try:
+            entry_ids = await asyncio.get_running_loop().run_in_executor(
+                None, self._write_batch, entries)
+        except Exception as error:
+            self.failed += len(batch)
+            logger.error(f"Errore salvataggio blocco cronologia ({len(batch)} testi): {error}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        self.total_write_seconds += time.monotonic() - started
+        self.batches += 1
+        self.written += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        for (_, future), entry_id in zip(batch, entry_ids):
+            if not future.done():
+                future.set_result(entry_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Restituisce le metriche del writer.
+
+        Returns:
+            Dizionario con inserimenti in coda, salvati, falliti e dimensione dei blocchi
+        """
+        return {
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "largest_batch": self.largest_batch,
+            "average_batch": round(self.written / self.batches, 2) if self.batches else 0.0,
+            "average_write_ms": round(
+                self.total_write_seconds / self.batches * 1000, 3) if self.batches else 0.0
+        }
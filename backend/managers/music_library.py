@@ -9,10 +9,13 @@ import os
 import json
 import uuid
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+import numpy as np
 from pydub import AudioSegment
 
+from .render_pipeline import prepare_music
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,8 +25,19 @@ class MusicLibrary:
 
     Permette di caricare file audio, salvare metadata, elencare
     le canzoni disponibili e rimuoverle quando necessario.
+
+    Per ogni canzone viene salvata anche una versione PCM pre-decodificata
+    (mono, 16 bit, frequenza telefonica, normalizzata) che il mixer legge
+    direttamente tramite memory-map, senza decodifica ffmpeg.
     """
 
+    # Formato della versione PCM pre-decodificata
+    PCM_SAMPLE_RATE = 8000
+    PCM_SAMPLE_WIDTH = 2
+    PCM_EXTENSION = ".pcm.npy"
+    # Versione dell'elaborazione PCM: le versioni precedenti vengono rigenerate
+    PCM_VERSION = 2
+
     SUPPORTED_FORMATS = [
         # Formati compressi comuni
         'audio/mp3', 'audio/mpeg',          # MP3
@@ -107,8 +121,8 @@ class MusicLibrary:
         with open(file_path, 'wb') as file:
             file.write(file_content)
 
-        # Ottieni durata audio
-        duration_seconds = self._get_audio_duration(file_path)
+        # Decodifica una sola volta: durata e versione PCM per il mixer
+        duration_seconds, pcm_path = self._decode_song(song_id, file_path)
 
         # Crea metadata
         metadata = {
@@ -118,7 +132,10 @@ class MusicLibrary:
             "file_path": file_path,
             "duration_seconds": duration_seconds,
             "uploaded_at": datetime.now().isoformat(),
-            "size_bytes": os.path.getsize(file_path)
+            "size_bytes": os.path.getsize(file_path),
+            "pcm_path": pcm_path,
+            "pcm_sample_rate": self.PCM_SAMPLE_RATE,
+            "pcm_version": self.PCM_VERSION
         }
 
         # Salva metadata
@@ -182,6 +199,76 @@ class MusicLibrary:
             logger.error(f"Errore lettura metadata canzone {song_id}: {error}")
             return None
 
+    def load_pcm(self, song_id: str) -> Optional[np.ndarray]:
+        """
+        Carica la versione PCM pre-decodificata di una canzone.
+
+        Il file viene aperto in memory-map, quindi solo la parte
+        effettivamente letta dal mixer viene caricata da disco. Per le
+        canzoni caricate prima dell'introduzione del formato PCM, o con una
+        versione PCM precedente, la versione viene generata al primo utilizzo.
+
+        Args:
+            song_id: ID univoco della canzone
+
+        Returns:
+            Array int16 mono a PCM_SAMPLE_RATE, None se non disponibile
+        """
+        metadata = self.get_song(song_id)
+
+        if not metadata or not os.path.exists(metadata["file_path"]):
+            return None
+
+        pcm_path = metadata.get("pcm_path") or self._pcm_path(song_id)
+
+        if (not os.path.exists(pcm_path)
+                or metadata.get("pcm_version") != self.PCM_VERSION):
+            logger.info(f"Generazione versione PCM mancante o obsoleta per {song_id}")
+            _, pcm_path = self._decode_song(song_id, metadata["file_path"])
+            if not pcm_path:
+                return None
+            metadata["pcm_path"] = pcm_path
+            metadata["pcm_sample_rate"] = self.PCM_SAMPLE_RATE
+            metadata["pcm_version"] = self.PCM_VERSION
+            self._save_metadata(song_id, metadata)
+
+        try:
+            return np.load(pcm_path, mmap_mode="r")
+        except Exception as error:
+            logger.error(f"Errore lettura PCM canzone {song_id}: {error}")
+            return None
+
+    def load_pcm_segment(
+        self,
+        song_id: str,
+        max_duration_ms: Optional[int] = None
+    ) -> Optional[AudioSegment]:
+        """
+        Restituisce la versione PCM di una canzone come AudioSegment.
+
+        Args:
+            song_id: ID univoco della canzone
+            max_duration_ms: Durata massima da leggere (None = intera canzone)
+
+        Returns:
+            AudioSegment mono normalizzato, None se non disponibile
+        """
+        samples = self.load_pcm(song_id)
+
+        if samples is None:
+            return None
+
+        if max_duration_ms is not None:
+            max_frames = -(-max_duration_ms * self.PCM_SAMPLE_RATE // 1000)
+            samples = samples[:max_frames]
+
+        return AudioSegment(
+            data=np.ascontiguousarray(samples).tobytes(),
+            sample_width=self.PCM_SAMPLE_WIDTH,
+            frame_rate=self.PCM_SAMPLE_RATE,
+            channels=1
+        )
+
     def delete_song(self, song_id: str) -> bool:
         """
         Elimina una canzone dalla libreria.
@@ -203,6 +290,11 @@ class MusicLibrary:
             if os.path.exists(metadata["file_path"]):
                 os.remove(metadata["file_path"])
 
+            # Elimina versione PCM pre-decodificata
+            pcm_path = metadata.get("pcm_path") or self._pcm_path(song_id)
+            if os.path.exists(pcm_path):
+                os.remove(pcm_path)
+
             # Elimina metadata
             metadata_path = os.path.join(
                 self.library_directory,
@@ -217,22 +309,67 @@ class MusicLibrary:
             logger.error(f"Errore eliminazione canzone {song_id}: {error}")
             return False
 
-    def _get_audio_duration(self, file_path: str) -> float:
+    def _decode_song(
+        self,
+        song_id: str,
+        file_path: str
+    ) -> Tuple[float, Optional[str]]:
         """
-        Calcola la durata del file audio.
+        Decodifica il file audio calcolandone durata e versione PCM.
 
         Args:
+            song_id: ID univoco della canzone
             file_path: Percorso del file audio
 
         Returns:
-            Durata in secondi, 0 se non determinabile
+            Tupla (durata in secondi, percorso PCM); durata 0 e percorso
+            None se il file non è decodificabile
         """
         try:
             audio = AudioSegment.from_file(file_path)
-            return len(audio) / 1000.0  # Converti da ms a secondi
         except Exception as error:
             logger.warning(f"Impossibile determinare durata audio: {error}")
-            return 0.0
+            return 0.0, None
+
+        duration_seconds = len(audio) / 1000.0  # Converti da ms a secondi
+
+        try:
+            pcm_path = self._save_pcm(song_id, audio)
+        except Exception as error:
+            logger.warning(f"Impossibile generare versione PCM {song_id}: {error}")
+            pcm_path = None
+
+        return duration_seconds, pcm_path
+
+    def _save_pcm(self, song_id: str, audio: AudioSegment) -> str:
+        """
+        Salva la versione PCM mono telefonica e normalizzata della canzone.
+
+        L'elaborazione è la stessa delle musiche caricate con la richiesta
+        (normalizzazione prima della conversione).
+
+        Args:
+            song_id: ID univoco della canzone
+            audio: Audio decodificato della canzone
+
+        Returns:
+            Percorso del file .npy generato
+        """
+        audio = prepare_music(audio)
+
+        samples = np.frombuffer(audio.raw_data, dtype=np.int16)
+        pcm_path = self._pcm_path(song_id)
+        np.save(pcm_path, samples)
+
+        logger.info(
+            f"Versione PCM salvata: {os.path.basename(pcm_path)} "
+            f"({len(samples)} campioni)")
+        return pcm_path
+
+    def _pcm_path(self, song_id: str) -> str:
+        """Restituisce il percorso della versione PCM di una canzone."""
+        return os.path.join(
+            self.library_directory, f"{song_id}{self.PCM_EXTENSION}")
 
     def _save_metadata(self, song_id: str, metadata: Dict) -> None:
         """
@@ -0,0 +1,303 @@
+"""
+Richieste ridondanti (hedging) e failover tra servizi TTS.
+
+Una richiesta con budget di latenza parte sul servizio primario; se non
+risponde entro un ritardo basato sui percentili di latenza osservati, la
+stessa sintesi viene avviata sul servizio successivo (con una voce
+equivalente). Il primo risultato valido vince e le altre richieste vengono
+annullate; un errore avvia subito il servizio successivo.
+
+Le latenze vengono registrate dal chiamante solo per le chiamate reali ai
+servizi (non per gli audio in cache); il runner aggiunge come campioni i
+tentativi lenti annullati, con il tempo trascorso come limite inferiore.
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Voci predefinite per genere, usate quando la voce richiesta non esiste
+# sul servizio di ripiego
+DEFAULT_VOICES = {
+    "azure": {"Female": "it-IT-ElsaNeural", "Male": "it-IT-DiegoNeural"},
+    "edge": {"Female": "it-IT-ElsaNeural", "Male": "it-IT-DiegoNeural"},
+    "google": {"Female": "it-IT-Neural2-A", "Male": "it-IT-Neural2-C"}
+}
+
+# Voci neurali italiane disponibili anche su Edge TTS
+EDGE_VOICES = {"it-IT-ElsaNeural", "it-IT-IsabellaNeural", "it-IT-DiegoNeural"}
+
+# Genere delle voci Google italiane per lettera finale (A/B femminili, C/D maschili)
+GOOGLE_VOICE_GENDERS = {"A": "Female", "B": "Female", "C": "Male", "D": "Male"}
+
+Attempt = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class LatencyBudgetExceeded(Exception):
+    """Nessun servizio ha risposto entro il budget di latenza."""
+
+
+class VoiceMapper:
+    """Trova la voce equivalente (stesso genere) su un altro servizio."""
+
+    def __init__(self, voice_genders: Dict[str, str]):
+        """
+        Inizializza il mapper.
+
+        Args:
+            voice_genders: Genere (Female/Male) delle voci Azure note
+        """
+        self._voice_genders = voice_genders
+
+    def gender(self, voice_name: str) -> str:
+        """
+        Restituisce il genere di una voce.
+
+        Args:
+            voice_name: Nome della voce (Azure, Edge o Google)
+
+        Returns:
+            "Female" o "Male" (Female se sconosciuto)
+        """
+        if voice_name in self._voice_genders:
+            return self._voice_genders[voice_name]
+        return GOOGLE_VOICE_GENDERS.get(voice_name.rsplit("-", 1)[-1], "Female")
+
+    def map(self, voice_name: str, target_service: str) -> str:
+        """
+        Restituisce la voce da usare sul servizio di destinazione.
+
+        Args:
+            voice_name: Voce richiesta
+            target_service: Servizio di destinazione (azure, edge, google)
+
+        Returns:
+            La stessa voce se disponibile, altrimenti quella predefinita
+            dello stesso genere
+        """
+        neural = voice_name.endswith("Neural")
+        if target_service == "azure" and neural:
+            return voice_name
+        if target_service == "edge" and voice_name in EDGE_VOICES:
+            return voice_name
+        if target_service == "google" and voice_name.startswith("it-IT-") and not neural:
+            return voice_name
+
+        defaults = DEFAULT_VOICES.get(target_service, DEFAULT_VOICES["edge"])
+        return defaults[self.gender(voice_name)]
+
+
+class LatencyTracker:
+    """Finestra mobile delle latenze delle chiamate ai servizi TTS."""
+
+    def __init__(self, window: int = 200, min_samples: int = 10):
+        """
+        Inizializza il tracker.
+
+        Args:
+            window: Numero di latenze conservate per servizio
+            min_samples: Campioni minimi prima di usare i percentili
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, service: str, seconds: float) -> None:
+        """Registra la latenza di una sintesi riuscita."""
+        self._samples.setdefault(service, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, service: str, percentile: float) -> Optional[float]:
+        """
+        Calcola un percentile delle latenze di un servizio.
+
+        Args:
+            service: Nome del servizio
+            percentile: Percentile richiesto (0-100)
+
+        Returns:
+            Latenza in secondi, None se i campioni sono insufficienti
+        """
+        samples = sorted(self._samples.get(service, ()))
+        if len(samples) < self.min_samples:
+            return None
+
+        index = min(int(len(samples) * percentile / 100), len(samples) - 1)
+        return samples[index]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Percentili principali per servizio."""
+        return {
+            service: {
+                "samples": len(samples),
+                "p50": self.percentile(service, 50),
+                "p95": self.percentile(service, 95),
+                "p99": self.percentile(service, 99)
+            }
+            for service, samples in self._samples.items()
+        }
+
+
+class HedgedRequestRunner:
+    """
+    Esegue una sintesi su più servizi con hedging e failover.
+
+    I tentativi sono avviati in ordine: il successivo parte quando il
+    precedente fallisce oppure non ha risposto entro il ritardo di hedging
+    (percentile configurato delle latenze del servizio in corso).
+
+    Il runner non registra le latenze dei tentativi riusciti, che possono
+    provenire dalla cache: il chiamante registra nel tracker le sole
+    chiamate reali. I tentativi annullati oltre il proprio ritardo di
+    hedging vengono registrati con il tempo trascorso, così i servizi lenti
+    non spariscono dalla finestra delle latenze.
+    """
+
+    def __init__(
+        self,
+        hedge_percentile: float = 95.0,
+        default_delay: float = 2.0,
+        min_delay: float = 0.2,
+        tracker: Optional[LatencyTracker] = None
+    ):
+        """
+        Inizializza il runner.
+
+        Args:
+            hedge_percentile: Percentile di latenza oltre il quale avviare l'hedging
+            default_delay: Ritardo usato finché i campioni sono insufficienti
+            min_delay: Ritardo minimo prima di una richiesta ridondante
+            tracker: Tracker delle latenze (default: nuovo tracker)
+        """
+        self.hedge_percentile = hedge_percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.tracker = tracker or LatencyTracker()
+
+        self.requests = 0
+        self.hedges = 0
+        self.failovers = 0
+        self.budget_exceeded = 0
+        self.cancelled = 0
+        self.wins: Dict[str, int] = {}
+
+    def hedge_delay(self, service: str) -> float:
+        """
+        Ritardo dopo il quale avviare il servizio successivo.
+
+        Args:
+            service: Servizio del tentativo in corso
+
+        Returns:
+            Secondi di attesa
+        """
+        delay = self.tracker.percentile(service, self.hedge_percentile)
+        return max(delay if delay is not None else self.default_delay, self.min_delay)
+
+    async def run(self, attempts: List[Attempt], budget: float) -> Tuple[str, Any]:
+        """
+        Esegue i tentativi e restituisce il primo risultato valido.
+
+        Args:
+            attempts: Coppie (servizio, funzione che avvia la sintesi), in ordine
+            budget: Tempo massimo complessivo in secondi
+
+        Returns:
+            Servizio vincente e relativo risultato
+
+        Raises:
+            LatencyBudgetExceeded: Se il budget scade senza risultati
+            Exception: L'ultimo errore, se tutti i tentativi falliscono
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget
+        waiting = list(attempts)
+        running: Dict[asyncio.Task, Tuple[str, float]] = {}
+        last_service = None
+        last_error: Optional[BaseException] = None
+
+        self.requests += 1
+
+        def launch() -> None:
+            nonlocal last_service
+            service, factory = waiting.pop(0)
+            task = asyncio.ensure_future(factory())
+            running[task] = (service, time.monotonic())
+            last_service = service
+
+        launch()
+        try:
+            while running:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+
+                timeout = remaining
+                if waiting:
+                    timeout = min(timeout, self.hedge_delay(last_service))
+
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if waiting and loop.time() < deadline:
+                        # Il servizio in corso è lento: richiesta ridondante sul successivo
+                        self.hedges += 1
+                        logger.info(
+                            f"Hedging: {last_service} oltre {timeout:.2f}s, "
+                            f"avvio {waiting[0][0]}")
+                        launch()
+                    continue
+
+                for task in done:
+                    service, started = running.pop(task)
+                    if task.exception() is None:
+                        self.wins[service] = self.wins.get(service, 0) + 1
+                        return service, task.result()
+
+                    last_error = task.exception()
+                    logger.warning(f"Sintesi {service} fallita: {last_error}")
+
+                if waiting:
+                    # Errore: il servizio successivo parte subito
+                    self.failovers += 1
+                    launch()
+        finally:
+            for task, (service, started) in running.items():
+                task.cancel()
+                self.cancelled += 1
+
+                # Tentativo lento annullato: latenza di almeno il tempo trascorso
+                elapsed = time.monotonic() - started
+                if elapsed >= self.hedge_delay(service):
+                    self.tracker.record(service, elapsed)
+
+        if not running and last_error is not None:
+            # Tutti i tentativi sono falliti prima della scadenza del budget
+            raise last_error
+
+        self.budget_exceeded += 1
+        raise LatencyBudgetExceeded(
+            f"Nessun servizio TTS ha risposto entro {budget:.1f} secondi")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Restituisce contatori e latenze.
+
+        Returns:
+            Dizionario con richieste, hedging, failover, vittorie per servizio e percentili
+        """
+        return {
+            "hedge_percentile": self.hedge_percentile,
+            "default_delay": self.default_delay,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "budget_exceeded": self.budget_exceeded,
+            "cancelled": self.cancelled,
+            "wins": dict(self.wins),
+            "latency": self.tracker.get_stats()
+        }
@@ -0,0 +1,397 @@
+"""
+Stato di salute dei servizi TTS con circuit breaker.
+
+Un prober in background verifica periodicamente ogni servizio con una
+richiesta economica (elenco voci, senza sintesi) e ogni sintesi reale
+aggiorna le stesse statistiche. Dopo un numero di errori consecutivi il
+circuito del servizio si apre: le richieste vengono rifiutate subito invece
+di attendere un servizio irraggiungibile. Trascorso il periodo di attesa il
+circuito passa a semi-aperto e il prober verifica il servizio: se risponde
+il circuito si richiude, altrimenti resta aperto con un'attesa maggiore.
+
+Solo i problemi del servizio (rete, timeout, risposte 5xx) contano come
+errori: le richieste non valide di un utente non aprono il circuito.
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+Probe = Callable[[], Awaitable[bool]]
+
+# Stati HTTP 4xx dovuti al servizio (timeout e sovraccarico) e non alla richiesta
+PROVIDER_FAILURE_STATUS = (408, 429)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """Stato HTTP associato all'errore (HTTPException, aiohttp, Google API)."""
+    for attribute in ("status_code", "status", "code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int) and 100 <= value < 600:
+            return value
+    return None
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """
+    Stabilisce se un errore di sintesi indica un problema del servizio.
+
+    Errori di rete, timeout e risposte 5xx contano come guasti, anche se
+    avvolti in un'eccezione generica (causa o contesto). Gli errori della
+    richiesta (ValueError, TypeError, KeyError, risposte 4xx) non contano.
+    Gli errori non classificati sono attribuiti al servizio.
+
+    Args:
+        error: Eccezione sollevata durante la chiamata al servizio
+
+    Returns:
+        True se l'errore va registrato come guasto del servizio
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+
+        if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+            return True
+
+        status = _status_code(error)
+        if status is not None:
+            return status >= 500 or status in PROVIDER_FAILURE_STATUS
+
+        if isinstance(error, (ValueError, TypeError, KeyError)):
+            return False
+
+        error = error.__cause__ or error.__context__
+
+    return True
+
+
+class CircuitBreaker:
+    """Circuit breaker a tre stati: chiuso, aperto, semi-aperto."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 300.0
+    ):
+        """
+        Inizializza il circuit breaker.
+
+        Args:
+            failure_threshold: Errori consecutivi che aprono il circuito
+            open_seconds: Attesa iniziale prima della verifica
+            max_open_seconds: Attesa massima dopo verifiche fallite ripetute
+        """
+        self.failure_threshold = max(failure_threshold, 1)
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+
+        self._state = self.CLOSED
+        self._open_seconds = open_seconds
+        self._opened_at = 0.0
+        self.consecutive_failures = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """Stato corrente; un circuito aperto diventa semi-aperto dopo l'attesa."""
+        if self._state == self.OPEN and self.seconds_until_retry() == 0:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def seconds_until_retry(self) -> float:
+        """Secondi mancanti al passaggio in semi-aperto (0 se non aperto)."""
+        if self._state != self.OPEN:
+            return 0.0
+        return max(self._opened_at + self._open_seconds - time.monotonic(), 0.0)
+
+    def allow_request(self) -> bool:
+        """True se le richieste possono raggiungere il servizio."""
+        return self.state == self.CLOSED
+
+    def record_success(self) -> None:
+        """Registra un successo: il circuito si chiude."""
+        if self._state != self.CLOSED:
+            logger.info("Circuito richiuso dopo verifica riuscita")
+        self._state = self.CLOSED
+        self._open_seconds = self.base_open_seconds
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        """Registra un errore e apre il circuito se necessario."""
+        self.consecutive_failures += 1
+
+        if self.state == self.HALF_OPEN:
+            # Verifica fallita: nuova attesa, raddoppiata fino al massimo
+            self._open(min(self._open_seconds * 2, self.max_open_seconds))
+        elif self._state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open(self.base_open_seconds)
+
+    def trip(self) -> None:
+        """Apre subito il circuito, senza attendere la soglia di errori."""
+        if self._state == self.CLOSED:
+            self._open(self.base_open_seconds)
+
+    def _open(self, open_seconds: float) -> None:
+        """Apre il circuito per il tempo indicato."""
+        self._state = self.OPEN
+        self._open_seconds = open_seconds
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+
+
+class ProviderHealth:
+    """Finestra mobile degli esiti e circuit breaker di un servizio."""
+
+    def __init__(self, window: int, breaker: CircuitBreaker):
+        """
+        Inizializza lo stato del servizio.
+
+        Args:
+            window: Numero di esiti recenti conservati
+            breaker: Circuit breaker del servizio
+        """
+        self.breaker = breaker
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+        self.last_error: Optional[str] = None
+        self.last_success_at: Optional[float] = None
+        self.last_failure_at: Optional[float] = None
+        self.last_probe_at: Optional[float] = None
+        self.last_probe_latency: Optional[float] = None
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        """Registra un esito positivo (latenza solo per le sintesi)."""
+        self._outcomes.append(True)
+        if latency is not None:
+            self._latencies.append(latency)
+        self.last_success_at = time.time()
+        self.breaker.record_success()
+
+    def record_failure(self, error: str) -> None:
+        """Registra un esito negativo."""
+        self._outcomes.append(False)
+        self.last_error = error
+        self.last_failure_at = time.time()
+        self.breaker.record_failure()
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        """Percentuale di successi nella finestra, None senza esiti."""
+        if not self._outcomes:
+            return None
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Percentile delle latenze di sintesi nella finestra."""
+        if not self._latencies:
+            return None
+        samples = sorted(self._latencies)
+        return samples[min(int(len(samples) * percentile / 100), len(samples) - 1)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Rappresentazione dello stato per le API."""
+        success_rate = self.success_rate
+        p50 = self.latency_percentile(50)
+        p95 = self.latency_percentile(95)
+        return {
+            "state": self.breaker.state,
+            "available": self.breaker.allow_request(),
+            "success_rate": round(success_rate, 3) if success_rate is not None else None,
+            "samples": len(self._outcomes),
+            "latency_p50": round(p50, 3) if p50 is not None else None,
+            "latency_p95": round(p95, 3) if p95 is not None else None,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "times_opened": self.breaker.times_opened,
+            "retry_in_seconds": round(self.breaker.seconds_until_retry(), 1),
+            "last_error": self.last_error,
+            "last_probe_latency": (round(self.last_probe_latency, 3)
+                                   if self.last_probe_latency is not None else None)
+        }
+
+
+class ProviderHealthMonitor:
+    """
+    Prober in background e circuit breaker per i servizi TTS.
+
+    I servizi senza funzione di verifica (non configurati) risultano sempre
+    non disponibili; le richieste verso servizi non monitorati non vengono
+    bloccate.
+    """
+
+    def __init__(
+        self,
+        probes: Dict[str, Probe],
+        interval: float = 30.0,
+        probe_timeout: float = 10.0,
+        window: int = 50,
+        failure_threshold: int = 3,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 300.0
+    ):
+        """
+        Inizializza il monitor.
+
+        Args:
+            probes: Funzione di verifica economica per ogni servizio configurato
+            interval: Secondi tra due verifiche dei servizi con circuito chiuso
+            probe_timeout: Tempo massimo di una verifica
+            window: Esiti recenti considerati per il tasso di successo
+            failure_threshold: Errori consecutivi che aprono il circuito
+            open_seconds: Attesa iniziale del circuito aperto
+            max_open_seconds: Attesa massima del circuito aperto
+        """
+        self._probes = probes
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self._health = {
+            service: ProviderHealth(
+                window, CircuitBreaker(failure_threshold, open_seconds, max_open_seconds))
+            for service in probes
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    def is_monitored(self, service: str) -> bool:
+        """True se il servizio è configurato e monitorato."""
+        return service in self._health
+
+    def is_available(self, service: str) -> bool:
+        """True se il servizio è configurato e il suo circuito è chiuso."""
+        health = self._health.get(service)
+        return health is not None and health.breaker.allow_request()
+
+    def allow_request(self, service: str) -> bool:
+        """True se una richiesta verso il servizio può partire."""
+        health = self._health.get(service)
+        return health is None or health.breaker.allow_request()
+
+    def retry_after(self, service: str) -> float:
+        """Secondi prima della prossima verifica di un servizio con circuito aperto."""
+        health = self._health.get(service)
+        return health.breaker.seconds_until_retry() if health else 0.0
+
+    def record_success(self, service: str, latency: float) -> None:
+        """Registra una sintesi riuscita."""
+        if service in self._health:
+            self._health[service].record_success(latency)
+
+    def record_failure(self, service: str, error: str) -> None:
+        """Registra una sintesi fallita."""
+        health = self._health.get(service)
+        if health is None:
+            return
+
+        was_closed = health.breaker.allow_request()
+        health.record_failure(error)
+        if was_closed and not health.breaker.allow_request():
+            logger.warning(f"Circuito {service} aperto: {error}")
+
+    async def probe(self, service: str) -> bool:
+        """
+        Verifica un servizio e ne aggiorna lo stato.
+
+        Args:
+            service: Nome del servizio
+
+        Returns:
+            True se il servizio ha risposto correttamente
+        """
+        health = self._health[service]
+        started = time.monotonic()
+        try:
+            healthy = await asyncio.wait_for(self._probes[service](), timeout=self.probe_timeout)
+            error = None if healthy else "Verifica non riuscita"
+        except asyncio.TimeoutError:
+            healthy, error = False, f"Verifica oltre {self.probe_timeout:.0f}s"
+        except Exception as probe_error:
+            healthy, error = False, str(probe_error) or type(probe_error).__name__
+
+        health.last_probe_at = time.time()
+        health.last_probe_latency = time.monotonic() - started
+
+        if healthy:
+            health.record_success()
+        else:
+            self.record_failure(service, error)
+        return healthy
+
+    async def probe_all(self, trip_on_failure: bool = False) -> Dict[str, bool]:
+        """
+        Verifica in parallelo i servizi da controllare.
+
+        I servizi con circuito aperto vengono verificati solo allo scadere
+        dell'attesa (stato semi-aperto).
+
+        Args:
+            trip_on_failure: Se True una verifica fallita apre subito il
+                circuito (usato all'avvio, quando non ci sono altri esiti)
+
+        Returns:
+            Esito per servizio verificato
+        """
+        services = [
+            service for service, health in self._health.items()
+            if health.breaker.state != CircuitBreaker.OPEN
+        ]
+        results = await asyncio.gather(*[self.probe(service) for service in services])
+
+        if trip_on_failure:
+            for service, healthy in zip(services, results):
+                if not healthy:
+                    self._health[service].breaker.trip()
+
+        return dict(zip(services, results))
+
+    def start(self) -> None:
+        """Avvia il prober in background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Arresta il prober."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        """Ciclo del prober: verifica periodica e al passaggio in semi-aperto."""
+        while True:
+            await asyncio.sleep(self._next_delay())
+            try:
+                await self.probe_all()
+            except Exception as error:
+                logger.error(f"Errore verifica servizi TTS: {error}")
+
+    def _next_delay(self) -> float:
+        """Attesa fino alla prossima verifica periodica o di un circuito aperto."""
+        delays = [self.interval] + [
+            health.breaker.seconds_until_retry()
+            for health in self._health.values()
+            if health.breaker.state == CircuitBreaker.OPEN
+        ]
+        return max(min(delays), 0.1)
+
+    def get_service_stats(self, service: str) -> Optional[Dict[str, Any]]:
+        """Stato di un servizio, None se non monitorato."""
+        health = self._health.get(service)
+        return health.to_dict() if health else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Restituisce lo stato di tutti i servizi monitorati.
+
+        Returns:
+            Dizionario con stato del circuito, tasso di successo e latenze per servizio
+        """
+        return {service: health.to_dict() for service, health in self._health.items()}
@@ -0,0 +1,285 @@
+"""
+Limiti di concorrenza e di frequenza verso i servizi TTS.
+
+Senza limiti, decine di richieste simultanee raggiungono insieme Azure (o
+Edge TTS) e vengono rallentate o rifiutate dal servizio. Lo scheduler
+limita per ogni servizio le chiamate contemporanee e, con due token bucket,
+le richieste e i caratteri al secondo. Una richiesta attende il proprio
+turno fino a un tempo massimo; oltre viene rifiutata subito, senza
+consumare quota.
+"""
+
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProviderLimits:
+    """
+    Limiti di un servizio TTS (0 = nessun limite).
+
+    Attributes:
+        max_concurrent: Chiamate contemporanee
+        requests_per_second: Richieste al secondo
+        characters_per_second: Caratteri sintetizzati al secondo
+        max_wait_seconds: Attesa massima prima del rifiuto
+    """
+
+    max_concurrent: int = 0
+    requests_per_second: float = 0.0
+    characters_per_second: float = 0.0
+    max_wait_seconds: float = 30.0
+
+
+class ProviderRateLimited(Exception):
+    """La richiesta supererebbe l'attesa massima consentita dai limiti."""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(
+            f"Limite di richieste {provider.upper()} raggiunto, "
+            f"riprovare tra {retry_after:.1f} secondi")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Token bucket con prenotazione.
+
+    Ogni richiesta preleva subito tutti i propri token, anche portando il
+    saldo in negativo, e attende il tempo necessario a ripianarlo: le
+    richieste vengono così servite in ordine di arrivo senza lock, e una
+    richiesta più grande della capacità attende il tempo corrispondente.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Inizializza il bucket.
+
+        Args:
+            rate: Token aggiunti al secondo (0 = nessun limite)
+            capacity: Token massimi accumulabili (default = un secondo di rate)
+        """
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        """True se il bucket limita effettivamente le richieste."""
+        return self.rate > 0
+
+    def _refill(self) -> None:
+        """Aggiunge i token maturati dall'ultimo aggiornamento."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Preleva i token e calcola l'attesa necessaria.
+
+        Args:
+            amount: Token richiesti (anche oltre la capacità del bucket)
+
+        Returns:
+            Secondi da attendere prima di procedere
+        """
+        if not self.enabled:
+            return 0.0
+
+        self._refill()
+        self._tokens -= amount
+        return max(-self._tokens, 0.0) / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Restituisce i token di una prenotazione non utilizzata."""
+        if self.enabled:
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class ProviderLimiter:
+    """Semaforo, token bucket e metriche di un singolo servizio."""
+
+    def __init__(self, provider: str, limits: ProviderLimits):
+        """
+        Inizializza il limitatore.
+
+        Args:
+            provider: Nome del servizio (azure, edge, google)
+            limits: Limiti da applicare
+        """
+        self.provider = provider
+        self.limits = limits
+        self._semaphore = (asyncio.Semaphore(limits.max_concurrent)
+                           if limits.max_concurrent > 0 else None)
+        self._requests = TokenBucket(limits.requests_per_second)
+        self._characters = TokenBucket(limits.characters_per_second)
+
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.characters = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_observed = 0.0
+
+    @asynccontextmanager
+    async def acquire(self, characters: int) -> AsyncIterator[None]:
+        """
+        Attende uno slot libero e la quota necessaria, poi esegue il blocco.
+
+        Una richiesta annullata durante l'attesa restituisce la quota; una
+        annullata durante il blocco (es. tentativo perdente dell'hedging)
+        no, perché il servizio ha già ricevuto e fatturato il testo.
+
+        Args:
+            characters: Caratteri del testo da sintetizzare
+
+        Raises:
+            ProviderRateLimited: Se l'attesa supererebbe max_wait_seconds
+        """
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            if self._semaphore is not None:
+                try:
+                    await asyncio.wait_for(
+                        self._semaphore.acquire(), timeout=self.limits.max_wait_seconds)
+                except asyncio.TimeoutError:
+                    self._reject(self.limits.max_wait_seconds)
+
+            try:
+                await self._wait_for_quota(characters, started)
+            except BaseException:
+                if self._semaphore is not None:
+                    self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - started
+        self.admitted += 1
+        self.characters += characters
+        self.total_wait_seconds += waited
+        self.max_wait_observed = max(self.max_wait_observed, waited)
+
+        self.active += 1
+        try:
+            yield
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    async def _wait_for_quota(self, characters: int, started: float) -> None:
+        """Prenota richieste e caratteri e attende che siano disponibili."""
+        remaining = self.limits.max_wait_seconds - (time.monotonic() - started)
+        delay = max(self._requests.reserve(1), self._characters.reserve(characters))
+
+        if delay > remaining:
+            self._requests.refund(1)
+            self._characters.refund(characters)
+            self._reject(delay)
+
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self._requests.refund(1)
+                self._characters.refund(characters)
+                raise
+
+    def _reject(self, retry_after: float) -> None:
+        """Conta il rifiuto e solleva l'eccezione."""
+        self.rejected += 1
+        logger.warning(
+            f"Richiesta {self.provider} rifiutata: attesa stimata {retry_after:.1f}s")
+        raise ProviderRateLimited(self.provider, retry_after)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Restituisce limiti e metriche del servizio.
+
+        Returns:
+            Dizionario con limiti, richieste attive/in attesa e tempi di attesa
+        """
+        return {
+            "max_concurrent": self.limits.max_concurrent,
+            "requests_per_second": self.limits.requests_per_second,
+            "characters_per_second": self.limits.characters_per_second,
+            "max_wait_seconds": self.limits.max_wait_seconds,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "characters": self.characters,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+            "average_wait_seconds": round(
+                self.total_wait_seconds / self.admitted, 3) if self.admitted else 0.0,
+            "max_wait_observed_seconds": round(self.max_wait_observed, 3)
+        }
+
+
+class ProviderScheduler:
+    """
+    Coordina le chiamate ai servizi TTS secondo i limiti configurati.
+
+    I servizi senza limiti configurati vengono chiamati direttamente.
+    """
+
+    def __init__(self, limits: Dict[str, ProviderLimits]):
+        """
+        Inizializza lo scheduler.
+
+        Args:
+            limits: Limiti per nome del servizio
+        """
+        self._limiters = {
+            provider: ProviderLimiter(provider, provider_limits)
+            for provider, provider_limits in limits.items()
+        }
+
+    @asynccontextmanager
+    async def slot(self, provider: str, text: str = "") -> AsyncIterator[None]:
+        """
+        Esegue il blocco rispettando i limiti del servizio.
+
+        Args:
+            provider: Nome del servizio (azure, edge, google)
+            text: Testo da sintetizzare (per il limite sui caratteri)
+
+        Raises:
+            ProviderRateLimited: Se la richiesta viene rifiutata
+        """
+        limiter = self._limiters.get(provider)
+        if limiter is None:
+            yield
+            return
+
+        async with limiter.acquire(len(text)):
+            yield
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Restituisce le metriche di tutti i servizi.
+
+        Returns:
+            Dizionario con le metriche per nome del servizio
+        """
+        return {
+            provider: limiter.get_stats()
+            for provider, limiter in self._limiters.items()
+        }
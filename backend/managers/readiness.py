@@ -0,0 +1,90 @@
+"""
+Verifiche di prontezza eseguite in background.
+
+Le verifiche che richiedono I/O (ad esempio la raggiungibilità del
+database) vengono eseguite periodicamente fuori dal percorso delle
+richieste; gli endpoint di stato leggono solo l'ultimo esito memorizzato.
+"""
+
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ReadinessMonitor:
+    """
+    Esegue verifiche sincrone in un thread a intervalli regolari.
+
+    Ogni verifica è una funzione senza argomenti che restituisce True se
+    il componente è pronto; un'eccezione equivale a un esito negativo.
+    """
+
+    def __init__(self, checks: Dict[str, Callable[[], bool]], interval: float = 15.0):
+        """
+        Inizializza il monitor.
+
+        Args:
+            checks: Funzioni di verifica per nome del componente
+            interval: Secondi tra due cicli di verifica
+        """
+        self._checks = checks
+        self.interval = interval
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_checks(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Esegue tutte le verifiche e ne memorizza gli esiti.
+
+        Returns:
+            Esiti per nome del componente
+        """
+        loop = asyncio.get_running_loop()
+        for name, check in self._checks.items():
+            started = time.monotonic()
+            try:
+                healthy = bool(await loop.run_in_executor(None, check))
+                error = None if healthy else "Verifica non riuscita"
+            except Exception as check_error:
+                healthy, error = False, str(check_error) or type(check_error).__name__
+
+            if not healthy and self._results.get(name, {}).get("ok", True):
+                logger.warning(f"Verifica {name} fallita: {error}")
+
+            self._results[name] = {
+                "ok": healthy,
+                "error": error,
+                "latency_ms": round((time.monotonic() - started) * 1000, 1),
+                "checked_at": datetime.now().isoformat()
+            }
+        return self._results
+
+    def get_result(self, name: str) -> Optional[Dict[str, Any]]:
+        """Ultimo esito di una verifica, None se non ancora eseguita."""
+        return self._results.get(name)
+
+    def is_ok(self, name: str) -> bool:
+        """True se l'ultima verifica del componente è riuscita."""
+        return self._results.get(name, {}).get("ok", False)
+
+    def start(self) -> None:
+        """Avvia le verifiche periodiche in background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Arresta le verifiche periodiche."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        """Ciclo delle verifiche periodiche."""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_checks()
@@ -0,0 +1,254 @@
+"""
+Coda di elaborazione asincrona per i render audio.
+
+Questo modulo separa la durata di un render dalla connessione HTTP del
+client: i render vengono accodati, eseguiti da un numero limitato di
+worker e il loro avanzamento (sintesi, mix, codifica) viene notificato
+tramite broadcast WebSocket. Il risultato si scarica a render completato.
+"""
+
+import os
+import uuid
+import shutil
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Avanzamento percentuale associato a ogni fase del render
+STAGE_PROGRESS = {
+    "queued": 0,
+    "synthesis": 10,
+    "mix": 50,
+    "encode": 80,
+    "done": 100
+}
+
+
+@dataclass
+class RenderJobState:
+    """Stato di un render accodato."""
+
+    id: str
+    created_at: str
+    status: str = "queued"
+    stage: str = "queued"
+    progress: int = 0
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    download_filename: Optional[str] = None
+    media_type: Optional[str] = None
+    result_path: Optional[str] = None
+    output_directory: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Rappresentazione pubblica dello stato (senza percorsi locali)."""
+        data = asdict(self)
+        data.pop("result_path")
+        data.pop("output_directory")
+        return data
+
+
+# Funzione di render: riceve lo stato del job e la callback di avanzamento,
+# restituisce il percorso del file prodotto
+JobRunner = Callable[[RenderJobState, Callable[[str], Awaitable[None]]], Awaitable[str]]
+
+
+class RenderJobQueueFull(Exception):
+    """La coda dei render ha raggiunto la capacità massima."""
+
+
+class RenderJobQueue:
+    """
+    Coda FIFO di render eseguiti da un numero limitato di worker asyncio.
+
+    Ogni cambio di stato viene inviato a tutti i client tramite la funzione
+    di broadcast fornita, con messaggi di tipo "render_job". I job terminati
+    vengono conservati fino a max_retained, poi eliminati con i loro file.
+    """
+
+    def __init__(
+        self,
+        broadcast: Callable[[dict], Awaitable[None]],
+        output_directory: str = "output/jobs",
+        max_concurrent: int = 2,
+        max_queued: int = 100,
+        max_retained: int = 200
+    ):
+        """
+        Inizializza la coda dei render.
+
+        Args:
+            broadcast: Funzione che invia un messaggio a tutti i client WebSocket
+            output_directory: Directory base dei risultati (una sottocartella per job)
+            max_concurrent: Numero massimo di render eseguiti in parallelo
+            max_queued: Numero massimo di render in attesa
+            max_retained: Numero di job terminati conservati per il download
+        """
+        self._broadcast = broadcast
+        self.output_directory = output_directory
+        self.max_concurrent = max(max_concurrent, 1)
+        self.max_queued = max_queued
+        self.max_retained = max_retained
+
+        self._queue: "asyncio.Queue[Tuple[RenderJobState, JobRunner]]" = asyncio.Queue()
+        self._jobs: "OrderedDict[str, RenderJobState]" = OrderedDict()
+        self._workers = []
+        self._running = 0
+
+        self.completed = 0
+        self.failed = 0
+
+    def _ensure_workers(self) -> None:
+        """Avvia i worker alla prima richiesta."""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(index))
+            for index in range(self.max_concurrent)
+        ]
+        logger.info(f"Coda render avviata con {self.max_concurrent} worker")
+
+    async def submit(
+        self,
+        runner: JobRunner,
+        download_filename: str,
+        media_type: str
+    ) -> RenderJobState:
+        """
+        Accoda un nuovo render.
+
+        Args:
+            runner: Funzione che esegue il render
+            download_filename: Nome del file proposto al download
+            media_type: Tipo MIME del risultato
+
+        Returns:
+            Stato iniziale del job
+
+        Raises:
+            RenderJobQueueFull: Se la coda è piena
+        """
+        if self._queue.qsize() >= self.max_queued:
+            raise RenderJobQueueFull(
+                f"Coda render piena ({self.max_queued} job in attesa)")
+
+        self._ensure_workers()
+
+        job_id = uuid.uuid4().hex
+        job = RenderJobState(
+            id=job_id,
+            created_at=datetime.now().isoformat(),
+            download_filename=download_filename,
+            media_type=media_type,
+            output_directory=os.path.join(self.output_directory, job_id)
+        )
+        self._jobs[job_id] = job
+        self._queue.put_nowait((job, runner))
+
+        logger.info(f"Render accodato: {job_id} (in attesa: {self._queue.qsize()})")
+        await self._publish(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[RenderJobState]:
+        """
+        Restituisce lo stato di un job.
+
+        Args:
+            job_id: Identificativo del job
+
+        Returns:
+            Stato del job, None se sconosciuto o già eliminato
+        """
+        return self._jobs.get(job_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Restituisce lo stato della coda.
+
+        Returns:
+            Dizionario con job in attesa, in esecuzione e contatori
+        """
+        return {
+            "workers": self.max_concurrent,
+            "queued": self._queue.qsize(),
+            "running": self._running,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retained": len(self._jobs)
+        }
+
+    async def shutdown(self) -> None:
+        """Arresta i worker; i job in corso vengono interrotti."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _worker(self, index: int) -> None:
+        """Esegue i job in ordine di arrivo."""
+        while True:
+            job, runner = await self._queue.get()
+            self._running += 1
+            try:
+                await self._run(job, runner)
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+
+    async def _run(self, job: RenderJobState, runner: JobRunner) -> None:
+        """Esegue un singolo job aggiornandone lo stato."""
+        job.status = "running"
+        job.started_at = datetime.now().isoformat()
+
+        async def report(stage: str) -> None:
+            job.stage = stage
+            job.progress = STAGE_PROGRESS.get(stage, job.progress)
+            await self._publish(job)
+
+        try:
+            os.makedirs(job.output_directory, exist_ok=True)
+            job.result_path = await runner(job, report)
+            job.status = "completed"
+            job.stage = "done"
+            job.progress = STAGE_PROGRESS["done"]
+            self.completed += 1
+            logger.info(f"Render completato: {job.id}")
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Render interrotto"
+            raise
+        except Exception as error:
+            job.status = "failed"
+            job.error = getattr(error, "detail", None) or str(error)
+            self.failed += 1
+            logger.error(f"Render fallito {job.id}: {job.error}")
+        finally:
+            job.finished_at = datetime.now().isoformat()
+
+        await self._publish(job)
+        self._evict_finished()
+
+    async def _publish(self, job: RenderJobState) -> None:
+        """Notifica ai client lo stato corrente del job."""
+        try:
+            await self._broadcast({"type": "render_job", "data": job.to_dict()})
+        except Exception as error:
+            logger.warning(f"Errore notifica stato render {job.id}: {error}")
+
+    def _evict_finished(self) -> None:
+        """Elimina i job terminati più vecchi oltre il limite di conservazione."""
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in ("completed", "failed")
+        ]
+        for job_id in finished[:max(len(finished) - self.max_retained, 0)]:
+            job = self._jobs.pop(job_id)
+            if job.output_directory and os.path.isdir(job.output_directory):
+                shutil.rmtree(job.output_directory, ignore_errors=True)
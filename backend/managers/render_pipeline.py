@@ -0,0 +1,168 @@
+"""
+Pipeline di elaborazione audio successiva alla sintesi.
+
+Raccoglie in funzioni a livello di modulo le fasi CPU-bound della
+generazione (elaborazione voce, decodifica musica, mixaggio e conversione
+nel formato finale), così da poterle eseguire in un RenderWorkerPool a
+thread o a processi.
+"""
+
+import io
+import logging
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from pydub import AudioSegment
+from pydub.effects import normalize
+
+from .audio_mixer import AudioMixer, MusicBedSettings
+from .audio_processor import AudioConverter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RenderJob:
+    """Parametri di elaborazione di un audio sintetizzato."""
+
+    voice: AudioSegment
+    output_format: str
+    audio_quality: str
+    custom_filename: str
+    music: Optional[AudioSegment] = None
+    mix_settings: Optional[MusicBedSettings] = None
+    output_directory: str = "output"
+
+
+def process_voice(voice: AudioSegment) -> AudioSegment:
+    """
+    Applica alla voce le ottimizzazioni per un suono più naturale.
+
+    Args:
+        voice: Voce sintetizzata
+
+    Returns:
+        Voce normalizzata, filtrata e attenuata
+    """
+    # Normalizza con parametri più morbidi per evitare distorsioni
+    voice = normalize(voice, headroom=2.0)
+
+    # Applica un lieve filtro passa-basso per ridurre metallic sound
+    # Riduci leggermente le frequenze acute che causano suono metallico
+    voice = voice.low_pass_filter(8000)  # Taglia frequenze sopra 8kHz
+
+    # Aggiungi un po' di "warmth" riducendo lievemente il volume generale
+    return voice - 3  # Riduci di 3dB per suono più morbido
+
+
+def decode_music(source: Union[bytes, str], audio_format: Optional[str] = None) -> AudioSegment:
+    """
+    Decodifica una musica di sottofondo nel formato di lavoro del mixer.
+
+    Args:
+        source: Contenuto del file audio o percorso su disco
+        audio_format: Formato del contenuto (None = rilevamento automatico)
+
+    Returns:
+        Musica normalizzata, mono, 16 bit, alla frequenza telefonica
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    music = AudioSegment.from_file(source, format=audio_format)
+    return prepare_music(music)
+
+
+def prepare_music(music: AudioSegment) -> AudioSegment:
+    """
+    Normalizza una musica già decodificata e la porta nel formato del mixer.
+
+    Usata sia per le musiche caricate con la richiesta sia per la versione
+    PCM della libreria, così la stessa canzone ha lo stesso livello.
+
+    Args:
+        music: Musica decodificata
+
+    Returns:
+        Musica normalizzata, mono, 16 bit, alla frequenza telefonica
+    """
+    return AudioMixer.prepare(normalize(music))
+
+
+def mix_final_audio(job: RenderJob) -> AudioSegment:
+    """
+    Elabora la voce e la mixa con l'eventuale musica.
+
+    Args:
+        job: Parametri di elaborazione
+
+    Returns:
+        Audio finale prima della conversione di formato
+    """
+    voice = process_voice(job.voice)
+
+    if job.music is None:
+        # Solo voce, senza musica
+        return voice
+
+    # Voce e musica vengono mixate nel formato telefonico finale
+    voice = AudioMixer.prepare(voice)
+    return AudioMixer().mix(
+        voice, job.music, job.mix_settings or MusicBedSettings())
+
+
+def encode_audio(
+    audio: AudioSegment,
+    output_format: str,
+    audio_quality: str,
+    custom_filename: str,
+    output_directory: str = "output"
+) -> str:
+    """
+    Converte l'audio finale nel formato richiesto e lo salva.
+
+    Args:
+        audio: Audio finale (voce o mix)
+        output_format: Formato output (wav, mp3, gsm)
+        audio_quality: Qualità audio (pcm, alaw, ulaw)
+        custom_filename: Nome base del file di output
+        output_directory: Directory dove salvare il file
+
+    Returns:
+        Percorso del file audio finale
+    """
+    converter = AudioConverter(output_directory=output_directory)
+    return converter.convert(audio, output_format, audio_quality, custom_filename)
+
+
+def render_audio(job: RenderJob) -> str:
+    """
+    Elabora la voce, la mixa con l'eventuale musica e salva il risultato.
+
+    Args:
+        job: Parametri di elaborazione
+
+    Returns:
+        Percorso del file audio finale
+    """
+    # Salva il risultato finale con conversione nel formato richiesto
+    return encode_audio(
+        mix_final_audio(job),
+        job.output_format,
+        job.audio_quality,
+        job.custom_filename,
+        job.output_directory
+    )
+
+
+def render_telephony_pcm(job: RenderJob) -> AudioSegment:
+    """
+    Produce l'audio finale come PCM mono 16 bit a 8kHz, pronto per lo streaming.
+
+    Args:
+        job: Parametri di elaborazione
+
+    Returns:
+        Audio nel formato di lavoro del mixer
+    """
+    return AudioMixer.prepare(mix_final_audio(job))
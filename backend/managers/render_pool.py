@@ -0,0 +1,161 @@
+"""
+Pool di worker per l'elaborazione audio CPU-bound.
+
+Questo modulo sposta normalizzazione, filtri, mixaggio e conversione di
+formato fuori dall'event loop di FastAPI: le operazioni vengono eseguite
+in un pool di thread o di processi, così una elaborazione lunga non blocca
+WebSocket e altre richieste. Il pool espone profondità della coda e
+utilizzo dei worker.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_call(function: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Tuple[float, Any]:
+    """
+    Esegue una funzione nel worker misurandone il tempo di esecuzione.
+
+    Definita a livello di modulo per poter essere inviata ai processi.
+
+    Returns:
+        Tupla (secondi di esecuzione, risultato)
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+class RenderWorkerPool:
+    """
+    Esegue funzioni CPU-bound in un pool di thread o processi.
+
+    In modalità "process" le funzioni e i loro argomenti devono essere
+    serializzabili (funzioni definite a livello di modulo). Le attività
+    vengono eseguite in ordine di arrivo: quelle oltre il numero di worker
+    restano in coda.
+    """
+
+    SUPPORTED_MODES = ("thread", "process")
+
+    def __init__(self, mode: str = "process", max_workers: int = None):
+        """
+        Inizializza il pool di worker.
+
+        Args:
+            mode: "thread" o "process"
+            max_workers: Numero di worker (None = numero di CPU)
+
+        Raises:
+            ValueError: Se la modalità non è supportata
+        """
+        if mode not in self.SUPPORTED_MODES:
+            raise ValueError(
+                f"Modalità pool non supportata: {mode}. "
+                f"Supportate: {', '.join(self.SUPPORTED_MODES)}"
+            )
+
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        self._executor: Executor = None
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._busy_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        """Crea l'executor alla prima richiesta."""
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="render"
+                    )
+                logger.info(
+                    f"Pool elaborazione audio avviato: {self.mode}, {self.max_workers} worker")
+            return self._executor
+
+    async def run(self, function: Callable, *args, **kwargs) -> Any:
+        """
+        Esegue una funzione nel pool senza bloccare l'event loop.
+
+        Args:
+            function: Funzione da eseguire
+            *args: Argomenti posizionali
+            **kwargs: Argomenti nominali
+
+        Returns:
+            Risultato della funzione
+
+        Raises:
+            Exception: Qualsiasi eccezione sollevata dalla funzione
+        """
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            self._pending += 1
+
+        try:
+            elapsed, result = await loop.run_in_executor(
+                executor, _timed_call, function, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        with self._lock:
+            self._completed += 1
+            self._busy_seconds += elapsed
+
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Restituisce lo stato del pool.
+
+        Returns:
+            Dizionario con coda, worker attivi e utilizzo (istantaneo e medio)
+        """
+        with self._lock:
+            active = min(self._pending, self.max_workers)
+            uptime = time.monotonic() - self._started_at
+            capacity = uptime * self.max_workers
+            return {
+                "mode": self.mode,
+                "workers": self.max_workers,
+                "active": active,
+                "queue_depth": max(self._pending - self.max_workers, 0),
+                "completed": self._completed,
+                "failed": self._failed,
+                "busy_seconds": round(self._busy_seconds, 3),
+                "utilization": round(active / self.max_workers, 4),
+                "average_utilization": round(
+                    min(self._busy_seconds / capacity, 1.0), 4) if capacity else 0.0
+            }
+
+    def shutdown(self) -> None:
+        """Arresta il pool attendendo le elaborazioni in corso."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+            logger.info("Pool elaborazione audio arrestato")
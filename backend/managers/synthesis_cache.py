@@ -0,0 +1,284 @@
+"""
+Cache su disco degli audio sintetizzati.
+
+Questo modulo evita di richiamare i servizi TTS quando lo stesso testo viene
+sintetizzato più volte con la stessa voce e gli stessi parametri: gli audio
+sono indirizzati per contenuto (hash della richiesta) e la cache viene
+mantenuta entro una dimensione massima con politica LRU.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+
+class SynthesisCache:
+    """
+    Cache LRU su disco per gli audio prodotti dai servizi TTS.
+
+    Ogni voce è salvata in un file il cui nome è l'hash SHA-256 di
+    servizio, voce, testo normalizzato e parametri di sintesi. L'ordine
+    LRU è ricostruito all'avvio dalla data di ultimo accesso dei file.
+    """
+
+    FILE_EXTENSION = ".wav"
+
+    def __init__(
+        self,
+        cache_directory: str = "cache/tts",
+        max_size_bytes: int = 512 * 1024 * 1024,
+        enabled: bool = True
+    ):
+        """
+        Inizializza la cache di sintesi.
+
+        Args:
+            cache_directory: Directory dove salvare gli audio in cache
+            max_size_bytes: Dimensione massima complessiva della cache
+            enabled: Se False la cache non legge né scrive nulla
+        """
+        self.cache_directory = cache_directory
+        self.max_size_bytes = max_size_bytes
+        self.enabled = enabled
+
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.enabled:
+            os.makedirs(cache_directory, exist_ok=True)
+            self._load_index()
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """
+        Normalizza il testo per l'uso nella chiave di cache.
+
+        Applica la normalizzazione Unicode NFC e compatta gli spazi,
+        così testi che differiscono solo per spaziatura condividono l'audio.
+
+        Args:
+            text: Testo da normalizzare
+
+        Returns:
+            Testo normalizzato
+        """
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @classmethod
+    def build_key(
+        cls,
+        service: str,
+        voice: str,
+        text: str,
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Calcola la chiave di cache di una richiesta di sintesi.
+
+        Args:
+            service: Servizio TTS (azure, edge, google)
+            voice: Identificativo della voce
+            text: Testo da sintetizzare
+            parameters: Parametri SSML/rate/pitch/volume della sintesi
+
+        Returns:
+            Hash esadecimale SHA-256 della richiesta
+        """
+        payload = json.dumps(
+            {
+                "service": service,
+                "voice": voice,
+                "text": cls.normalize_text(text),
+                "parameters": parameters or {}
+            },
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def contains(self, key: str) -> bool:
+        """
+        Verifica se un audio è presente in cache, senza leggerlo.
+
+        Args:
+            key: Chiave calcolata con build_key
+
+        Returns:
+            True se la chiave è in cache
+        """
+        if not self.enabled:
+            return False
+
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Recupera un audio dalla cache.
+
+        Args:
+            key: Chiave calcolata con build_key
+
+        Returns:
+            Contenuto dell'audio, None se non presente
+        """
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(key)
+
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            try:
+                with open(path, "rb") as file:
+                    data = file.read()
+                os.utime(path)
+            except OSError as error:
+                logger.warning(f"Voce cache non leggibile {key[:12]}: {error}")
+                self._forget(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        logger.info(f"Cache sintesi: hit {key[:12]} ({len(data)} bytes)")
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Salva un audio nella cache, rimuovendo le voci meno usate se necessario.
+
+        Args:
+            key: Chiave calcolata con build_key
+            data: Contenuto dell'audio da salvare
+        """
+        if not self.enabled or not data:
+            return
+
+        if len(data) > self.max_size_bytes:
+            logger.info(
+                f"Audio troppo grande per la cache sintesi ({len(data)} bytes)")
+            return
+
+        path = self._entry_path(key)
+        temp_path = f"{path}.tmp"
+
+        with self._lock:
+            try:
+                with open(temp_path, "wb") as file:
+                    file.write(data)
+                os.replace(temp_path, path)
+            except OSError as error:
+                logger.warning(f"Impossibile salvare in cache sintesi: {error}")
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return
+
+            self._forget(key, remove_file=False)
+            self._entries[key] = len(data)
+            self._total_size += len(data)
+            self._evict()
+
+    def purge(self) -> Dict[str, int]:
+        """
+        Svuota completamente la cache.
+
+        Returns:
+            Dizionario con numero di voci e bytes rimossi
+        """
+        with self._lock:
+            removed_entries = len(self._entries)
+            removed_bytes = self._total_size
+
+            for key in list(self._entries):
+                self._forget(key)
+
+        logger.info(
+            f"Cache sintesi svuotata: {removed_entries} voci, {removed_bytes} bytes")
+        return {
+            "removed_entries": removed_entries,
+            "removed_bytes": removed_bytes
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Restituisce le statistiche di utilizzo della cache.
+
+        Returns:
+            Dizionario con contatori hit/miss, dimensione e occupazione
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "size_bytes": self._total_size,
+                "max_size_bytes": self.max_size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _entry_path(self, key: str) -> str:
+        """Restituisce il percorso del file associato a una chiave."""
+        return os.path.join(self.cache_directory, f"{key}{self.FILE_EXTENSION}")
+
+    def _load_index(self) -> None:
+        """Ricostruisce l'indice LRU dai file presenti su disco."""
+        files = []
+
+        for filename in os.listdir(self.cache_directory):
+            if not filename.endswith(self.FILE_EXTENSION):
+                continue
+            path = os.path.join(self.cache_directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, filename[:-len(self.FILE_EXTENSION)], stat.st_size))
+
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_size += size
+
+        self._evict()
+        logger.info(
+            f"Cache sintesi caricata: {len(self._entries)} voci, {self._total_size} bytes")
+
+    def _evict(self) -> None:
+        """Rimuove le voci meno recenti finché la cache rientra nel limite."""
+        while self._total_size > self.max_size_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            self._forget(oldest_key)
+            self.evictions += 1
+
+    def _forget(self, key: str, remove_file: bool = True) -> None:
+        """Rimuove una voce dall'indice e, opzionalmente, dal disco."""
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_size -= size
+
+        if remove_file:
+            path = self._entry_path(key)
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as error:
+                logger.warning(f"Errore rimozione voce cache {key[:12]}: {error}")
@@ -7,12 +7,50 @@ aggiornamenti di sistema.
 """
 
 import json
+import asyncio
 import logging
-from typing import List
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
 from fastapi import WebSocket
 
 logger = logging.getLogger(__name__)
 
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+
+class ClientConnection:
+    """
+    Connessione WebSocket con coda di invio dedicata.
+
+    Un task per client invia i messaggi in ordine: un client lento accumula
+    messaggi nella propria coda senza rallentare gli altri.
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue_size: int):
+        """
+        Inizializza la connessione.
+
+        Args:
+            websocket: WebSocket del client
+            max_queue_size: Messaggi massimi in attesa di invio
+        """
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(max_queue_size, 1))
+        self.sender: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Messaggi in coda, inviati e scartati del client."""
+        client = self.websocket.client
+        return {
+            "client": f"{client.host}:{client.port}" if client else "unknown",
+            "queued": self.queue.qsize(),
+            "sent": self.sent,
+            "dropped": self.dropped
+        }
+
 
 class WebSocketConnectionManager:
     """
@@ -20,11 +58,39 @@ class WebSocketConnectionManager:
 
     Permette di inviare messaggi broadcast a tutti i client connessi
     e gestisce automaticamente la pulizia delle connessioni interrotte.
+    Il broadcast accoda il messaggio per ogni client senza attendere
+    l'invio; quando la coda di un client è piena si applica la politica
+    configurata (scarto del messaggio più vecchio o disconnessione).
     """
 
-    def __init__(self):
-        """Inizializza il gestore con una lista vuota di connessioni."""
-        self.active_connections: List[WebSocket] = []
+    def __init__(
+        self,
+        max_queue_size: int = 100,
+        slow_client_policy: str = DROP_OLDEST,
+        send_timeout: float = 10.0
+    ):
+        """
+        Inizializza il gestore senza connessioni.
+
+        Args:
+            max_queue_size: Messaggi massimi in attesa per client
+            slow_client_policy: "drop_oldest" o "disconnect" a coda piena
+            send_timeout: Tempo massimo di un invio prima di chiudere il client
+        """
+        self.max_queue_size = max_queue_size
+        self.slow_client_policy = (slow_client_policy
+                                   if slow_client_policy in (DROP_OLDEST, DISCONNECT)
+                                   else DROP_OLDEST)
+        self.send_timeout = send_timeout
+        self._clients: Dict[WebSocket, ClientConnection] = {}
+
+        self.dropped_messages = 0
+        self.slow_disconnects = 0
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        """WebSocket dei client connessi."""
+        return list(self._clients)
 
     async def connect(self, websocket: WebSocket) -> None:
         """
@@ -34,49 +100,115 @@ class WebSocketConnectionManager:
             websocket: Oggetto WebSocket da connettere
         """
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = ClientConnection(websocket, self.max_queue_size)
+        client.sender = asyncio.create_task(self._send_loop(client))
+        self._clients[websocket] = client
         logger.info(
-            f"Nuova connessione WebSocket. Totale: {len(self.active_connections)}"
+            f"Nuova connessione WebSocket. Totale: {len(self._clients)}"
         )
 
     def disconnect(self, websocket: WebSocket) -> None:
         """
-        Rimuove una connessione WebSocket dalla lista attiva.
+        Rimuove una connessione WebSocket e ne arresta l'invio.
 
         Args:
             websocket: Oggetto WebSocket da disconnettere
         """
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        client = self._clients.pop(websocket, None)
+        if client is None:
+            return
+
+        if client.sender is not None and client.sender is not asyncio.current_task():
+            client.sender.cancel()
         logger.info(
-            f"Connessione WebSocket chiusa. Totale: {len(self.active_connections)}"
+            f"Connessione WebSocket chiusa. Totale: {len(self._clients)}"
         )
 
     async def broadcast(self, message: dict) -> None:
         """
-        Invia un messaggio a tutti i client connessi.
+        Accoda un messaggio per tutti i client connessi.
 
-        Gestisce automaticamente la rimozione delle connessioni interrotte
-        durante l'invio del messaggio.
+        Non attende l'invio: ogni client riceve i messaggi dal proprio
+        task, nell'ordine di accodamento.
 
         Args:
             message: Dizionario da inviare come JSON a tutti i client
         """
-        if not self.active_connections:
+        self._fan_out(message)
+
+    def _fan_out(self, message: dict) -> None:
+        """Serializza il messaggio una volta e lo accoda per ogni client."""
+        if not self._clients:
             return
 
-        dead_connections = []
         message_json = json.dumps(message)
+        for client in list(self._clients.values()):
+            self._enqueue(client, message_json)
+
+    async def send_to(self, websocket: WebSocket, message: dict) -> None:
+        """
+        Accoda un messaggio per un singolo client.
 
-        for connection in self.active_connections:
+        Passa dalla stessa coda dei broadcast, così i messaggi del client
+        restano ordinati e non vengono mai inviati in concorrenza.
+
+        Args:
+            websocket: WebSocket del client destinatario
+            message: Dizionario da inviare come JSON
+        """
+        client = self._clients.get(websocket)
+        if client is not None:
+            self._enqueue(client, json.dumps(message))
+
+    def _enqueue(self, client: ClientConnection, message_json: str) -> None:
+        """Accoda un messaggio applicando la politica per i client lenti."""
+        if not client.queue.full():
+            client.queue.put_nowait(message_json)
+            return
+
+        if self.slow_client_policy == DISCONNECT:
+            self.slow_disconnects += 1
+            logger.warning("Client WebSocket lento disconnesso: coda di invio piena")
+            self._close(client, code=1013)
+            return
+
+        # Scarta il messaggio più vecchio per fare spazio al nuovo
+        client.queue.get_nowait()
+        client.queue.put_nowait(message_json)
+        client.dropped += 1
+        self.dropped_messages += 1
+
+    async def _send_loop(self, client: ClientConnection) -> None:
+        """Invia in ordine i messaggi in coda di un client."""
+        while True:
+            message_json = await client.queue.get()
             try:
-                await connection.send_text(message_json)
+                await asyncio.wait_for(
+                    client.websocket.send_text(message_json), timeout=self.send_timeout)
+                client.sent += 1
+            except asyncio.TimeoutError:
+                self.slow_disconnects += 1
+                logger.warning(
+                    f"Client WebSocket lento disconnesso: invio oltre {self.send_timeout:.0f}s")
+                self._close(client, code=1013)
+                return
             except Exception as error:
                 logger.warning(f"Errore invio messaggio WebSocket: {error}")
-                dead_connections.append(connection)
+                self.disconnect(client.websocket)
+                return
 
-        for dead_connection in dead_connections:
-            self.disconnect(dead_connection)
+    def _close(self, client: ClientConnection, code: int) -> None:
+        """Rimuove il client e chiude la connessione in background."""
+        self.disconnect(client.websocket)
+        asyncio.ensure_future(self._close_websocket(client.websocket, code))
+
+    @staticmethod
+    async def _close_websocket(websocket: WebSocket, code: int) -> None:
+        """Chiude un WebSocket ignorando gli errori di una connessione già interrotta."""
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
 
     def get_connection_count(self) -> int:
         """
@@ -85,7 +217,24 @@ class WebSocketConnectionManager:
         Returns:
             Numero di connessioni WebSocket attive
         """
-        return len(self.active_connections)
+        return len(self._clients)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Restituisce lo stato delle code di invio.
+
+        Returns:
+            Dizionario con politica, contatori globali e stato per client
+        """
+        return {
+            "connections": len(self._clients),
+            "max_queue_size": self.max_queue_size,
+            "slow_client_policy": self.slow_client_policy,
+            "send_timeout": self.send_timeout,
+            "dropped_messages": self.dropped_messages,
+            "slow_disconnects": self.slow_disconnects,
+            "clients": [client.get_stats() for client in self._clients.values()]
+        }
 
 
 class HistoryUpdateManager(WebSocketConnectionManager):
@@ -93,9 +242,197 @@ class HistoryUpdateManager(WebSocketConnectionManager):
     Gestore specializzato per aggiornamenti della cronologia testi.
 
     Estende il gestore base aggiungendo metodi specifici per
-    notificare i client di nuove voci nella cronologia.
+    notificare i client di nuove voci nella cronologia. Mantiene in memoria
+    le voci più recenti, così gli snapshot per i nuovi client non
+    interrogano il database.
+
+    Con una finestra di aggregazione, le nuove voci prodotte a pochi
+    millisecondi l'una dall'altra vengono inviate in un unico messaggio
+    "history_batch", serializzato una sola volta.
     """
 
+    def __init__(
+        self,
+        recent_capacity: int = 100,
+        coalesce_window: float = 0.0,
+        max_batch_size: int = 50,
+        **kwargs
+    ):
+        """
+        Inizializza il gestore.
+
+        Args:
+            recent_capacity: Voci recenti mantenute in memoria
+            coalesce_window: Secondi di aggregazione delle nuove voci (0 = invio immediato)
+            max_batch_size: Voci oltre le quali il messaggio aggregato parte subito
+            **kwargs: Parametri del gestore base (code di invio)
+        """
+        super().__init__(**kwargs)
+        self.recent_capacity = max(recent_capacity, 1)
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=self.recent_capacity)
+        self._recent_loaded = False
+
+        self.coalesce_window = coalesce_window
+        self.max_batch_size = max(max_batch_size, 1)
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.recent_hits = 0
+        self.recent_misses = 0
+        self.events_produced = 0
+        self.messages_sent = 0
+        self.batches_sent = 0
+
+    def publish_new_text(self, entry: Dict[str, Any]) -> None:
+        """
+        Pubblica una nuova voce della cronologia ai client connessi.
+
+        Senza finestra di aggregazione invia subito un messaggio "new_text";
+        altrimenti la voce attende la fine della finestra insieme alle altre.
+
+        Args:
+            entry: Dati della voce
+        """
+        self.events_produced += 1
+
+        if self.coalesce_window <= 0:
+            self._send_entries([entry])
+            return
+
+        loop = asyncio.get_running_loop()
+        if self._flush_loop is not loop:
+            # Timer di un loop non più attivo: le voci in attesa partono subito
+            self.flush_pending()
+            self._flush_loop = loop
+
+        self._pending.append(entry)
+        if len(self._pending) >= self.max_batch_size:
+            self.flush_pending()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.coalesce_window, self.flush_pending)
+
+    def flush_pending(self) -> None:
+        """Invia subito le voci in attesa nella finestra di aggregazione."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        entries, self._pending = self._pending, []
+        if entries:
+            self._send_entries(entries)
+
+    def _send_entries(self, entries: List[Dict[str, Any]]) -> None:
+        """Invia una voce come "new_text" o più voci come "history_batch"."""
+        if len(entries) == 1:
+            message = {"type": "new_text", "data": entries[0]}
+        else:
+            # Dalla più recente, come snapshot e delta
+            message = {"type": "history_batch", "data": entries[::-1]}
+            self.batches_sent += 1
+
+        self.messages_sent += 1
+        self._fan_out(message)
+
+    def add_recent(self, entry: Dict[str, Any]) -> None:
+        """
+        Aggiunge in testa una voce appena salvata.
+
+        Args:
+            entry: Voce nel formato restituito dal database
+        """
+        self._recent.appendleft(entry)
+
+    def load_recent(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Popola le voci recenti dal database (avvio a freddo).
+
+        Le voci aggiunte nel frattempo con add_recent vengono mantenute.
+
+        Args:
+            entries: Voci più recenti dal database, dalla più recente
+        """
+        merged = {entry["id"]: entry for entry in entries}
+        merged.update((entry["id"], entry) for entry in self._recent)
+        newest = sorted(merged.values(), key=lambda entry: entry["id"], reverse=True)
+
+        self._recent = deque(newest[:self.recent_capacity], maxlen=self.recent_capacity)
+        self._recent_loaded = True
+
+    def get_recent(self, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Restituisce le voci più recenti dalla memoria.
+
+        Args:
+            limit: Numero massimo di voci
+
+        Returns:
+            Voci dalla più recente, None se la memoria non è ancora stata
+            popolata o il limite supera la capacità (serve il database)
+        """
+        if not self._recent_loaded or limit > self.recent_capacity:
+            self.recent_misses += 1
+            return None
+
+        self.recent_hits += 1
+        return list(self._recent)[:limit]
+
+    @property
+    def recent_loaded(self) -> bool:
+        """True se la memoria è stata popolata dal database."""
+        return self._recent_loaded
+
+    @property
+    def latest_recent_id(self) -> Optional[int]:
+        """ID della voce più recente in memoria, None se vuota."""
+        return self._recent[0]["id"] if self._recent else None
+
+    def get_recent_after(self, last_seen_id: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Restituisce dalla memoria le voci successive a un ID.
+
+        Args:
+            last_seen_id: Ultimo ID ricevuto dal client
+
+        Returns:
+            Voci successive dalla più recente, None se la memoria non copre
+            tutto l'intervallo (serve il database)
+        """
+        if not self._recent_loaded:
+            return None
+
+        full = len(self._recent) == self.recent_capacity
+        if full and self._recent[-1]["id"] > last_seen_id + 1:
+            # Le voci tra last_seen_id e la più vecchia in memoria non sono qui
+            return None
+
+        return [entry for entry in self._recent if entry["id"] > last_seen_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Restituisce lo stato delle code di invio e della cronologia in memoria.
+
+        Returns:
+            Dizionario del gestore base con le statistiche delle voci recenti
+        """
+        stats = super().get_stats()
+        stats["recent_history"] = {
+            "capacity": self.recent_capacity,
+            "entries": len(self._recent),
+            "loaded": self._recent_loaded,
+            "hits": self.recent_hits,
+            "misses": self.recent_misses
+        }
+        stats["coalescing"] = {
+            "window_ms": round(self.coalesce_window * 1000, 1),
+            "max_batch_size": self.max_batch_size,
+            "pending": len(self._pending),
+            "events_produced": self.events_produced,
+            "messages_sent": self.messages_sent,
+            "batches_sent": self.batches_sent
+        }
+        return stats
+
     async def notify_new_text(
         self,
         entry_id: int,
@@ -114,17 +451,13 @@ class HistoryUpdateManager(WebSocketConnectionManager):
         """
         from datetime import datetime
 
-        message = {
-            "type": "new_text",
-            "data": {
-                "id": entry_id,
-                "text": text,
-                "voice": voice,
-                "timestamp": datetime.now().isoformat(),
-                "user_ip": user_ip
-            }
-        }
-        await self.broadcast(message)
+        self.publish_new_text({
+            "id": entry_id,
+            "text": text,
+            "voice": voice,
+            "timestamp": datetime.now().isoformat(),
+            "user_ip": user_ip
+        })
         logger.info(
             f"Notificato nuovo testo nella cronologia (ID: {entry_id})")
 
@@ -147,11 +480,8 @@ class HistoryUpdateManager(WebSocketConnectionManager):
             "type": "history_update",
             "data": history_data
         }
-        try:
-            await websocket.send_text(json.dumps(message))
-            logger.debug("Snapshot cronologia inviato al nuovo client")
-        except Exception as error:
-            logger.error(f"Errore invio snapshot cronologia: {error}")
+        await self.send_to(websocket, message)
+        logger.debug("Snapshot cronologia accodato per il nuovo client")
 
 
 class UpdateProgressManager(WebSocketConnectionManager):
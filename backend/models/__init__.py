@@ -2,11 +2,12 @@
 Models - Modelli di dati e cataloghi.
 """
 
-from .history import TextHistoryDatabase
+from .history import TextHistoryDatabase, InvalidHistoryCursor
 from .voice_catalog import VoiceCatalog, VoiceInfo
 
 __all__ = [
     "TextHistoryDatabase",
+    "InvalidHistoryCursor",
     "VoiceCatalog",
     "VoiceInfo"
 ]
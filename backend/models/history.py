@@ -5,14 +5,23 @@ Questo modulo fornisce funzionalità per tracciare e recuperare
 la cronologia dei testi convertiti in audio tramite il sistema TTS.
 """
 
+import os
+import re
+import base64
+import time
 import sqlite3
 import logging
-from typing import List, Dict, Optional
-from datetime import datetime
+import threading
+from typing import Any, List, Dict, Optional, Tuple
+from datetime import date, datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
 
+class InvalidHistoryCursor(ValueError):
+    """Cursore di paginazione non valido."""
+
+
 class TextHistoryDatabase:
     """
     Gestisce il database SQLite per la cronologia dei testi.
@@ -20,20 +29,46 @@ class TextHistoryDatabase:
     Il database traccia tutti i testi convertiti in audio, includendo
     informazioni sulla voce utilizzata e sull'utente che ha effettuato
     la richiesta.
+
+    Usa una sola connessione persistente in modalità WAL, condivisa tra i
+    thread e serializzata da un lock: aprire una connessione per ogni
+    operazione costava più della query stessa. La manutenzione (compact)
+    usa una connessione separata, senza trattenere il lock.
     """
 
-    def __init__(self, database_path: str = "text_history.db"):
+    # Pagine restituite al file system per ogni passo di incremental_vacuum
+    VACUUM_STEP_PAGES = 256
+
+    # Righe esaminate per indice da ANALYZE (statistiche approssimate, tempo limitato)
+    ANALYSIS_LIMIT = 1000
+
+    def __init__(
+        self,
+        database_path: str = "text_history.db",
+        cache_size_mb: int = 16,
+        mmap_size_mb: int = 64,
+        synchronous: str = "NORMAL"
+    ):
         """
         Inizializza il gestore del database.
 
         Args:
             database_path: Percorso del file database SQLite
+            cache_size_mb: Dimensione della cache delle pagine SQLite
+            mmap_size_mb: Porzione del file letta tramite memory mapping (0 = disattivato)
+            synchronous: Livello di sincronizzazione su disco (OFF, NORMAL, FULL)
         """
         self.database_path = database_path
+        self.cache_size_mb = cache_size_mb
+        self.mmap_size_mb = mmap_size_mb
+        self.synchronous = synchronous
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self.full_text_search = False
         self._initialize_database()
 
     def _initialize_database(self) -> None:
-        """Crea le tabelle del database se non esistono."""
+        """Crea tabelle e indici del database se non esistono."""
         try:
             connection = self._get_connection()
             cursor = connection.cursor()
@@ -49,21 +84,142 @@ class TextHistoryDatabase:
                 )
             ''')
 
+            # Le letture recenti filtrano su audio_generated e ordinano per data
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_text_history_generated_timestamp
+                ON text_history (audio_generated, timestamp)
+            ''')
+
+            # Ricerca filtrata per voce (l'ID è implicito nell'indice)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_text_history_voice
+                ON text_history (voice)
+            ''')
+
+            # Ricerca per intervallo di date
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_text_history_timestamp
+                ON text_history (timestamp)
+            ''')
+
             connection.commit()
-            connection.close()
+            self.full_text_search = self._initialize_full_text_search(connection)
             logger.info("Database cronologia inizializzato")
         except Exception as error:
             logger.error(f"Errore inizializzazione database: {error}")
             raise
 
+    def _initialize_full_text_search(self, connection: sqlite3.Connection) -> bool:
+        """
+        Crea l'indice full-text FTS5 dei testi e i trigger che lo aggiornano.
+
+        L'indice è una tabella a contenuto esterno: memorizza solo i token e
+        legge il testo da text_history. Alla prima creazione viene
+        popolato con le righe già presenti.
+
+        Args:
+            connection: Connessione al database
+
+        Returns:
+            True se la ricerca full-text è disponibile, False se SQLite
+            non include FTS5 (la ricerca usa allora LIKE)
+        """
+        existing = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'text_history_fts'"
+        ).fetchone()
+
+        try:
+            connection.executescript('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS text_history_fts USING fts5(
+                    text,
+                    content='text_history',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                );
+
+                CREATE TRIGGER IF NOT EXISTS text_history_fts_insert
+                AFTER INSERT ON text_history BEGIN
+                    INSERT INTO text_history_fts (rowid, text) VALUES (new.id, new.text);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS text_history_fts_delete
+                AFTER DELETE ON text_history BEGIN
+                    INSERT INTO text_history_fts (text_history_fts, rowid, text)
+                    VALUES ('delete', old.id, old.text);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS text_history_fts_update
+                AFTER UPDATE OF text ON text_history BEGIN
+                    INSERT INTO text_history_fts (text_history_fts, rowid, text)
+                    VALUES ('delete', old.id, old.text);
+                    INSERT INTO text_history_fts (rowid, text) VALUES (new.id, new.text);
+                END;
+            ''')
+        except sqlite3.OperationalError as error:
+            logger.warning(f"Ricerca full-text non disponibile (FTS5): {error}")
+            return False
+
+        if not existing:
+            connection.execute("INSERT INTO text_history_fts (text_history_fts) VALUES ('rebuild')")
+            connection.commit()
+            logger.info("Indice full-text della cronologia creato")
+        return True
+
     def _get_connection(self) -> sqlite3.Connection:
         """
-        Crea una connessione al database.
+        Restituisce la connessione persistente, creandola al primo utilizzo.
 
         Returns:
             Oggetto connessione SQLite
         """
-        return sqlite3.connect(self.database_path)
+        if self._connection is None:
+            connection = sqlite3.connect(
+                self.database_path, check_same_thread=False, timeout=5.0)
+            self._configure_connection(connection)
+            self._connection = connection
+        return self._connection
+
+    def _configure_connection(self, connection: sqlite3.Connection) -> None:
+        """
+        Imposta le pragma della connessione.
+
+        WAL consente letture concorrenti alle scritture e, con
+        synchronous=NORMAL, evita un fsync per ogni commit. I database nuovi
+        usano auto_vacuum incrementale, impostabile solo prima della
+        creazione delle tabelle e del passaggio a WAL.
+
+        Args:
+            connection: Connessione da configurare
+        """
+        if connection.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone() is None:
+            connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(f"PRAGMA synchronous={self.synchronous}")
+        connection.execute(f"PRAGMA cache_size={-self.cache_size_mb * 1024}")
+        connection.execute(f"PRAGMA mmap_size={self.mmap_size_mb * 1024 * 1024}")
+        connection.execute("PRAGMA temp_store=MEMORY")
+        connection.execute("PRAGMA busy_timeout=5000")
+
+    def close(self) -> None:
+        """Chiude la connessione persistente."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def ping(self) -> bool:
+        """
+        Verifica che il database sia raggiungibile e leggibile.
+
+        Returns:
+            True se la tabella della cronologia risponde a una query
+
+        Raises:
+            Exception: Se il database non è accessibile
+        """
+        with self._lock:
+            self._get_connection().execute("SELECT 1 FROM text_history LIMIT 1").fetchall()
+        return True
 
     def add_text_entry(
         self,
@@ -86,17 +242,17 @@ class TextHistoryDatabase:
             Exception: Se l'inserimento fallisce
         """
         try:
-            connection = self._get_connection()
-            cursor = connection.cursor()
+            with self._lock:
+                connection = self._get_connection()
+                cursor = connection.cursor()
 
-            cursor.execute('''
-                INSERT INTO text_history (text, voice, user_ip, audio_generated)
-                VALUES (?, ?, ?, TRUE)
-            ''', (text, voice, user_ip))
+                cursor.execute('''
+                    INSERT INTO text_history (text, voice, user_ip, audio_generated)
+                    VALUES (?, ?, ?, TRUE)
+                ''', (text, voice, user_ip))
 
-            connection.commit()
-            entry_id = cursor.lastrowid
-            connection.close()
+                connection.commit()
+                entry_id = cursor.lastrowid
 
             logger.info(f"Testo aggiunto alla cronologia (ID: {entry_id})")
             return entry_id
@@ -104,6 +260,40 @@ class TextHistoryDatabase:
             logger.error(f"Errore aggiunta testo alla cronologia: {error}")
             raise
 
+    def add_text_entries(self, entries: List[Tuple[str, str, Optional[str]]]) -> List[int]:
+        """
+        Aggiunge più testi alla cronologia in un'unica transazione.
+
+        Un solo commit (e una sola sincronizzazione su disco) per l'intero
+        blocco, invece di uno per testo.
+
+        Args:
+            entries: Terne (testo, voce, IP utente) da inserire
+
+        Returns:
+            ID dei record inseriti, nello stesso ordine
+
+        Raises:
+            Exception: Se l'inserimento fallisce (nessun record viene salvato)
+        """
+        try:
+            with self._lock:
+                connection = self._get_connection()
+                entry_ids = []
+                with connection:
+                    for text, voice, user_ip in entries:
+                        cursor = connection.execute('''
+                            INSERT INTO text_history (text, voice, user_ip, audio_generated)
+                            VALUES (?, ?, ?, TRUE)
+                        ''', (text, voice, user_ip))
+                        entry_ids.append(cursor.lastrowid)
+
+            logger.info(f"{len(entry_ids)} testi aggiunti alla cronologia")
+            return entry_ids
+        except Exception as error:
+            logger.error(f"Errore aggiunta testi alla cronologia: {error}")
+            raise
+
     def get_recent_entries(self, limit: int = 10) -> List[Dict]:
         """
         Recupera le voci più recenti della cronologia.
@@ -112,27 +302,399 @@ class TextHistoryDatabase:
             limit: Numero massimo di voci da recuperare
 
         Returns:
-            Lista di dizionari contenenti i dati delle voci
+            Lista di dizionari contenenti i dati delle voci, vuota in caso di errore
         """
         try:
-            connection = self._get_connection()
-            cursor = connection.cursor()
+            return self.fetch_recent_entries(limit)
+        except Exception as error:
+            logger.error(f"Errore recupero cronologia: {error}")
+            return []
 
+    def fetch_recent_entries(self, limit: int = 10) -> List[Dict]:
+        """
+        Recupera le voci più recenti della cronologia, propagando gli errori.
+
+        Da usare quando una lista vuota non deve essere confusa con un
+        errore di lettura (es. per popolare la cronologia in memoria).
+
+        Args:
+            limit: Numero massimo di voci da recuperare
+
+        Returns:
+            Lista di dizionari contenenti i dati delle voci
+
+        Raises:
+            sqlite3.Error: Se la lettura dal database fallisce
+        """
+        with self._lock:
+            cursor = self._get_connection().cursor()
+
+            # Percorre l'indice (audio_generated, timestamp) a ritroso;
+            # id (rowid) è implicito nell'indice e ordina i pari merito
             cursor.execute('''
                 SELECT id, text, voice, timestamp, user_ip
-                FROM text_history 
+                FROM text_history
                 WHERE audio_generated = TRUE
-                ORDER BY timestamp DESC 
+                ORDER BY timestamp DESC, id DESC
                 LIMIT ?
             ''', (limit,))
 
             rows = cursor.fetchall()
+
+        return self._format_history_entries(rows)
+
+    def get_oldest_id(self) -> Optional[int]:
+        """
+        Restituisce l'ID più vecchio ancora presente nella cronologia.
+
+        Le voci archiviate o eliminate dalla conservazione hanno ID minori.
+
+        Returns:
+            ID minimo, None se la cronologia è vuota
+        """
+        with self._lock:
+            row = self._get_connection().execute(
+                "SELECT MIN(id) FROM text_history").fetchone()
+        return row[0]
+
+    def get_entries_after(self, after_id: int, limit: int) -> List[Dict]:
+        """
+        Recupera le voci successive a un ID (lettura per intervallo di chiave primaria).
+
+        Args:
+            after_id: Ultimo ID già noto al client
+            limit: Numero massimo di voci
+
+        Returns:
+            Le prime voci successive ad after_id, dalla più recente
+        """
+        with self._lock:
+            rows = self._get_connection().execute('''
+                SELECT id, text, voice, timestamp, user_ip
+                FROM text_history
+                WHERE id > ? AND audio_generated = TRUE
+                ORDER BY id
+                LIMIT ?
+            ''', (after_id, limit)).fetchall()
+
+        return self._format_history_entries(list(reversed(rows)))
+
+    def search_entries(
+        self,
+        query: Optional[str] = None,
+        voice: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Cerca nella cronologia con paginazione a cursore.
+
+        I risultati sono ordinati dal più recente per ID (assegnato in
+        ordine di inserimento, come il timestamp). Il cursore identifica
+        l'ultima voce restituita, così ogni pagina riparte dall'indice
+        invece di scorrere le righe delle pagine precedenti.
+
+        Args:
+            query: Parole da cercare nel testo (tutte, anche come prefisso)
+            voice: Filtra per voce utilizzata
+            date_from: Data iniziale inclusa
+            date_to: Data finale inclusa
+            limit: Numero massimo di voci per pagina
+            cursor: Cursore restituito dalla pagina precedente
+
+        Returns:
+            Dizionario con le voci trovate ("entries") e il cursore della
+            pagina successiva ("next_cursor", None se non ci sono altre voci)
+
+        Raises:
+            InvalidHistoryCursor: Se il cursore non è valido
+        """
+        # Il "+" esclude l'indice su audio_generated, che costringerebbe a
+        # ordinare tutte le righe invece di percorrerle per ID
+        conditions = ["+h.audio_generated = TRUE"]
+        parameters: List[Any] = []
+        source = "text_history AS h"
+        order_column = "h.id"
+
+        terms = re.findall(r"\w+", query or "")
+        if terms:
+            if self.full_text_search:
+                # L'indice full-text guida la query in ordine di rowid
+                # decrescente e si ferma al limite della pagina
+                source = "text_history_fts AS f JOIN text_history AS h ON h.id = f.rowid"
+                order_column = "f.rowid"
+                conditions.append("text_history_fts MATCH ?")
+                parameters.append(" ".join(f'"{term}"*' for term in terms))
+            else:
+                for term in terms:
+                    conditions.append("h.text LIKE ?")
+                    parameters.append(f"%{term}%")
+
+        if voice:
+            conditions.append("h.voice = ?")
+            parameters.append(voice)
+
+        if cursor:
+            conditions.append(f"{order_column} < ?")
+            parameters.append(self.decode_cursor(cursor))
+
+        with self._lock:
+            connection = self._get_connection()
+
+            # Le date diventano un intervallo di ID (stesso ordine di
+            # inserimento), così la query resta una scansione per ID; il
+            # filtro esatto sul timestamp resta per i confini
+            for bound, operator in ((date_from, ">="), (date_to, "<")):
+                if bound is None:
+                    continue
+                timestamp = (bound if operator == ">=" else bound + timedelta(days=1)).isoformat()
+                first_id = self._first_id_from(connection, timestamp)
+                if first_id is not None:
+                    conditions.append(f"{order_column} {operator} ?")
+                    parameters.append(first_id)
+                elif operator == ">=":
+                    # Nessuna voce dalla data iniziale in poi
+                    return {"entries": [], "next_cursor": None}
+                conditions.append(f"+h.timestamp {operator} ?")
+                parameters.append(timestamp)
+
+            # Una riga in più indica se esiste una pagina successiva
+            rows = connection.execute(f'''
+                SELECT h.id, h.text, h.voice, h.timestamp, h.user_ip
+                FROM {source}
+                WHERE {" AND ".join(conditions)}
+                ORDER BY {order_column} DESC
+                LIMIT ?
+            ''', parameters + [limit + 1]).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.encode_cursor(rows[-1][0])
+
+        return {
+            "entries": self._format_history_entries(rows),
+            "next_cursor": next_cursor
+        }
+
+    @staticmethod
+    def _first_id_from(connection: sqlite3.Connection, timestamp: str) -> Optional[int]:
+        """
+        Restituisce l'ID della prima voce con timestamp non precedente a quello indicato.
+
+        Args:
+            connection: Connessione al database
+            timestamp: Timestamp (o data) in formato ISO
+
+        Returns:
+            ID della voce, None se non esistono voci successive
+        """
+        row = connection.execute('''
+            SELECT id FROM text_history
+            WHERE timestamp >= ?
+            ORDER BY timestamp, id
+            LIMIT 1
+        ''', (timestamp,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def encode_cursor(entry_id: int) -> str:
+        """
+        Codifica la posizione di una voce come cursore opaco.
+
+        Args:
+            entry_id: ID dell'ultima voce della pagina
+
+        Returns:
+            Cursore in base64 adatto agli URL
+        """
+        raw = f"id:{entry_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> int:
+        """
+        Decodifica un cursore prodotto da encode_cursor.
+
+        Args:
+            cursor: Cursore opaco
+
+        Returns:
+            ID dell'ultima voce della pagina precedente
+
+        Raises:
+            InvalidHistoryCursor: Se il cursore non è valido
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            prefix, entry_id = base64.urlsafe_b64decode(padded).decode("utf-8").split(":", 1)
+            if prefix != "id":
+                raise ValueError(prefix)
+            return int(entry_id)
+        except (ValueError, UnicodeDecodeError) as error:
+            raise InvalidHistoryCursor(f"Cursore non valido: {cursor}") from error
+
+    def archive_entries_before(self, cutoff: datetime, archive_directory: str) -> Dict[str, Any]:
+        """
+        Sposta le voci precedenti alla data indicata in database mensili di archivio.
+
+        Ogni mese viene copiato in archive_directory/text_history_AAAA_MM.db
+        (con gli ID originali) e rimosso dalla cronologia in un'unica
+        transazione; il lock viene rilasciato tra un mese e l'altro per non
+        bloccare a lungo le scritture.
+
+        Args:
+            cutoff: Le voci con timestamp precedente vengono archiviate
+            archive_directory: Directory dei database di archivio
+
+        Returns:
+            Dizionario con le righe spostate in totale ("rows_moved") e per
+            file di archivio ("archives")
+
+        Raises:
+            Exception: Se l'archiviazione di un mese fallisce (il mese resta
+                nella cronologia)
+        """
+        cutoff_timestamp = cutoff.strftime("%Y-%m-%d %H:%M:%S")
+
+        with self._lock:
+            months = [row[0] for row in self._get_connection().execute('''
+                SELECT DISTINCT strftime('%Y-%m', timestamp)
+                FROM text_history
+                WHERE timestamp < ?
+            ''', (cutoff_timestamp,)).fetchall() if row[0]]
+
+        os.makedirs(archive_directory, exist_ok=True)
+        archives: Dict[str, int] = {}
+
+        for month in sorted(months):
+            year, month_number = (int(part) for part in month.split("-"))
+            month_start = f"{month}-01"
+            next_month = (f"{year + 1}-01-01" if month_number == 12
+                          else f"{year}-{month_number + 1:02d}-01")
+            month_end = min(next_month, cutoff_timestamp)
+            archive_path = os.path.join(
+                archive_directory, f"text_history_{year}_{month_number:02d}.db")
+
+            with self._lock:
+                moved = self._move_to_archive(archive_path, month_start, month_end)
+            archives[os.path.basename(archive_path)] = moved
+            logger.info(f"Archiviate {moved} voci di {month} in {archive_path}")
+
+        return {"rows_moved": sum(archives.values()), "archives": archives}
+
+    def _move_to_archive(self, archive_path: str, start: str, end: str) -> int:
+        """
+        Copia nell'archivio e rimuove le voci con timestamp in [start, end).
+
+        Args:
+            archive_path: Database di archivio del mese
+            start: Timestamp iniziale incluso
+            end: Timestamp finale escluso
+
+        Returns:
+            Numero di voci spostate
+        """
+        connection = self._get_connection()
+        connection.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        try:
+            with connection:
+                connection.execute('''
+                    CREATE TABLE IF NOT EXISTS archive.text_history (
+                        id INTEGER PRIMARY KEY,
+                        text TEXT NOT NULL,
+                        voice TEXT NOT NULL,
+                        timestamp DATETIME,
+                        user_ip TEXT,
+                        audio_generated BOOLEAN DEFAULT FALSE
+                    )
+                ''')
+                connection.execute('''
+                    INSERT OR IGNORE INTO archive.text_history
+                        (id, text, voice, timestamp, user_ip, audio_generated)
+                    SELECT id, text, voice, timestamp, user_ip, audio_generated
+                    FROM main.text_history
+                    WHERE timestamp >= ? AND timestamp < ?
+                ''', (start, end))
+                cursor = connection.execute(
+                    "DELETE FROM main.text_history WHERE timestamp >= ? AND timestamp < ?",
+                    (start, end))
+                return cursor.rowcount
+        finally:
+            connection.execute("DETACH DATABASE archive")
+
+    def compact(self, vacuum_free_ratio: float = 0.1) -> Dict[str, Any]:
+        """
+        Aggiorna le statistiche dell'ottimizzatore e, se serve, compatta il file.
+
+        Usa una connessione di manutenzione dedicata, senza il lock della
+        connessione condivisa: in WAL le letture proseguono e le scritture
+        attendono al più un passo. Quando le pagine libere (lasciate da
+        cancellazioni e archiviazioni) superano la quota indicata vengono
+        restituite a piccoli passi con incremental_vacuum, ognuno in una
+        breve transazione. I database creati senza auto_vacuum incrementale
+        vengono convertiti con un VACUUM completo alla prima compattazione
+        necessaria. ANALYZE viene eseguito sempre, limitato ad
+        ANALYSIS_LIMIT righe per indice.
+
+        Args:
+            vacuum_free_ratio: Quota minima di pagine libere per compattare
+
+        Returns:
+            Dizionario con esito e modalità della compattazione, byte
+            recuperati e dimensione finale
+        """
+        connection = sqlite3.connect(self.database_path, timeout=30.0, isolation_level=None)
+        try:
+            size_before = self._database_size()
+            page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = connection.execute("PRAGMA freelist_count").fetchone()[0]
+
+            vacuum_mode = None
+            if page_count and free_pages / page_count >= vacuum_free_ratio:
+                if connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                    self._incremental_vacuum(connection)
+                    vacuum_mode = "incremental"
+                else:
+                    connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                    connection.execute("VACUUM")
+                    vacuum_mode = "full"
+
+            connection.execute(f"PRAGMA analysis_limit={self.ANALYSIS_LIMIT}")
+            connection.execute("ANALYZE")
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            size_after = self._database_size()
+        finally:
             connection.close()
 
-            return self._format_history_entries(rows)
-        except Exception as error:
-            logger.error(f"Errore recupero cronologia: {error}")
-            return []
+        return {
+            "vacuumed": vacuum_mode is not None,
+            "vacuum_mode": vacuum_mode,
+            "free_pages": free_pages,
+            "page_count": page_count,
+            "bytes_reclaimed": max(size_before - size_after, 0),
+            "size_bytes": size_after
+        }
+
+    def _incremental_vacuum(self, connection: sqlite3.Connection) -> None:
+        """Restituisce le pagine libere a passi di VACUUM_STEP_PAGES."""
+        while connection.execute("PRAGMA freelist_count").fetchone()[0] > 0:
+            # executescript esegue la pragma fino in fondo (execute libera una sola pagina)
+            connection.executescript(f"PRAGMA incremental_vacuum({self.VACUUM_STEP_PAGES});")
+            # Checkpoint non bloccante: il WAL resta piccolo e il checkpoint finale breve
+            connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            # Pausa tra i passi per lasciare spazio alle scritture della cronologia
+            time.sleep(0.005)
+
+    def _database_size(self) -> int:
+        """Dimensione su disco del database e del relativo WAL."""
+        return sum(
+            os.path.getsize(path)
+            for path in (self.database_path, f"{self.database_path}-wal")
+            if os.path.exists(path)
+        )
 
     def _format_history_entries(self, rows: List[tuple]) -> List[Dict]:
         """
@@ -144,17 +706,36 @@ class TextHistoryDatabase:
         Returns:
             Lista di dizionari con i dati formattati
         """
-        entries = []
-        for row in rows:
-            entry = {
-                "id": row[0],
-                "text": self._truncate_text(row[1], max_length=100),
-                "voice": row[2],
-                "timestamp": row[3],
-                "user_ip": self._anonymize_ip(row[4])
-            }
-            entries.append(entry)
-        return entries
+        return [self.format_entry(*row) for row in rows]
+
+    def format_entry(
+        self,
+        entry_id: int,
+        text: str,
+        voice: str,
+        timestamp: str,
+        user_ip: Optional[str]
+    ) -> Dict:
+        """
+        Formatta una voce come restituita dalle query della cronologia.
+
+        Args:
+            entry_id: ID della voce
+            text: Testo completo
+            voice: Voce utilizzata
+            timestamp: Timestamp della voce (UTC, formato SQLite)
+            user_ip: Indirizzo IP dell'utente
+
+        Returns:
+            Dizionario con testo troncato e IP anonimizzato
+        """
+        return {
+            "id": entry_id,
+            "text": self._truncate_text(text, max_length=100),
+            "voice": voice,
+            "timestamp": timestamp,
+            "user_ip": self._anonymize_ip(user_ip)
+        }
 
     @staticmethod
     def _truncate_text(text: str, max_length: int = 100) -> str:
@@ -8,10 +8,18 @@ from .azure_speech import (
     SSMLParameters,
     VoiceStyle
 )
+from .synthesized_audio import SynthesizedAudio
+from .azure_synthesizer_pool import SpeechSynthesizerPool
+from .text_chunker import split_sentences, split_text, stitch_audio
 
 __all__ = [
     "AzureSpeechService",
     "SSMLGenerator",
     "SSMLParameters",
-    "VoiceStyle"
+    "VoiceStyle",
+    "SynthesizedAudio",
+    "SpeechSynthesizerPool",
+    "split_sentences",
+    "split_text",
+    "stitch_audio"
 ]
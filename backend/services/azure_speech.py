@@ -6,12 +6,15 @@ di audio TTS tramite Azure Speech Services, supportando voci neurali italiane
 e controlli avanzati tramite SSML.
 """
 
-import os
 import html
+import asyncio
 import logging
-from typing import Dict, Optional, Any
+from typing import AsyncIterator, Dict, Optional, Any
 import azure.cognitiveservices.speech as speechsdk
 
+from .synthesized_audio import SynthesizedAudio
+from .azure_synthesizer_pool import SpeechSynthesizerPool
+
 logger = logging.getLogger(__name__)
 
 
@@ -178,7 +181,23 @@ class AzureSpeechService:
     neurali italiane di Azure con supporto per SSML avanzato.
     """
 
-    def __init__(self, speech_key: str, speech_region: str, speech_endpoint: Optional[str] = None):
+    # Formati WAV a 8kHz restituiti direttamente da Azure per i centralini
+    TELEPHONY_FORMATS = {
+        "pcm": speechsdk.SpeechSynthesisOutputFormat.Riff8Khz16BitMonoPcm,
+        "alaw": speechsdk.SpeechSynthesisOutputFormat.Riff8Khz8BitMonoALaw,
+        "ulaw": speechsdk.SpeechSynthesisOutputFormat.Riff8Khz8BitMonoMULaw
+    }
+
+    # Formato PCM a 8kHz senza intestazione usato per lo streaming
+    TELEPHONY_STREAM_FORMAT = speechsdk.SpeechSynthesisOutputFormat.Raw8Khz16BitMonoPcm
+
+    def __init__(
+        self,
+        speech_key: str,
+        speech_region: str,
+        speech_endpoint: Optional[str] = None,
+        synthesizer_pool_size: int = 2
+    ):
         """
         Inizializza il servizio Azure Speech.
 
@@ -186,12 +205,17 @@ class AzureSpeechService:
             speech_key: Chiave API Azure Speech
             speech_region: Regione Azure (es. westeurope)
             speech_endpoint: Endpoint personalizzato opzionale
+            synthesizer_pool_size: Synthesizer pre-connessi per formato di output
         """
         self.speech_key = speech_key
         self.speech_region = speech_region
         self.speech_endpoint = speech_endpoint
         self._voices_cache = None
         self._voices_cache_initialized = False
+        self.synthesizer_pool = SpeechSynthesizerPool(
+            config_factory=self._create_speech_config,
+            pool_size=synthesizer_pool_size
+        )
 
     def _create_speech_config(self) -> speechsdk.SpeechConfig:
         """
@@ -210,6 +234,15 @@ class AzureSpeechService:
             region=self.speech_region
         )
 
+    async def warm_up(self) -> int:
+        """
+        Pre-connette i synthesizer del pool per il formato predefinito.
+
+        Returns:
+            Numero di synthesizer creati
+        """
+        return await self.synthesizer_pool.warm_up()
+
     async def test_connection(self) -> bool:
         """
         Testa la connessione ad Azure Speech Services.
@@ -218,15 +251,8 @@ class AzureSpeechService:
             True se la connessione ha successo, False altrimenti
         """
         try:
-            speech_config = self._create_speech_config()
-            speech_config.speech_synthesis_voice_name = "it-IT-ElsaNeural"
-
-            synthesizer = speechsdk.SpeechSynthesizer(
-                speech_config=speech_config,
-                audio_config=None
-            )
-
-            result = synthesizer.speak_text_async("Test").get()
+            ssml = SSMLGenerator.generate("Test", "it-IT-ElsaNeural", SSMLParameters())
+            result = await self.synthesizer_pool.speak_ssml(ssml)
 
             if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
                 logger.info("Connessione Azure Speech verificata con successo")
@@ -238,6 +264,151 @@ class AzureSpeechService:
             logger.error(f"Errore test connessione Azure Speech: {error}")
             return False
 
+    async def probe(self) -> bool:
+        """
+        Verifica in modo economico che il servizio risponda.
+
+        Richiede l'elenco delle voci, autenticato con la chiave ma senza
+        sintesi (nessun carattere fatturato).
+
+        Returns:
+            True se il servizio ha risposto correttamente
+        """
+        # Stessa configurazione della sintesi (endpoint personalizzato o regione)
+        synthesizer = speechsdk.SpeechSynthesizer(
+            speech_config=self._create_speech_config(),
+            audio_config=None
+        )
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, synthesizer.get_voices_async("it-IT").get)
+        return result.reason == speechsdk.ResultReason.VoicesListRetrieved
+
+    async def synthesize(
+        self,
+        text: str,
+        voice: str,
+        ssml_parameters: Optional[SSMLParameters] = None
+    ) -> Optional[SynthesizedAudio]:
+        """
+        Sintetizza il testo restituendo l'audio in memoria.
+
+        Args:
+            text: Testo da sintetizzare
+            voice: Identificativo della voce Azure
+            ssml_parameters: Parametri SSML opzionali per controllo avanzato
+
+        Returns:
+            Buffer PCM sintetizzato, None se la sintesi fallisce
+
+        Raises:
+            ValueError: Se Azure rifiuta la richiesta (es. voce inesistente)
+        """
+        try:
+            ssml = self._build_ssml(text, voice, ssml_parameters)
+            result = await self.synthesizer_pool.speak_ssml(ssml)
+
+            return self._extract_audio_result(result)
+        except ValueError:
+            raise
+        except Exception as error:
+            logger.error(f"Errore sintesi Azure Speech: {error}")
+            return None
+
+    async def synthesize_telephony(
+        self,
+        text: str,
+        voice: str,
+        audio_quality: str,
+        ssml_parameters: Optional[SSMLParameters] = None
+    ) -> Optional[bytes]:
+        """
+        Sintetizza il testo direttamente in un WAV telefonico a 8kHz.
+
+        Args:
+            text: Testo da sintetizzare
+            voice: Identificativo della voce Azure
+            audio_quality: Qualità audio (pcm, alaw, ulaw)
+            ssml_parameters: Parametri SSML opzionali per controllo avanzato
+
+        Returns:
+            Contenuto del file WAV (RIFF), None se la sintesi fallisce
+
+        Raises:
+            ValueError: Se la qualità non è supportata o Azure rifiuta la richiesta
+        """
+        if audio_quality not in self.TELEPHONY_FORMATS:
+            raise ValueError(f"Qualità audio non supportata: {audio_quality}")
+
+        try:
+            ssml = self._build_ssml(text, voice, ssml_parameters)
+            result = await self.synthesizer_pool.speak_ssml(
+                ssml, output_format=self.TELEPHONY_FORMATS[audio_quality])
+
+            if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+                if not result.audio_data:
+                    logger.error("Audio sintetizzato vuoto")
+                    return None
+
+                logger.info(
+                    f"Sintesi telefonica completata: {len(result.audio_data)} bytes "
+                    f"({audio_quality})"
+                )
+                return result.audio_data
+
+            self._raise_if_bad_request(result)
+            self._log_synthesis_error(result)
+            return None
+        except ValueError:
+            raise
+        except Exception as error:
+            logger.error(f"Errore sintesi Azure Speech: {error}")
+            return None
+
+    async def stream_telephony(
+        self,
+        text: str,
+        voice: str,
+        ssml_parameters: Optional[SSMLParameters] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Sintetizza il testo restituendo PCM a 8kHz man mano che arriva.
+
+        Args:
+            text: Testo da sintetizzare
+            voice: Identificativo della voce Azure
+            ssml_parameters: Parametri SSML opzionali per controllo avanzato
+
+        Yields:
+            Blocchi PCM mono 16 bit little-endian a 8kHz, senza intestazione
+
+        Raises:
+            ValueError: Se Azure rifiuta la richiesta (es. voce inesistente)
+            Exception: Se la sintesi viene annullata o fallisce
+        """
+        ssml = self._build_ssml(text, voice, ssml_parameters)
+        async for block in self.synthesizer_pool.stream_ssml(
+                ssml, output_format=self.TELEPHONY_STREAM_FORMAT):
+            yield block
+
+    def _build_ssml(
+        self,
+        text: str,
+        voice: str,
+        ssml_parameters: Optional[SSMLParameters]
+    ) -> str:
+        """
+        Genera l'SSML della richiesta, con i parametri di default se non necessari.
+
+        La voce viene sempre indicata tramite SSML, così qualsiasi
+        synthesizer del pool può servire la richiesta.
+        """
+        if ssml_parameters and self._should_use_ssml(ssml_parameters):
+            logger.debug("Utilizzo SSML per sintesi avanzata")
+        else:
+            ssml_parameters = SSMLParameters()
+
+        return SSMLGenerator.generate(text, voice, ssml_parameters)
+
     async def synthesize_to_file(
         self,
         text: str,
@@ -257,24 +428,17 @@ class AzureSpeechService:
         Returns:
             True se la sintesi ha successo, False altrimenti
         """
-        try:
-            speech_config = self._create_speech_config()
-            speech_config.speech_synthesis_voice_name = voice
+        audio = await self.synthesize(text, voice, ssml_parameters)
 
-            synthesizer = speechsdk.SpeechSynthesizer(
-                speech_config=speech_config
-            )
-
-            if ssml_parameters and self._should_use_ssml(ssml_parameters):
-                result = self._synthesize_with_ssml(
-                    synthesizer, text, voice, ssml_parameters
-                )
-            else:
-                result = synthesizer.speak_text_async(text).get()
+        if audio is None:
+            return False
 
-            return self._save_audio_result(result, output_path)
+        try:
+            with open(output_path, 'wb') as audio_file:
+                audio_file.write(audio.to_wav_bytes())
+            return True
         except Exception as error:
-            logger.error(f"Errore sintesi Azure Speech: {error}")
+            logger.error(f"Errore salvataggio audio Azure Speech: {error}")
             return False
 
     @staticmethod
@@ -289,54 +453,55 @@ class AzureSpeechService:
             parameters.style
         ])
 
-    def _synthesize_with_ssml(
-        self,
-        synthesizer: speechsdk.SpeechSynthesizer,
-        text: str,
-        voice: str,
-        parameters: SSMLParameters
-    ) -> speechsdk.SpeechSynthesisResult:
-        """Esegue la sintesi utilizzando SSML."""
-        ssml = SSMLGenerator.generate(text, voice, parameters)
-        logger.debug(f"Utilizzo SSML per sintesi avanzata")
-        return synthesizer.speak_ssml_async(ssml).get()
-
-    def _save_audio_result(
+    def _extract_audio_result(
         self,
-        result: speechsdk.SpeechSynthesisResult,
-        output_path: str
-    ) -> bool:
+        result: speechsdk.SpeechSynthesisResult
+    ) -> Optional[SynthesizedAudio]:
         """
-        Salva il risultato della sintesi su file.
+        Estrae l'audio PCM dal risultato della sintesi.
 
         Args:
             result: Risultato della sintesi Azure
-            output_path: Percorso del file di output
 
         Returns:
-            True se il salvataggio ha successo
+            Buffer PCM, None se la sintesi non è riuscita o l'audio è vuoto
         """
         if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            with open(output_path, 'wb') as audio_file:
-                audio_file.write(result.audio_data)
+            if not result.audio_data:
+                logger.error("Audio sintetizzato vuoto")
+                return None
+
+            audio = SynthesizedAudio.from_wav_bytes(result.audio_data)
+            logger.info(
+                f"Sintesi completata: {len(audio.pcm_data)} bytes "
+                f"({audio.sample_rate} Hz)"
+            )
+            return audio
 
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                logger.info(
-                    f"Sintesi completata: {os.path.getsize(output_path)} bytes"
-                )
-                return True
+        self._raise_if_bad_request(result)
+        self._log_synthesis_error(result)
+        return None
 
-            logger.error("File audio vuoto o non creato")
-            return False
+    @staticmethod
+    def _raise_if_bad_request(result: speechsdk.SpeechSynthesisResult) -> None:
+        """
+        Solleva ValueError se Azure ha rifiutato la richiesta.
 
-        self._log_synthesis_error(result)
-        return False
+        Una richiesta non valida (es. voce inesistente) non è un guasto del
+        servizio e non deve aprirne il circuito.
+        """
+        if result.reason != speechsdk.ResultReason.Canceled:
+            return
+
+        details = result.cancellation_details
+        if details.error_code == speechsdk.CancellationErrorCode.BadRequest:
+            raise ValueError(f"Richiesta rifiutata da Azure Speech: {details.error_details}")
 
     @staticmethod
     def _log_synthesis_error(result: speechsdk.SpeechSynthesisResult) -> None:
         """Registra informazioni dettagliate su errori di sintesi."""
         if result.reason == speechsdk.ResultReason.Canceled:
-            details = speechsdk.CancellationDetails(result)
+            details = result.cancellation_details
             logger.error(f"Sintesi annullata: {details.reason}")
             if details.error_details:
                 logger.error(f"Dettagli errore: {details.error_details}")
@@ -368,8 +533,9 @@ class AzureSpeechService:
                 audio_config=None
             )
 
-            # Ottieni tutte le voci
-            result = synthesizer.get_voices_async().get()
+            # Ottieni tutte le voci senza bloccare l'event loop
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, synthesizer.get_voices_async().get)
 
             if result.reason == speechsdk.ResultReason.VoicesListRetrieved:
                 # Filtra solo voci italiane neurali
@@ -0,0 +1,320 @@
+"""
+Pool di SpeechSynthesizer Azure pre-connessi.
+
+Creare un SpeechSynthesizer per ogni richiesta costa una negoziazione
+TLS/WebSocket verso Azure. Questo modulo mantiene un insieme di
+synthesizer già connessi per formato di output, li riutilizza tra le
+richieste e attende i risultati dell'SDK senza bloccare l'event loop.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any
+
+import azure.cognitiveservices.speech as speechsdk
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechSynthesizerPool:
+    """
+    Pool di SpeechSynthesizer riutilizzabili, separati per formato di output.
+
+    La voce è indicata nell'SSML di ogni richiesta, quindi lo stesso
+    synthesizer può servire qualsiasi voce. Ogni synthesizer esegue una
+    sola sintesi alla volta; fino a pool_size sintesi per formato possono
+    procedere in parallelo.
+    """
+
+    def __init__(
+        self,
+        config_factory: Callable[[], speechsdk.SpeechConfig],
+        pool_size: int = 2
+    ):
+        """
+        Inizializza il pool.
+
+        Args:
+            config_factory: Funzione che crea una nuova SpeechConfig
+            pool_size: Numero massimo di synthesizer per formato di output
+        """
+        self._config_factory = config_factory
+        self.pool_size = max(pool_size, 1)
+
+        self._idle: Dict[str, List[speechsdk.SpeechSynthesizer]] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_use: Dict[str, int] = {}
+        self._connections: Dict[int, speechsdk.Connection] = {}
+        self._lock = threading.Lock()
+
+        self.created = 0
+        self.discarded = 0
+        self.reused = 0
+        self.stopped = 0
+
+    @staticmethod
+    def _format_key(output_format: Optional[speechsdk.SpeechSynthesisOutputFormat]) -> str:
+        """Chiave del pool associata a un formato di output."""
+        return output_format.name if output_format is not None else "default"
+
+    def _create_synthesizer(
+        self,
+        output_format: Optional[speechsdk.SpeechSynthesisOutputFormat]
+    ) -> speechsdk.SpeechSynthesizer:
+        """
+        Crea un synthesizer e apre subito la connessione al servizio.
+
+        Args:
+            output_format: Formato audio richiesto ad Azure (None = default)
+
+        Returns:
+            SpeechSynthesizer con connessione già avviata
+        """
+        speech_config = self._config_factory()
+        if output_format is not None:
+            speech_config.set_speech_synthesis_output_format(output_format)
+
+        # audio_config=None: il risultato resta in memoria (result.audio_data)
+        synthesizer = speechsdk.SpeechSynthesizer(
+            speech_config=speech_config,
+            audio_config=None
+        )
+
+        # Pre-connessione: la negoziazione TLS/WebSocket avviene ora e non
+        # durante la prima sintesi
+        connection = speechsdk.Connection.from_speech_synthesizer(synthesizer)
+        connection.open(True)
+
+        with self._lock:
+            self._connections[id(synthesizer)] = connection
+            self.created += 1
+
+        return synthesizer
+
+    def _discard(self, synthesizer: speechsdk.SpeechSynthesizer) -> None:
+        """Chiude la connessione di un synthesizer non più affidabile."""
+        with self._lock:
+            connection = self._connections.pop(id(synthesizer), None)
+            self.discarded += 1
+
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception as error:
+                logger.debug(f"Errore chiusura connessione Azure: {error}")
+
+    def _stop_and_discard(
+        self,
+        synthesizer: speechsdk.SpeechSynthesizer,
+        result_future: Optional[speechsdk.ResultFuture] = None
+    ) -> None:
+        """
+        Ferma una sintesi ancora in corso e scarta il synthesizer.
+
+        Eseguito in un thread: attende che l'SDK abbia davvero terminato la
+        sintesi prima di chiudere la connessione.
+
+        Args:
+            synthesizer: Synthesizer con una sintesi in corso
+            result_future: Risultato atteso della sintesi (None = nessuno)
+        """
+        try:
+            synthesizer.stop_speaking_async().get()
+            if result_future is not None:
+                result_future.get()
+        except Exception as error:
+            logger.debug(f"Errore arresto sintesi Azure: {error}")
+
+        with self._lock:
+            self.stopped += 1
+        self._discard(synthesizer)
+
+    def _get_semaphore(self, key: str) -> asyncio.Semaphore:
+        """Semaforo che limita le sintesi concorrenti per formato."""
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(self.pool_size)
+        return self._semaphores[key]
+
+    async def warm_up(
+        self,
+        output_format: Optional[speechsdk.SpeechSynthesisOutputFormat] = None
+    ) -> int:
+        """
+        Crea e connette i synthesizer mancanti per un formato.
+
+        Args:
+            output_format: Formato audio da preparare (None = default)
+
+        Returns:
+            Numero di synthesizer creati
+        """
+        key = self._format_key(output_format)
+        loop = asyncio.get_running_loop()
+        missing = self.pool_size - len(self._idle.get(key, []))
+
+        if missing <= 0:
+            return 0
+
+        synthesizers = await asyncio.gather(*[
+            loop.run_in_executor(None, self._create_synthesizer, output_format)
+            for _ in range(missing)
+        ])
+        self._idle.setdefault(key, []).extend(synthesizers)
+
+        logger.info(f"Pool Azure pre-connesso: {len(synthesizers)} synthesizer ({key})")
+        return len(synthesizers)
+
+    async def speak_ssml(
+        self,
+        ssml: str,
+        output_format: Optional[speechsdk.SpeechSynthesisOutputFormat] = None
+    ) -> speechsdk.SpeechSynthesisResult:
+        """
+        Sintetizza un documento SSML con un synthesizer del pool.
+
+        L'attesa del risultato avviene in un thread, così l'event loop resta
+        libero durante la sintesi. I synthesizer che terminano con errore
+        vengono scartati e ricreati alla richiesta successiva. Se la
+        richiesta viene annullata (es. tentativo perdente dell'hedging) la
+        sintesi viene fermata e attesa prima di scartare il synthesizer, così
+        l'SDK non continua a lavorare su un risultato che nessuno legge.
+
+        Args:
+            ssml: Documento SSML completo (con tag voice)
+            output_format: Formato audio richiesto ad Azure (None = default)
+
+        Returns:
+            Risultato della sintesi
+
+        Raises:
+            Exception: Errori dell'SDK durante creazione o sintesi
+        """
+        key = self._format_key(output_format)
+        loop = asyncio.get_running_loop()
+
+        async with self._get_semaphore(key):
+            synthesizer = await self._acquire(key, output_format)
+            idle = self._idle[key]
+
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+            try:
+                result_future = synthesizer.speak_ssml_async(ssml)
+                result = await loop.run_in_executor(None, result_future.get)
+            except asyncio.CancelledError:
+                # Lo slot resta occupato finché Azure non ha fermato la sintesi
+                await asyncio.shield(loop.run_in_executor(
+                    None, self._stop_and_discard, synthesizer, result_future))
+                raise
+            except BaseException:
+                self._discard(synthesizer)
+                raise
+            finally:
+                self._in_use[key] -= 1
+
+            if result.reason == speechsdk.ResultReason.Canceled:
+                self._discard(synthesizer)
+            else:
+                idle.append(synthesizer)
+
+            return result
+
+    async def stream_ssml(
+        self,
+        ssml: str,
+        output_format: Optional[speechsdk.SpeechSynthesisOutputFormat] = None,
+        chunk_size: int = 3200
+    ) -> AsyncIterator[bytes]:
+        """
+        Sintetizza un documento SSML restituendo l'audio man mano che arriva.
+
+        Usa start_speaking_ssml_async e un AudioDataStream: il primo blocco
+        è disponibile appena Azure inizia a inviare audio. Il synthesizer
+        torna nel pool solo se lo stream viene letto fino in fondo; se lo
+        stream viene interrotto la sintesi viene fermata prima di scartarlo.
+
+        Args:
+            ssml: Documento SSML completo (con tag voice)
+            output_format: Formato audio richiesto ad Azure (None = default)
+            chunk_size: Dimensione massima in bytes di ogni blocco
+
+        Yields:
+            Blocchi audio nel formato richiesto
+
+        Raises:
+            ValueError: Se Azure rifiuta la richiesta (es. voce inesistente)
+            Exception: Se la sintesi viene annullata o fallisce
+        """
+        key = self._format_key(output_format)
+        loop = asyncio.get_running_loop()
+
+        async with self._get_semaphore(key):
+            synthesizer = await self._acquire(key, output_format)
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+            completed = False
+
+            try:
+                result = await loop.run_in_executor(
+                    None, synthesizer.start_speaking_ssml_async(ssml).get)
+
+                if result.reason == speechsdk.ResultReason.Canceled:
+                    details = result.cancellation_details
+                    if details.error_code == speechsdk.CancellationErrorCode.BadRequest:
+                        # Richiesta non valida (es. voce inesistente), non un guasto
+                        raise ValueError(
+                            f"Richiesta rifiutata da Azure Speech: {details.error_details}")
+                    raise Exception(
+                        f"Sintesi annullata: {details.reason} {details.error_details or ''}")
+
+                stream = speechsdk.AudioDataStream(result)
+                while True:
+                    buffer = bytes(chunk_size)
+                    filled = await loop.run_in_executor(None, stream.read_data, buffer)
+                    if not filled:
+                        break
+                    yield buffer[:filled]
+
+                if stream.status == speechsdk.StreamStatus.Canceled:
+                    raise Exception("Sintesi annullata durante lo streaming")
+
+                completed = True
+            finally:
+                self._in_use[key] -= 1
+                if completed:
+                    self._idle[key].append(synthesizer)
+                else:
+                    # Nessuna attesa qui: lo stream può essere chiuso durante
+                    # l'annullamento della richiesta
+                    loop.run_in_executor(None, self._stop_and_discard, synthesizer)
+
+    async def _acquire(
+        self,
+        key: str,
+        output_format: Optional[speechsdk.SpeechSynthesisOutputFormat]
+    ) -> speechsdk.SpeechSynthesizer:
+        """Prende un synthesizer inattivo dal pool o ne crea uno nuovo."""
+        idle = self._idle.setdefault(key, [])
+        if idle:
+            self.reused += 1
+            return idle.pop()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self._create_synthesizer, output_format)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Restituisce lo stato del pool.
+
+        Returns:
+            Dizionario con synthesizer inattivi per formato e contatori
+        """
+        return {
+            "pool_size": self.pool_size,
+            "idle": {key: len(items) for key, items in self._idle.items()},
+            "in_use": dict(self._in_use),
+            "created": self.created,
+            "reused": self.reused,
+            "discarded": self.discarded,
+            "stopped": self.stopped
+        }
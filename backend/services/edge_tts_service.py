@@ -7,22 +7,36 @@ senza necessità di chiavi API o abbonamenti.
 
 import edge_tts
 import asyncio
+import io
 import logging
-import os
-import tempfile
-from typing import Optional
+from typing import AsyncIterator, Optional
 from pydub import AudioSegment
 
+from .synthesized_audio import SynthesizedAudio
+
 logger = logging.getLogger(__name__)
 
 
 class EdgeTTSService:
     """Servizio per generazione TTS usando Edge TTS (gratuito)"""
 
-    def __init__(self):
-        """Inizializza il servizio Edge TTS"""
+    # Edge TTS restituisce MP3 mono a 24kHz
+    SAMPLE_RATE = 24000
+
+    # Dimensione dei blocchi PCM letti dal decoder
+    PCM_READ_SIZE = 64 * 1024
+
+    def __init__(self, streaming_decode: bool = True):
+        """
+        Inizializza il servizio Edge TTS
+
+        Args:
+            streaming_decode: Se True decodifica l'MP3 man mano che arriva
+                dalla rete, altrimenti attende il download completo
+        """
         self.available_voices = None
         self._voices_cache_initialized = False
+        self.streaming_decode = streaming_decode
         logger.info("✅ [Edge TTS] Servizio inizializzato con successo")
 
     async def _initialize_voices(self):
@@ -63,28 +77,26 @@ class EdgeTTSService:
             }
             self._voices_cache_initialized = True
 
-    async def generate_speech(
+    async def synthesize(
         self,
         text: str,
         voice: str,
-        output_path: str,
         rate: str = "+0%",
         volume: str = "+0%",
         pitch: str = "+0Hz"
-    ) -> bool:
+    ) -> Optional[SynthesizedAudio]:
         """
-        Genera audio TTS usando Edge TTS e converte in WAV.
+        Genera audio TTS usando Edge TTS e lo restituisce in memoria.
 
         Args:
             text: Testo da convertire in speech
             voice: Nome della voce da utilizzare
-            output_path: Percorso dove salvare il file audio (WAV)
             rate: Velocità (es. "+20%", "-10%")
             volume: Volume (es. "+50%", "-20%")
             pitch: Tono (es. "+5Hz", "-3Hz")
 
         Returns:
-            True se successo, False altrimenti
+            Buffer PCM decodificato, None in caso di errore
         """
         try:
             # Inizializza le voci se necessario
@@ -99,9 +111,6 @@ class EdgeTTSService:
             logger.info(
                 f"🎤 Generazione TTS con Edge: voce={voice}, rate={rate}, volume={volume}, pitch={pitch}")
 
-            # Edge TTS genera MP3, quindi salviamo prima in un file temporaneo
-            temp_mp3 = output_path.replace('.wav', '_temp.mp3')
-
             # Crea comunicazione Edge TTS
             communicate = edge_tts.Communicate(
                 text=text,
@@ -111,43 +120,239 @@ class EdgeTTSService:
                 pitch=pitch
             )
 
-            # Salva l'audio MP3 temporaneo
-            await communicate.save(temp_mp3)
-
-            # Verifica che il file MP3 sia stato creato
-            if not os.path.exists(temp_mp3):
-                raise Exception(f"File MP3 temporaneo non creato: {temp_mp3}")
+            if self.streaming_decode:
+                audio = await self._decode_streaming(communicate)
+            else:
+                audio = await self._decode_buffered(communicate)
 
             logger.info(
-                f"✅ MP3 temporaneo creato: {temp_mp3} ({os.path.getsize(temp_mp3)} bytes)")
+                f"✅ Audio generato e decodificato con successo ({audio.duration_seconds:.2f}s)")
+            return audio
 
-            # Converti MP3 in WAV usando pydub
-            logger.info(f"🔄 [Edge TTS] Conversione formato: MP3 → WAV")
-            audio = AudioSegment.from_mp3(temp_mp3)
-            audio.export(output_path, format="wav")
+        except Exception as error:
+            logger.error(f"❌ [Edge TTS] Errore durante la generazione: {error}")
+            return None
 
-            # Verifica che il WAV sia stato creato
-            if not os.path.exists(output_path):
-                raise Exception(f"File WAV non creato: {output_path}")
+    async def _decode_buffered(self, communicate: edge_tts.Communicate) -> SynthesizedAudio:
+        """
+        Scarica l'intero MP3 in memoria e poi lo decodifica.
 
-            logger.info(
-                f"✅ WAV creato: {output_path} ({os.path.getsize(output_path)} bytes)")
+        Args:
+            communicate: Comunicazione Edge TTS già configurata
 
-            # Rimuovi file temporaneo
-            if os.path.exists(temp_mp3):
-                os.remove(temp_mp3)
-                logger.info(f"🗑️ [Edge TTS] File temporaneo rimosso: {os.path.basename(temp_mp3)}")
+        Returns:
+            Buffer PCM decodificato
 
-            logger.info(
-                f"✅ Audio generato e convertito con successo: {output_path}")
-            return True
+        Raises:
+            Exception: Se non viene ricevuto audio
+        """
+        mp3_buffer = io.BytesIO()
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                mp3_buffer.write(chunk["data"])
+
+        if not mp3_buffer.tell():
+            raise Exception("Nessun audio ricevuto da Edge TTS")
+
+        logger.info(f"✅ MP3 ricevuto: {mp3_buffer.tell()} bytes")
+
+        # Decodifica MP3 → PCM senza file temporanei
+        logger.info("🔄 [Edge TTS] Conversione formato: MP3 → PCM")
+        mp3_buffer.seek(0)
+        audio = AudioSegment.from_file(mp3_buffer, format="mp3")
+        return SynthesizedAudio.from_audio_segment(audio)
+
+    async def _decode_streaming(self, communicate: edge_tts.Communicate) -> SynthesizedAudio:
+        """
+        Decodifica l'MP3 in modo incrementale mentre il download è in corso.
+
+        Args:
+            communicate: Comunicazione Edge TTS già configurata
+
+        Returns:
+            Buffer PCM mono 16 bit a SAMPLE_RATE
+
+        Raises:
+            Exception: Se non viene ricevuto audio o la decodifica fallisce
+        """
+        pcm_buffer = bytearray()
+        async for block in self._stream_decoded(communicate, self.SAMPLE_RATE):
+            pcm_buffer.extend(block)
+
+        return SynthesizedAudio(
+            pcm_data=bytes(pcm_buffer),
+            sample_rate=self.SAMPLE_RATE
+        )
+
+    async def stream_pcm(
+        self,
+        text: str,
+        voice: str,
+        sample_rate: int,
+        rate: str = "+0%",
+        volume: str = "+0%",
+        pitch: str = "+0Hz"
+    ) -> AsyncIterator[bytes]:
+        """
+        Genera audio TTS restituendo i campioni PCM man mano che sono pronti.
+
+        Args:
+            text: Testo da convertire in speech
+            voice: Nome della voce da utilizzare
+            sample_rate: Frequenza dei campioni prodotti (es. 8000)
+            rate: Velocità (es. "+20%", "-10%")
+            volume: Volume (es. "+50%", "-20%")
+            pitch: Tono (es. "+5Hz", "-3Hz")
+
+        Yields:
+            Blocchi PCM mono 16 bit little-endian
+
+        Raises:
+            Exception: Se non viene ricevuto audio o la decodifica fallisce
+        """
+        await self._initialize_voices()
+
+        if voice not in self.available_voices:
+            logger.warning(
+                f"Voce {voice} non disponibile, uso default it-IT-ElsaNeural")
+            voice = "it-IT-ElsaNeural"
 
+        logger.info(
+            f"🎤 Streaming TTS con Edge: voce={voice}, rate={rate}, volume={volume}, pitch={pitch}")
+
+        communicate = edge_tts.Communicate(
+            text=text,
+            voice=voice,
+            rate=rate,
+            volume=volume,
+            pitch=pitch
+        )
+
+        async for block in self._stream_decoded(communicate, sample_rate):
+            yield block
+
+    async def _stream_decoded(
+        self,
+        communicate: edge_tts.Communicate,
+        sample_rate: int
+    ) -> AsyncIterator[bytes]:
+        """
+        Decodifica l'MP3 di Edge TTS durante il download.
+
+        Un task scrive i blocchi ricevuti da communicate.stream() su stdin di
+        un unico processo ffmpeg, mentre i campioni PCM già decodificati
+        vengono letti da stdout e restituiti subito: al termine del download
+        resta da decodificare solo l'ultimo frammento.
+
+        Args:
+            communicate: Comunicazione Edge TTS già configurata
+            sample_rate: Frequenza dei campioni prodotti
+
+        Yields:
+            Blocchi PCM mono 16 bit little-endian
+
+        Raises:
+            Exception: Se non viene ricevuto audio o la decodifica fallisce
+        """
+        process = await asyncio.create_subprocess_exec(
+            AudioSegment.converter,
+            "-hide_banner", "-loglevel", "error",
+            "-f", "mp3", "-i", "pipe:0",
+            "-f", "s16le", "-acodec", "pcm_s16le",
+            "-ac", "1", "-ar", str(sample_rate),
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+
+        async def feed_mp3() -> int:
+            received = 0
+            try:
+                async for chunk in communicate.stream():
+                    if chunk["type"] != "audio":
+                        continue
+                    process.stdin.write(chunk["data"])
+                    received += len(chunk["data"])
+                    await process.stdin.drain()
+            finally:
+                # Chiude stdin anche in caso di errore: ffmpeg termina e
+                # stdout raggiunge la fine
+                process.stdin.close()
+            return received
+
+        feeder = asyncio.create_task(feed_mp3())
+        errors = asyncio.create_task(process.stderr.read())
+        decoded_bytes = 0
+        completed = False
+
+        try:
+            while True:
+                block = await process.stdout.read(self.PCM_READ_SIZE)
+                if not block:
+                    break
+                decoded_bytes += len(block)
+                yield block
+
+            received_bytes = await feeder
+            stderr = await errors
+            return_code = await process.wait()
+            completed = True
+        finally:
+            if not completed:
+                # Download interrotto o consumatore chiuso: termina il
+                # decoder senza lasciare processi
+                if process.returncode is None:
+                    process.kill()
+                feeder.cancel()
+                errors.cancel()
+                await process.wait()
+
+        if not received_bytes:
+            raise Exception("Nessun audio ricevuto da Edge TTS")
+
+        if return_code != 0:
+            raise Exception(
+                f"Decodifica MP3 fallita: {stderr.decode(errors='ignore').strip()}")
+
+        logger.info(
+            f"✅ MP3 ricevuto e decodificato in streaming: {received_bytes} bytes → {decoded_bytes} bytes PCM")
+
+    async def generate_speech(
+        self,
+        text: str,
+        voice: str,
+        output_path: str,
+        rate: str = "+0%",
+        volume: str = "+0%",
+        pitch: str = "+0Hz"
+    ) -> bool:
+        """
+        Genera audio TTS usando Edge TTS e lo salva in WAV.
+
+        Args:
+            text: Testo da convertire in speech
+            voice: Nome della voce da utilizzare
+            output_path: Percorso dove salvare il file audio (WAV)
+            rate: Velocità (es. "+20%", "-10%")
+            volume: Volume (es. "+50%", "-20%")
+            pitch: Tono (es. "+5Hz", "-3Hz")
+
+        Returns:
+            True se successo, False altrimenti
+        """
+        audio = await self.synthesize(text, voice, rate, volume, pitch)
+
+        if audio is None:
+            return False
+
+        try:
+            with open(output_path, "wb") as wav_file:
+                wav_file.write(audio.to_wav_bytes())
+            logger.info(f"✅ WAV creato: {output_path}")
+            return True
         except Exception as error:
-            logger.error(f"❌ [Edge TTS] Errore durante la generazione: {error}")
-            # Cleanup in caso di errore
-            temp_mp3 = output_path.replace('.wav', '_temp.mp3')
-            if os.path.exists(temp_mp3):
-                os.remove(temp_mp3)
+            logger.error(f"❌ [Edge TTS] Errore salvataggio WAV: {error}")
             return False
 
     async def get_available_voices(self) -> dict:
@@ -155,6 +360,16 @@ class EdgeTTSService:
         await self._initialize_voices()
         return self.available_voices
 
+    async def probe(self) -> bool:
+        """
+        Verifica in modo economico che il servizio risponda.
+
+        Returns:
+            True se l'elenco delle voci è stato scaricato
+        """
+        voices = await edge_tts.list_voices()
+        return bool(voices)
+
     @staticmethod
     async def list_all_voices():
         """Lista tutte le voci disponibili (metodo utility)"""
@@ -5,10 +5,15 @@ Integrazione minima con Google TTS per crazy-phoneTTS
 """
 
 import asyncio
+import io
 import os
 import logging
 from typing import Tuple, Dict
 
+from pydub import AudioSegment
+
+from .synthesized_audio import SynthesizedAudio
+
 try:
     from google.cloud import texttospeech
     from google.auth import default
@@ -23,6 +28,16 @@ logger = logging.getLogger(__name__)
 class GoogleTTSService:
     """Servizio essenziale Google Cloud Text-to-Speech"""
 
+    # Frequenza dei formati telefonici richiesti direttamente a Google
+    TELEPHONY_SAMPLE_RATE = 8000
+
+    # Codifiche Google per qualità telefonica (ALAW solo nelle versioni recenti)
+    TELEPHONY_ENCODINGS = {
+        "pcm": "LINEAR16",
+        "alaw": "ALAW",
+        "ulaw": "MULAW"
+    }
+
     def __init__(self):
         self.client = None
         self.available = False
@@ -55,6 +70,16 @@ class GoogleTTSService:
         """Controlla se il servizio è disponibile"""
         return self.available
 
+    async def probe(self) -> bool:
+        """Verifica in modo economico che il servizio risponda (elenco voci, senza sintesi)"""
+        if not self.available:
+            return False
+
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            None, lambda: self.client.list_voices(language_code="it-IT"))
+        return bool(response.voices)
+
     def get_available_voices(self) -> Dict[str, str]:
         """Restituisce voci italiane Google caricandole dinamicamente dall'API"""
         if not self.available:
@@ -110,6 +135,45 @@ class GoogleTTSService:
         if not self.available:
             raise Exception("Google TTS non disponibile")
 
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=texttospeech.AudioEncoding.MP3,
+            speaking_rate=max(0.25, min(4.0, speed))
+        )
+
+        return await self._request_synthesis(text, voice_name, audio_config), "mp3"
+
+    def supports_telephony(self, audio_quality: str) -> bool:
+        """Verifica se la libreria Google supporta la codifica telefonica richiesta"""
+        encoding = self.TELEPHONY_ENCODINGS.get(audio_quality)
+        return bool(encoding and texttospeech and
+                    hasattr(texttospeech.AudioEncoding, encoding))
+
+    async def synthesize_telephony(self, text: str, voice_name: str = "it-IT-Neural2-A", audio_quality: str = "pcm", speed: float = 1.0) -> bytes:
+        """
+        Sintetizza testo direttamente in WAV telefonico a 8kHz
+
+        Google restituisce LINEAR16, MULAW e ALAW già con intestazione WAV.
+
+        Returns:
+            bytes: contenuto del file WAV
+        """
+        if not self.available:
+            raise Exception("Google TTS non disponibile")
+
+        if not self.supports_telephony(audio_quality):
+            raise Exception(f"Codifica telefonica non supportata: {audio_quality}")
+
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=getattr(
+                texttospeech.AudioEncoding, self.TELEPHONY_ENCODINGS[audio_quality]),
+            sample_rate_hertz=self.TELEPHONY_SAMPLE_RATE,
+            speaking_rate=max(0.25, min(4.0, speed))
+        )
+
+        return await self._request_synthesis(text, voice_name, audio_config)
+
+    async def _request_synthesis(self, text: str, voice_name: str, audio_config) -> bytes:
+        """Esegue la richiesta di sintesi in un thread e restituisce l'audio"""
         try:
             synthesis_input = texttospeech.SynthesisInput(text=text)
 
@@ -118,11 +182,6 @@ class GoogleTTSService:
                 language_code="it-IT"
             )
 
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.MP3,
-                speaking_rate=max(0.25, min(4.0, speed))
-            )
-
             # Esegui sintesi in thread
             loop = asyncio.get_event_loop()
             response = await loop.run_in_executor(
@@ -134,7 +193,28 @@ class GoogleTTSService:
                 )
             )
 
-            return response.audio_content, "mp3"
+            return response.audio_content
 
         except Exception as e:
             raise Exception(f"Errore Google TTS: {str(e)}")
+
+    async def synthesize(self, text: str, voice_name: str = "it-IT-Neural2-A", speed: float = 1.0) -> SynthesizedAudio:
+        """
+        Sintetizza testo restituendo l'audio PCM in memoria
+
+        Returns:
+            SynthesizedAudio: buffer PCM decodificato
+        """
+        audio_data, audio_format = await self.synthesize_text(
+            text=text,
+            voice_name=voice_name,
+            speed=speed
+        )
+
+        # Decodifica (ffmpeg) in thread, senza bloccare l'event loop
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None,
+            lambda: SynthesizedAudio.from_audio_segment(
+                AudioSegment.from_file(io.BytesIO(audio_data), format=audio_format))
+        )
@@ -0,0 +1,85 @@
+"""
+Audio sintetizzato mantenuto in memoria.
+
+Questo modulo definisce il formato con cui i servizi TTS restituiscono
+l'audio allo stadio di mixaggio: campioni PCM con frequenza, ampiezza e
+numero di canali, senza passare da file intermedi su disco.
+"""
+
+import io
+import wave
+from dataclasses import dataclass
+
+from pydub import AudioSegment
+
+
+@dataclass
+class SynthesizedAudio:
+    """Buffer PCM lineare prodotto da un servizio TTS."""
+
+    pcm_data: bytes
+    sample_rate: int
+    sample_width: int = 2
+    channels: int = 1
+
+    @classmethod
+    def from_wav_bytes(cls, data: bytes) -> "SynthesizedAudio":
+        """
+        Crea il buffer da un file WAV PCM in memoria.
+
+        Args:
+            data: Contenuto del file WAV (RIFF)
+
+        Returns:
+            Buffer PCM con i parametri letti dall'intestazione
+        """
+        with wave.open(io.BytesIO(data), "rb") as wav_file:
+            return cls(
+                pcm_data=wav_file.readframes(wav_file.getnframes()),
+                sample_rate=wav_file.getframerate(),
+                sample_width=wav_file.getsampwidth(),
+                channels=wav_file.getnchannels()
+            )
+
+    @classmethod
+    def from_audio_segment(cls, audio: AudioSegment) -> "SynthesizedAudio":
+        """
+        Crea il buffer da un AudioSegment già decodificato.
+
+        Args:
+            audio: Segmento audio decodificato
+
+        Returns:
+            Buffer PCM con gli stessi parametri del segmento
+        """
+        return cls(
+            pcm_data=audio.raw_data,
+            sample_rate=audio.frame_rate,
+            sample_width=audio.sample_width,
+            channels=audio.channels
+        )
+
+    def to_audio_segment(self) -> AudioSegment:
+        """Restituisce l'audio come AudioSegment senza copie su disco."""
+        return AudioSegment(
+            data=self.pcm_data,
+            sample_width=self.sample_width,
+            frame_rate=self.sample_rate,
+            channels=self.channels
+        )
+
+    def to_wav_bytes(self) -> bytes:
+        """Serializza il buffer come file WAV PCM in memoria."""
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(self.channels)
+            wav_file.setsampwidth(self.sample_width)
+            wav_file.setframerate(self.sample_rate)
+            wav_file.writeframes(self.pcm_data)
+        return buffer.getvalue()
+
+    @property
+    def duration_seconds(self) -> float:
+        """Durata dell'audio in secondi."""
+        frame_width = self.sample_width * self.channels
+        return len(self.pcm_data) / float(frame_width * self.sample_rate)
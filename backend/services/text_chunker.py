@@ -0,0 +1,264 @@
+"""
+Sintesi a blocchi dei testi lunghi.
+
+Gli annunci lunghi (condizioni di servizio, informazioni in attesa) inviati
+come testo unico hanno una latenza di sintesi proporzionale alla lunghezza
+e possono superare i limiti per richiesta dei servizi. Questo modulo divide
+il testo italiano su confini di frase e di inciso, così i blocchi possono
+essere sintetizzati in parallelo, e ricompone l'audio con pause controllate
+e brevi dissolvenze ai punti di giunzione.
+"""
+
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+from .synthesized_audio import SynthesizedAudio
+
+# Abbreviazioni italiane comuni seguite dal punto che non chiudono la frase
+ABBREVIATIONS = {
+    "sig", "sigg", "sig.ra", "sig.na", "dott", "dott.ssa", "dr", "prof",
+    "prof.ssa", "ing", "avv", "arch", "geom", "rag", "on", "sen", "mons",
+    "es", "ca", "cfr", "pag", "pagg", "n", "nr", "num", "tel",
+    "cell", "fax", "art", "artt", "cap", "vol", "fig", "pp", "ss", "s.p.a",
+    "s.r.l", "s.n.c", "s.a.s", "spa", "srl", "c.so", "v.le", "p.za",
+    "p.zza", "loc", "fraz", "prov", "c.a", "p.es", "max", "min", "orig"
+}
+
+# Possibile fine frase: punteggiatura finale, eventuali virgolette o
+# parentesi di chiusura, spazio
+_SENTENCE_END = re.compile(r"([.!?…]+)([\"'»”’)\]]*)\s+")
+
+# Confini di inciso usati per spezzare le frasi troppo lunghe
+_CLAUSE_END = re.compile(r"([,;:]|\s[–—-])\s+")
+
+# Soglia sotto la quale i campioni ai bordi dei blocchi sono considerati silenzio
+SILENCE_THRESHOLD = 0.003
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Divide un testo italiano in frasi.
+
+    I paragrafi (righe vuote o a capo) chiudono sempre la frase; il punto
+    dopo abbreviazioni, iniziali e numeri non viene considerato fine frase.
+
+    Args:
+        text: Testo da dividere
+
+    Returns:
+        Frasi non vuote, nell'ordine del testo
+    """
+    sentences = []
+
+    for paragraph in re.split(r"\s*\n\s*", text.strip()):
+        start = 0
+        for match in _SENTENCE_END.finditer(paragraph):
+            if match.group(1) == "." and _is_abbreviation(paragraph[start:match.start()]):
+                continue
+            if not _starts_sentence(paragraph[match.end():]):
+                continue
+
+            sentences.append(paragraph[start:match.end()].strip())
+            start = match.end()
+
+        if paragraph[start:].strip():
+            sentences.append(paragraph[start:].strip())
+
+    return sentences
+
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """
+    Divide un testo in blocchi di al massimo max_chars caratteri.
+
+    Le frasi brevi consecutive vengono raggruppate nello stesso blocco;
+    le frasi più lunghe di max_chars vengono spezzate sugli incisi e, se
+    necessario, tra le parole.
+
+    Args:
+        text: Testo da dividere
+        max_chars: Lunghezza massima di un blocco
+
+    Returns:
+        Blocchi di testo da sintetizzare separatamente
+    """
+    chunks: List[str] = []
+    current = ""
+
+    for sentence in split_sentences(text):
+        for piece in _split_long(sentence, max_chars):
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+def stitch_audio(
+    parts: List[SynthesizedAudio],
+    pause_ms: int = 150,
+    crossfade_ms: int = 20
+) -> SynthesizedAudio:
+    """
+    Ricompone i blocchi sintetizzati in un unico audio.
+
+    Ai punti di giunzione il silenzio aggiunto dal servizio viene rimosso
+    e sostituito da una pausa di durata fissa; i bordi di ogni blocco
+    vengono raccordati con una breve dissolvenza per evitare click. Con
+    pause_ms = 0 i blocchi vengono sovrapposti in dissolvenza incrociata.
+
+    Args:
+        parts: Blocchi sintetizzati (convertiti al formato del primo, mono 16 bit)
+        pause_ms: Pausa tra un blocco e il successivo
+        crossfade_ms: Durata delle dissolvenze ai bordi
+
+    Returns:
+        Audio completo
+    """
+    if len(parts) == 1:
+        return parts[0]
+
+    sample_rate = parts[0].sample_rate
+    parts = [_to_mono_16bit(part, sample_rate) for part in parts]
+    fade_frames = int(sample_rate * crossfade_ms / 1000)
+    pause = np.zeros(int(sample_rate * pause_ms / 1000), dtype=np.float32)
+
+    # Segmenti già definitivi, concatenati una sola volta alla fine; l'ultimo
+    # blocco resta a parte finché non si conosce la giunzione successiva
+    segments: List[np.ndarray] = []
+    tail = None
+    for index, part in enumerate(parts):
+        samples = np.frombuffer(part.pcm_data, dtype="<i2").astype(np.float32)
+        samples = _trim_silence(
+            samples,
+            leading=index > 0,
+            trailing=index < len(parts) - 1
+        )
+
+        if tail is None:
+            tail = samples
+        elif pause_ms > 0:
+            segments.extend([_fade(tail, fade_frames, out=True), pause])
+            tail = _fade(samples, fade_frames, out=False)
+        else:
+            head, tail = _crossfade(tail, samples, fade_frames)
+            segments.append(head)
+
+    segments.append(tail)
+    result = np.concatenate(segments)
+
+    return SynthesizedAudio(
+        pcm_data=np.clip(result, -32768, 32767).astype("<i2").tobytes(),
+        sample_rate=sample_rate
+    )
+
+
+def _is_abbreviation(sentence: str) -> bool:
+    """True se il testo termina con un'abbreviazione o un'iniziale."""
+    words = sentence.split()
+    if not words:
+        return True
+
+    word = words[-1].lower().lstrip("(\"'«“")
+    return (
+        word in ABBREVIATIONS
+        or (len(word) == 1 and word.isalpha())
+    )
+
+
+def _starts_sentence(following: str) -> bool:
+    """True se il testo successivo può iniziare una nuova frase."""
+    following = following.lstrip("\"'«“(")
+    return not following or following[0].isupper() or following[0].isdigit()
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Spezza una frase troppo lunga sugli incisi, poi tra le parole."""
+    if len(sentence) <= max_chars:
+        return [sentence]
+
+    clauses = []
+    start = 0
+    for match in _CLAUSE_END.finditer(sentence):
+        clauses.append(sentence[start:match.end()].strip())
+        start = match.end()
+    clauses.append(sentence[start:].strip())
+
+    pieces: List[str] = []
+    current = ""
+    for clause in filter(None, clauses):
+        for word in (clause.split() if len(clause) > max_chars else [clause]):
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+
+    if current:
+        pieces.append(current)
+
+    return pieces
+
+
+def _to_mono_16bit(part: SynthesizedAudio, sample_rate: int) -> SynthesizedAudio:
+    """Porta un blocco a mono, 16 bit e alla frequenza indicata."""
+    if (part.sample_rate, part.sample_width, part.channels) == (sample_rate, 2, 1):
+        return part
+
+    audio = part.to_audio_segment()
+    return SynthesizedAudio.from_audio_segment(
+        audio.set_channels(1).set_sample_width(2).set_frame_rate(sample_rate))
+
+
+def _trim_silence(samples: np.ndarray, leading: bool, trailing: bool) -> np.ndarray:
+    """Rimuove il silenzio iniziale e/o finale di un blocco."""
+    voiced = np.flatnonzero(np.abs(samples) > SILENCE_THRESHOLD * 32768)
+    if not len(voiced):
+        return samples
+
+    start = voiced[0] if leading else 0
+    end = voiced[-1] + 1 if trailing else len(samples)
+    return samples[start:end]
+
+
+def _fade(samples: np.ndarray, frames: int, out: bool) -> np.ndarray:
+    """Applica una dissolvenza lineare in entrata o in uscita."""
+    frames = min(frames, len(samples))
+    if frames == 0:
+        return samples
+
+    samples = samples.copy()
+    ramp = np.linspace(0.0, 1.0, frames, dtype=np.float32)
+    if out:
+        samples[-frames:] *= ramp[::-1]
+    else:
+        samples[:frames] *= ramp
+    return samples
+
+
+def _crossfade(
+    first: np.ndarray,
+    second: np.ndarray,
+    frames: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sovrappone la fine del primo blocco all'inizio del secondo.
+
+    Returns:
+        Parte del primo blocco prima della sovrapposizione e secondo blocco
+        con la sovrapposizione in testa
+    """
+    frames = min(frames, len(first), len(second))
+    if frames == 0:
+        return first, second
+
+    ramp = np.linspace(0.0, 1.0, frames, dtype=np.float32)
+    overlap = first[-frames:] * ramp[::-1] + second[:frames] * ramp
+    return first[:-frames], np.concatenate([overlap, second[frames:]])
@@ -1,32 +1,72 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { API_URL } from '../utils/apiConfig';
 import { useWebSocket } from './useWebSocket';
 
+const HISTORY_SIZE = 10;
+
+/**
+ * Unisce nuove voci (dalla più recente) alla cronologia, senza duplicati
+ */
+const mergeHistoryEntries = (entries, prev) => {
+  const knownIds = new Set(prev.map(item => item.id));
+  const newEntries = entries.filter(item => !knownIds.has(item.id));
+  return [...newEntries, ...prev]
+    .sort((a, b) => b.id - a.id)
+    .slice(0, HISTORY_SIZE);
+};
+
 /**
  * Hook per gestione cronologia testi con WebSocket
+ *
+ * Alla riconnessione invia l'ultimo ID ricevuto (last_seen_id): il server
+ * risponde con le sole voci perse (history_delta) oppure, se il client è
+ * troppo indietro, con resync e lo snapshot da cui ripartire.
  */
 
 export const useTextHistory = () => {
   const [textHistory, setTextHistory] = useState([]);
+  const lastSeenIdRef = useRef(null);
+
+  const updateLastSeenId = (entries) => {
+    entries.forEach(item => {
+      if (lastSeenIdRef.current === null || item.id > lastSeenIdRef.current) {
+        lastSeenIdRef.current = item.id;
+      }
+    });
+  };
 
   const handleWebSocketMessage = (message) => {
     if (message.type === 'history_update') {
       setTextHistory(message.data);
+      updateLastSeenId(message.data);
+    } else if (message.type === 'resync') {
+      // Troppe voci perse (o ID sconosciuto): riparti dallo snapshot
+      console.log('🔄 [History] Risincronizzazione cronologia:', message.reason);
+      setTextHistory(message.data);
+      lastSeenIdRef.current = message.last_id ?? null;
+      updateLastSeenId(message.data);
+    } else if (message.type === 'history_delta' || message.type === 'history_batch') {
+      // history_batch: nuove voci aggregate dal server in un unico messaggio
+      setTextHistory(prev => mergeHistoryEntries(message.data, prev));
+      updateLastSeenId(message.data);
     } else if (message.type === 'new_text') {
+      updateLastSeenId([message.data]);
       // Evita duplicati verificando se l'ID esiste già
       setTextHistory(prev => {
         const exists = prev.some(item => item.id === message.data.id);
         if (exists) {
           return prev; // Non aggiungere se esiste già
         }
-        return [message.data, ...prev.slice(0, 9)];
+        return [message.data, ...prev.slice(0, HISTORY_SIZE - 1)];
       });
     }
   };
 
   const wsUrl = API_URL.replace('http', 'ws') + '/ws';
-  const { isConnected } = useWebSocket(wsUrl, handleWebSocketMessage);
+  const { isConnected } = useWebSocket(wsUrl, handleWebSocketMessage, () => ({
+    last_seen_id: lastSeenIdRef.current
+  }));
 
   useEffect(() => {
     loadTextHistory();
@@ -36,6 +76,7 @@ export const useTextHistory = () => {
     try {
       const response = await axios.get(`${API_URL}/api/history`);
       setTextHistory(response.data.data || []);
+      updateLastSeenId(response.data.data || []);
       console.log('📜 [History] Cronologia caricata:', response.data.data.length, 'elementi');
     } catch (err) {
       console.error('❌ [History] Errore caricamento cronologia:', err.message || err);
@@ -2,12 +2,26 @@ import { useState, useEffect, useRef } from 'react';
 
 /**
  * Hook per gestione connessione WebSocket con riconnessione automatica
+ *
+ * getConnectParams (opzionale) restituisce i parametri di query da inviare
+ * a ogni connessione, ad esempio l'ultimo ID ricevuto per la riconnessione.
  */
 
-export const useWebSocket = (url, onMessage) => {
+export const useWebSocket = (url, onMessage, getConnectParams) => {
   const [isConnected, setIsConnected] = useState(false);
   const wsRef = useRef(null);
   const reconnectTimeoutRef = useRef(null);
+  const getConnectParamsRef = useRef(getConnectParams);
+  getConnectParamsRef.current = getConnectParams;
+
+  const buildConnectUrl = () => {
+    const params = getConnectParamsRef.current ? getConnectParamsRef.current() : null;
+    const query = Object.entries(params || {})
+      .filter(([, value]) => value !== null && value !== undefined)
+      .map(([key, value]) => `${encodeURIComponent(key)}=${encodeURIComponent(value)}`)
+      .join('&');
+    return query ? `${url}${url.includes('?') ? '&' : '?'}${query}` : url;
+  };
 
   useEffect(() => {
     connect();
@@ -19,9 +33,10 @@ export const useWebSocket = (url, onMessage) => {
 
   const connect = () => {
     try {
-      console.log('🔌 [WebSocket] Inizializzazione connessione a:', url);
+      const connectUrl = buildConnectUrl();
+      console.log('🔌 [WebSocket] Inizializzazione connessione a:', connectUrl);
       
-      wsRef.current = new WebSocket(url);
+      wsRef.current = new WebSocket(connectUrl);
       
       wsRef.current.onopen = () => {
         console.log('✅ [WebSocket] Connessione stabilita con successo');